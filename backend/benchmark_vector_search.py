@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Vector Search Benchmark
+Compares the Chroma search path with the in-memory NumPy index on a synthetic
+corpus shaped like the PYQ collections (unit-length 384-dim embeddings with
+subject / chapter / topic metadata). Reports per-query latency and how many of
+Chroma's top-10 hits match the exact NumPy top-10, then the memory and
+recall@10 of float16 / int8 index storage against the float32 baseline, with
+and without exact re-ranking.
+
+Usage:
+    python benchmark_vector_search.py [--corpus 18000] [--queries 200] [--exclude 2000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from typing import List, Dict, Any, Callable
+
+import numpy as np
+import chromadb
+
+from numpy_index import NumpyVectorIndex
+
+SUBJECTS = ["Physics", "Chemistry", "Mathematics", "Biology"]
+
+def build_corpus(size: int, dim: int, seed: int = 7):
+    """Clustered unit vectors with metadata drawn per cluster"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(200, dim)).astype(np.float32)
+    clusters = rng.integers(0, len(centers), size=size)
+    vectors = centers[clusters] + 0.6 * rng.normal(size=(size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    ids = [f"q{i}" for i in range(size)]
+    documents = [f"question {i}" for i in range(size)]
+    metadatas = [{
+        "subject": SUBJECTS[cluster % len(SUBJECTS)],
+        "chapter": f"chapter_{cluster % 40}",
+        "topic": f"topic_{cluster}",
+        "difficulty": "medium"
+    } for cluster in clusters]
+    return ids, vectors, documents, metadatas
+
+def build_queries(vectors: np.ndarray, count: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), size=count)]
+    queries = picks + 0.3 * rng.normal(size=picks.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def time_queries(run: Callable[[np.ndarray], List[str]], queries: np.ndarray) -> Dict[str, Any]:
+    latencies = []
+    hits = []
+    for query in queries:
+        start = time.perf_counter()
+        hits.append(run(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": float(np.mean(latencies)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "hits": hits
+    }
+
+def overlap_at_k(reference: List[List[str]], candidate: List[List[str]], k: int = 10) -> float:
+    scores = [len(set(ref[:k]) & set(cand[:k])) / max(1, min(k, len(ref))) for ref, cand in zip(reference, candidate)]
+    return float(np.mean(scores)) if scores else 0.0
+
+def run_benchmark(corpus_size: int, query_count: int, exclude_count: int, k: int = 10) -> None:
+    dim = 384
+    ids, vectors, documents, metadatas = build_corpus(corpus_size, dim)
+    queries = build_queries(vectors, query_count)
+    exclude_ids = set(random.Random(3).sample(ids, min(exclude_count, len(ids))))
+
+    print(f"📦 Corpus: {corpus_size} x {dim}, {query_count} queries, {len(exclude_ids)} excluded IDs")
+
+    # Chroma, persisted to a temporary directory like the server uses
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="bench_chroma_"))
+    collection = client.create_collection(name="benchmark_questions")
+    for offset in range(0, corpus_size, 1000):
+        collection.add(
+            ids=ids[offset:offset + 1000],
+            embeddings=vectors[offset:offset + 1000].tolist(),
+            documents=documents[offset:offset + 1000],
+            metadatas=metadatas[offset:offset + 1000]
+        )
+    chroma_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = NumpyVectorIndex(dim)
+    index.add(ids, vectors, documents, metadatas)
+    numpy_build = time.perf_counter() - start
+
+    print(f"⏱️  Build: chroma {chroma_build:.2f}s, numpy {numpy_build:.2f}s "
+          f"(index {index.nbytes / (1024 * 1024):.1f} MB)")
+
+    def chroma_search(where, excluded):
+        def run(query):
+            fetch = min(corpus_size, k + len(excluded))
+            result = collection.query(query_embeddings=[query.tolist()], n_results=fetch, where=where)
+            return [qid for qid in result['ids'][0] if qid not in excluded][:k]
+        return run
+
+    def numpy_search(filters, excluded):
+        def run(query):
+            return [hit['question_id'] for hit in index.search([query], k, filters, [excluded])[0]]
+        return run
+
+    scenarios = [
+        ("unfiltered", None, None, set()),
+        ("subject filter", {"subject": "Physics"}, {"subject": "Physics"}, set()),
+        ("subject + exclusions", {"subject": "Physics"}, {"subject": "Physics"}, exclude_ids),
+    ]
+
+    print(f"\n{'scenario':<24}{'chroma mean':>12}{'chroma p95':>12}{'numpy mean':>12}{'numpy p95':>12}{'overlap@' + str(k):>12}")
+    for name, where, filters, excluded in scenarios:
+        chroma = time_queries(chroma_search(where, excluded), queries)
+        exact = time_queries(numpy_search(filters, excluded), queries)
+        print(f"{name:<24}{chroma['mean_ms']:>10.2f}ms{chroma['p95_ms']:>10.2f}ms"
+              f"{exact['mean_ms']:>10.2f}ms{exact['p95_ms']:>10.2f}ms"
+              f"{overlap_at_k(exact['hits'], chroma['hits'], k):>12.3f}")
+
+    batch = 16
+    start = time.perf_counter()
+    for offset in range(0, query_count, batch):
+        index.search(queries[offset:offset + batch], k, {"subject": "Physics"})
+    batched_ms = (time.perf_counter() - start) * 1000 / query_count
+    print(f"\n⚡ numpy batched ({batch} queries per matmul): {batched_ms:.2f}ms per query")
+
+    # Quantized storage against the float32 baseline; exact vectors for re-ranking
+    # come from the original matrix, as the server reads them from the embedding store
+    row_of_document = {document: row for row, document in enumerate(documents)}
+
+    def exact_vectors(texts):
+        return [vectors[row_of_document[text]] for text in texts]
+
+    baseline = time_queries(numpy_search({"subject": "Physics"}, set()), queries)
+    print(f"\n{'storage':<24}{'memory':>12}{'mean':>12}{'p95':>12}{'recall@' + str(k):>12}")
+    print(f"{'float32':<24}{index.nbytes / (1024 * 1024):>10.1f}MB{baseline['mean_ms']:>10.2f}ms"
+          f"{baseline['p95_ms']:>10.2f}ms{1.0:>12.3f}")
+    for storage in ("float16", "int8"):
+        for rerank in (False, True):
+            quantized = NumpyVectorIndex(dim, storage=storage, rerank_vectors=exact_vectors if rerank else None)
+            quantized.add(ids, vectors, documents, metadatas)
+
+            def run(query, quantized=quantized):
+                return [hit['question_id'] for hit in quantized.search([query], k, {"subject": "Physics"})[0]]
+
+            timed = time_queries(run, queries)
+            name = f"{storage} + re-rank" if rerank else storage
+            print(f"{name:<24}{quantized.nbytes / (1024 * 1024):>10.1f}MB{timed['mean_ms']:>10.2f}ms"
+                  f"{timed['p95_ms']:>10.2f}ms{overlap_at_k(baseline['hits'], timed['hits'], k):>12.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chroma and in-memory NumPy vector search")
+    parser.add_argument("--corpus", type=int, default=18000, help="number of synthetic questions")
+    parser.add_argument("--queries", type=int, default=200, help="number of queries per scenario")
+    parser.add_argument("--exclude", type=int, default=2000, help="size of the seen-question exclusion set")
+    args = parser.parse_args()
+
+    run_benchmark(args.corpus, args.queries, args.exclude)
+
+if __name__ == "__main__":
+    main()
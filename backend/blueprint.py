@@ -0,0 +1,158 @@
+"""
+Test Blueprints
+Compiles a models.TestConfig into a SelectionPlan: how many questions each
+subject gets and how many of those come from weak topics, past mistakes and
+general coverage. Endpoints gather ranked candidate IDs per (subject, source)
+from the indexes and solve_plan fills every quota in one pass, applying the
+config's difficulty / question type / chapter filters and exclusions.
+A preferred_difficulty only reorders candidates, so a sparse difficulty
+never leaves quotas empty.
+
+Shortfalls roll forward: unfilled weak-topic and mistake slots go to the
+subject's general coverage, and anything still missing is drawn from the
+exam-wide groups keyed (None, "general").
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable
+
+from models import TestConfig
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("weak_topic", "mistake", "general")
+
+@dataclass
+class CandidateGroup:
+    """Ranked question IDs from one retrieval, tagged with the reason they were picked"""
+    reason: str
+    question_ids: List[str]
+    limit: Optional[int] = None # Most questions this group may contribute
+
+@dataclass
+class SelectionPlan:
+    config: TestConfig
+    # subject -> source -> question count
+    quotas: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def subjects(self) -> List[str]:
+        return list(self.quotas)
+
+    def quota(self, subject: str, source: str) -> int:
+        return self.quotas.get(subject, {}).get(source, 0)
+
+    def subject_total(self, subject: str) -> int:
+        return sum(self.quotas.get(subject, {}).values())
+
+    @property
+    def has_filters(self) -> bool:
+        config = self.config
+        return bool(config.difficulty_levels or config.question_types or config.chapters)
+
+    def accepts(self, question: Dict[str, Any]) -> bool:
+        """Whether a question passes the config's difficulty, question type and chapter filters"""
+        config = self.config
+        if config.difficulty_levels and \
+                str(question.get('difficulty', '')).lower() not in {d.lower() for d in config.difficulty_levels}:
+            return False
+        if config.question_types and \
+                str(question.get('question_type', question.get('type', 'mcq'))).lower() not in {t.lower() for t in config.question_types}:
+            return False
+        if config.chapters and question.get('chapter') not in config.chapters:
+            return False
+        return True
+
+    def prefers(self, question: Optional[Dict[str, Any]]) -> bool:
+        """Whether a question has the config's preferred difficulty"""
+        preferred = self.config.preferred_difficulty
+        return bool(preferred and question) and str(question.get('difficulty', '')).lower() == preferred.lower()
+
+def apportion(total: int, weights: Dict[str, float]) -> Dict[str, int]:
+    """Split total across keys in proportion to weights (largest remainder, ties to earlier keys)"""
+    weight_sum = sum(max(weight, 0.0) for weight in weights.values())
+    if total <= 0 or weight_sum <= 0:
+        return {key: 0 for key in weights}
+
+    shares = {key: total * max(weight, 0.0) / weight_sum for key, weight in weights.items()}
+    counts = {key: int(share) for key, share in shares.items()}
+    by_remainder = sorted(weights, key=lambda key: shares[key] - counts[key], reverse=True)
+    for key in by_remainder[:total - sum(counts.values())]:
+        counts[key] += 1
+    return counts
+
+def compile_plan(config: TestConfig) -> SelectionPlan:
+    """Per-subject source quotas for a config; weak and mistake counts round down, general takes the rest.
+
+    config.general_percentage is not read: general coverage is always the
+    remainder after the weak-topic and mistake shares.
+    """
+    if not config.subjects:
+        raise ValueError("TestConfig needs at least one subject")
+    if config.weak_topic_percentage + config.mistake_percentage > 1.0 + 1e-9:
+        raise ValueError("weak_topic_percentage and mistake_percentage add up to more than 1")
+
+    weights = {subject: (config.subject_weights or {}).get(subject, 1.0) for subject in config.subjects}
+    plan = SelectionPlan(config=config)
+    for subject, count in apportion(config.total_questions, weights).items():
+        weak = int(count * config.weak_topic_percentage)
+        mistake = int(count * config.mistake_percentage)
+        plan.quotas[subject] = {"weak_topic": weak, "mistake": mistake, "general": count - weak - mistake}
+    return plan
+
+def solve_plan(plan: SelectionPlan,
+               candidates: Dict[Tuple[Optional[str], str], List[CandidateGroup]],
+               lookup: Callable[[str], Optional[Dict[str, Any]]],
+               exclude_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """Fill the plan from candidate groups in a single pass.
+
+    Subjects are filled in plan order, each weak topic -> mistake -> general,
+    so the result comes back in subject blocks followed by any exam-wide
+    fill. lookup maps an ID to its (hydrated, per-request) question; picked
+    questions get their group's reason as selection_reason. Within a group,
+    questions of the preferred difficulty are taken before the rest.
+    """
+    exclude_ids = exclude_ids or set()
+    picked: Set[str] = set()
+
+    def ranked(group: CandidateGroup) -> List[str]:
+        if not plan.config.preferred_difficulty:
+            return group.question_ids
+        return sorted(group.question_ids, key=lambda question_id: not plan.prefers(lookup(question_id)))
+
+    def take(groups: List[CandidateGroup], count: int) -> List[Dict[str, Any]]:
+        taken = []
+        for group in groups:
+            if len(taken) >= count:
+                break
+            group_taken = 0
+            for question_id in ranked(group):
+                if len(taken) >= count or (group.limit is not None and group_taken >= group.limit):
+                    break
+                if question_id in picked or question_id in exclude_ids:
+                    continue
+                question = lookup(question_id)
+                if not question or not plan.accepts(question):
+                    continue
+                question['selection_reason'] = group.reason
+                picked.add(question_id)
+                taken.append(question)
+                group_taken += 1
+        return taken
+
+    questions = []
+    for subject in plan.subjects:
+        subject_questions = []
+        for source in SOURCES:
+            quota = plan.subject_total(subject) - len(subject_questions) if source == "general" \
+                else plan.quota(subject, source)
+            subject_questions.extend(take(candidates.get((subject, source), []), quota))
+        if len(subject_questions) < plan.subject_total(subject):
+            logger.warning(f"Blueprint short by {plan.subject_total(subject) - len(subject_questions)} {subject} questions")
+        questions.extend(subject_questions)
+
+    shortfall = plan.config.total_questions - len(questions)
+    if shortfall > 0:
+        questions.extend(take(candidates.get((None, "general"), []), shortfall))
+    return questions
@@ -0,0 +1,101 @@
+"""
+Collection Statistics
+Exact per-collection question counts and subject / topic / chapter /
+difficulty value counts, kept in step with every add and delete so stats
+calls read counters instead of scanning metadata. Value counts (rather than
+sets) let deletes drop a subject or chapter once its last question is gone.
+
+Stored as one JSON file next to the precomputed tables and rebuilt from the
+collection when missing or when its total disagrees with collection.count().
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = ("subject", "topic", "chapter", "difficulty")
+
+class CollectionStats:
+    """Question totals and per-field value counts for each exam collection"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {"total": 0, **{field: {} for field in STAT_FIELDS}}
+
+    def total(self, exam_type: str) -> int:
+        with self._lock:
+            return self._stats.get(exam_type, {}).get("total", 0)
+
+    def add(self, exam_type: str, metadatas: Iterable[Dict[str, Any]]) -> None:
+        """Count newly stored questions"""
+        with self._lock:
+            stats = self._stats.setdefault(exam_type, self._empty())
+            for metadata in metadatas:
+                stats["total"] += 1
+                for field in STAT_FIELDS:
+                    value = metadata.get(field, "")
+                    stats[field][value] = stats[field].get(value, 0) + 1
+
+    def remove(self, exam_type: str, metadatas: Iterable[Dict[str, Any]]) -> None:
+        """Uncount deleted questions, dropping values whose count reaches zero"""
+        with self._lock:
+            stats = self._stats.setdefault(exam_type, self._empty())
+            for metadata in metadatas:
+                stats["total"] = max(0, stats["total"] - 1)
+                for field in STAT_FIELDS:
+                    value = metadata.get(field, "")
+                    remaining = stats[field].get(value, 0) - 1
+                    if remaining > 0:
+                        stats[field][value] = remaining
+                    else:
+                        stats[field].pop(value, None)
+
+    def reset(self, exam_type: str, metadatas: Iterable[Dict[str, Any]] = ()) -> None:
+        """Replace an exam's counts, e.g. after a reset or a rebuild from the collection"""
+        with self._lock:
+            self._stats[exam_type] = self._empty()
+        self.add(exam_type, metadatas)
+
+    def summary(self, exam_type: str) -> Dict[str, Any]:
+        """Total and distinct values per field, in the shape of get_collection_stats"""
+        with self._lock:
+            stats = self._stats.get(exam_type) or self._empty()
+            return {
+                "total_questions": stats["total"],
+                "subjects": sorted(stats["subject"]),
+                "topics": sorted(stats["topic"]),
+                "chapters": sorted(stats["chapter"]),
+                "difficulties": sorted(stats["difficulty"])
+            }
+
+    def save(self) -> None:
+        """Write atomically so readers never see a partial file"""
+        with self._lock:
+            payload = json.dumps(self._stats)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(payload)
+        os.replace(temp_path, self.path)
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as f:
+                stats = json.load(f)
+            with self._lock:
+                self._stats = stats
+            return True
+        except Exception as e:
+            logger.warning(f"Could not load collection stats {self.path}: {e}")
+            return False
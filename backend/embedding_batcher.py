@@ -0,0 +1,135 @@
+"""
+Micro-batching Embedding Queue
+Concurrent requests that each need a few embeddings (search queries from
+parallel test generations) are coalesced into one encode call: a worker thread
+takes the first waiting request, keeps collecting requests for up to
+max_wait_ms or until max_batch_size texts are queued, encodes them together
+and resolves every caller's future with its own rows.
+
+Queue depth and batch sizes are recorded as power-of-two histograms so
+coalescing under load can be checked from the memory-usage endpoint.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Any, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def _bucket(value: int) -> str:
+    """Power-of-two histogram bucket label: "1", "2", "3-4", "5-8", ..."""
+    if value <= 2:
+        return str(value)
+    upper = 1 << (value - 1).bit_length()
+    return f"{upper // 2 + 1}-{upper}"
+
+class EmbeddingBatcher:
+    """Shared encode queue that turns concurrent small requests into batched forward passes"""
+
+    def __init__(self, encode: Callable[[List[str]], Any], max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 timeout: float = 60.0):
+        """encode maps a list of texts to an (n, dim) array of embeddings; timeout bounds blocking encode calls"""
+        self.encode_fn = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def _reset_stats(self) -> None:
+        self._requests = 0
+        self._batches = 0
+        self._texts = 0
+        self._max_queue_depth = 0
+        self._batch_sizes: Dict[str, int] = {}
+        self._queue_depths: Dict[str, int] = {}
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for the next batch; the future resolves to their (n, dim) embeddings"""
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self._queue.put((list(texts), future))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+            self._queue_depths[_bucket(depth)] = self._queue_depths.get(_bucket(depth), 0) + 1
+        return future
+
+    def encode(self, texts: List[str], timeout: float = None) -> np.ndarray:
+        """Blocking submit: embeddings of texts, encoded together with concurrent callers.
+
+        Raises concurrent.futures.TimeoutError after timeout seconds (the
+        batcher's default when None) instead of waiting on a stuck worker.
+        """
+        return self.submit(texts).result(timeout=self.timeout if timeout is None else timeout)
+
+    def _collect(self) -> List[tuple]:
+        """Block for one request, then gather more until the wait or size budget runs out"""
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request[0])
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            pending = self._collect()
+            try:
+                self._encode_batch(pending)
+            except Exception as e:
+                # Any failure (encode, bad output shape, ...) resolves every waiting caller
+                logger.error(f"Batched encode of {len(pending)} requests failed: {e}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _encode_batch(self, pending: List[tuple]) -> None:
+        # Identical texts from different callers are encoded once
+        unique = list(dict.fromkeys(text for texts, _ in pending for text in texts))
+        vectors = np.asarray(self.encode_fn(unique), dtype=np.float32)
+
+        row_of = {text: row for row, text in enumerate(unique)}
+        for texts, future in pending:
+            if not future.done():
+                future.set_result(vectors[[row_of[text] for text in texts]])
+
+        with self._stats_lock:
+            self._batches += 1
+            self._texts += len(unique)
+            self._batch_sizes[_bucket(len(pending))] = self._batch_sizes.get(_bucket(len(pending)), 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests per batch and queue depth at submit, as power-of-two histograms"""
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "texts_encoded": self._texts,
+                "mean_requests_per_batch": round(self._requests / self._batches, 2) if self._batches else 0.0,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batch_size_histogram": dict(self._batch_sizes),
+                "queue_depth_histogram": dict(self._queue_depths),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000
+            }
@@ -0,0 +1,261 @@
+"""
+Embedding Caches
+EmbeddingLRUCache is the in-process, byte-bounded LRU used for both corpus
+and query embeddings. EmbeddingStore is the on-disk cache of corpus
+embeddings keyed by embedding model and content hash, so restarts, re-ingests
+and multiple worker processes reuse vectors instead of re-encoding the corpus.
+
+Layout per model directory:
+    vectors.f32  raw float32 rows, memory-mapped for reads
+    keys.txt     one content hash per line, line N describes row N
+    meta.json    model name and embedding dimension, so the store can be
+                 reopened before the model has loaded
+
+Writers append vectors first and keys second under an exclusive file lock,
+so keys.txt is the commit record: readers only trust rows that have a key.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError: # Windows - single process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingLRUCache:
+    """Thread-safe LRU of float32 vectors bounded by total bytes"""
+
+    # Rough per-entry overhead of the key string and OrderedDict node
+    ENTRY_OVERHEAD_BYTES = 200
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_bytes(self, vector: np.ndarray) -> int:
+        return vector.nbytes + self.ENTRY_OVERHEAD_BYTES
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        size = self._entry_bytes(vector)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= self._entry_bytes(previous)
+            self._entries[key] = vector
+            self.nbytes += size
+            self._evict(self.max_bytes)
+
+    def _evict(self, max_bytes: int) -> int:
+        evicted = 0
+        while self.nbytes > max_bytes and self._entries:
+            _, vector = self._entries.popitem(last=False)
+            self.nbytes -= self._entry_bytes(vector)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def shrink(self, max_bytes: int) -> int:
+        """Evict least-recently-used entries until the cache fits in max_bytes"""
+        with self._lock:
+            return self._evict(max_bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_mb": round(self.nbytes / (1024 * 1024), 2),
+            "max_size_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class EmbeddingStore:
+    """Append-only memory-mapped embedding matrix with a hash -> row index"""
+
+    def __init__(self, store_path: str, model_name: str, dim: int):
+        self.model_name = model_name
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.path = self._model_path(store_path, model_name)
+        os.makedirs(self.path, exist_ok=True)
+        self._write_meta()
+
+        self.vectors_path = os.path.join(self.path, "vectors.f32")
+        self.keys_path = os.path.join(self.path, "keys.txt")
+        self.lock_path = os.path.join(self.path, ".lock")
+
+        self._index: Dict[str, int] = {}
+        self._rows = 0
+        self._keys_offset = 0
+        self._matrix: Optional[np.memmap] = None
+        # Guards the index, row count, key offset and matrix within this process;
+        # the file lock only serializes writers across processes
+        self._lock = threading.RLock()
+
+        with self._locked():
+            self._repair()
+        self._refresh()
+        logger.info(f"Embedding store for {model_name} opened with {len(self._index)} vectors")
+
+    @staticmethod
+    def _model_path(store_path: str, model_name: str) -> str:
+        return os.path.join(store_path, re.sub(r'[^A-Za-z0-9_.-]', '_', model_name))
+
+    @classmethod
+    def stored_dim(cls, store_path: str, model_name: str) -> Optional[int]:
+        """Dimension recorded by an earlier open of the store, None when there is none"""
+        return cls._read_dim(os.path.join(cls._model_path(store_path, model_name), "meta.json"))
+
+    @staticmethod
+    def _read_dim(meta_path: str) -> Optional[int]:
+        try:
+            with open(meta_path) as f:
+                return int(json.load(f)['dim'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_meta(self) -> None:
+        meta_path = os.path.join(self.path, "meta.json")
+        stored = self._read_dim(meta_path)
+        if stored is not None and stored != self.dim:
+            raise ValueError(f"Embedding store at {self.path} holds {stored}-dim vectors, not {self.dim}")
+        if stored is None:
+            temp_path = f"{meta_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'model_name': self.model_name, 'dim': self.dim}, f)
+            os.replace(temp_path, meta_path)
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _repair(self) -> None:
+        """Drop a partial trailing key line or vector rows without a key (crashed writer)"""
+        if not os.path.exists(self.keys_path):
+            open(self.keys_path, 'w').close()
+        with open(self.keys_path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+                data = data[:data.rfind(b'\n') + 1]
+        rows = data.count(b'\n')
+
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, 'wb').close()
+        if os.path.getsize(self.vectors_path) > rows * self.row_bytes:
+            with open(self.vectors_path, 'rb+') as f:
+                f.truncate(rows * self.row_bytes)
+
+    def _refresh(self) -> None:
+        """Pick up rows appended by this or another process since the last read"""
+        with self._lock:
+            if os.path.getsize(self.keys_path) != self._keys_offset:
+                with open(self.keys_path, 'rb') as f:
+                    f.seek(self._keys_offset)
+                    tail = f.read()
+                complete = tail[:tail.rfind(b'\n') + 1]
+                for key in complete.decode().splitlines():
+                    self._index.setdefault(key, self._rows)
+                    self._rows += 1
+                self._keys_offset += len(complete)
+
+            if self._rows and (self._matrix is None or self._matrix.shape[0] < self._rows):
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(self._rows, self.dim))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, content_hash: str) -> bool:
+        return content_hash in self._index
+
+    def get_many(self, content_hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Vectors for the hashes present in the store"""
+        with self._lock:
+            if any(h not in self._index for h in content_hashes):
+                self._refresh()
+
+            hits = [h for h in dict.fromkeys(content_hashes) if h in self._index]
+            if not hits:
+                return {}
+            block = np.asarray(self._matrix[[self._index[h] for h in hits]])
+        return dict(zip(hits, block))
+
+    def put_many(self, content_hashes: List[str], vectors: np.ndarray) -> int:
+        """Append vectors for hashes not stored yet, returning how many were written"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+
+        with self._lock, self._locked():
+            self._refresh()
+            pending = {}
+            for content_hash, vector in zip(content_hashes, vectors):
+                if content_hash not in self._index and content_hash not in pending:
+                    pending[content_hash] = vector
+            if not pending:
+                return 0
+
+            with open(self.vectors_path, 'rb+') as f:
+                f.seek(self._rows * self.row_bytes)
+                f.write(np.stack(list(pending.values())).astype(np.float32).tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, 'rb+') as f:
+                # Overwrite any partial line left behind by a crashed writer
+                f.seek(self._keys_offset)
+                f.truncate()
+                f.write(''.join(f"{key}\n" for key in pending).encode())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._refresh()
+        return len(pending)
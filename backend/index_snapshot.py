@@ -0,0 +1,86 @@
+"""
+Vector Index Snapshots
+One-file export of every collection's IDs, documents, metadata and
+embeddings, so a fresh replica can bulk-load a prebuilt index instead of
+re-encoding the corpus.
+
+The file is an .npz holding a JSON header (format version, embedding model,
+dimension, per-exam counts and a SHA-256 per array) plus, per exam, a float32
+embedding matrix and a JSON record block with the IDs, documents and
+metadatas. Readers refuse unknown versions, other models and bad checksums.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+def _checksum(array: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+def _json_bytes(value: Any) -> np.ndarray:
+    return np.frombuffer(json.dumps(value).encode(), dtype=np.uint8)
+
+def write_snapshot(path: str, model_name: str, dim: int, exams: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Write exams[exam] = {ids, documents, metadatas, embeddings} atomically; returns the header"""
+    arrays: Dict[str, np.ndarray] = {}
+    counts = {}
+    for exam_type, data in exams.items():
+        embeddings = np.asarray(data['embeddings'], dtype=np.float32).reshape(-1, dim)
+        arrays[f"embeddings_{exam_type}"] = embeddings
+        arrays[f"records_{exam_type}"] = _json_bytes({
+            'ids': list(data['ids']),
+            'documents': list(data['documents']),
+            'metadatas': list(data['metadatas'])
+        })
+        counts[exam_type] = len(embeddings)
+
+    header = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'model_name': model_name,
+        'dim': dim,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'counts': counts,
+        'checksums': {name: _checksum(array) for name, array in arrays.items()}
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp.npz"
+    np.savez_compressed(temp_path, header=_json_bytes(header), **arrays)
+    os.replace(temp_path, path)
+    logger.info(f"Wrote snapshot {path} with {sum(counts.values())} questions")
+    return header
+
+def read_snapshot(path: str, model_name: str = None) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Load and verify a snapshot, returning (header, exams).
+
+    Raises ValueError for an unknown format version, a different embedding
+    model than model_name, or any array whose checksum does not match.
+    """
+    with np.load(path) as data:
+        header = json.loads(data['header'].tobytes().decode())
+        if header.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {header.get('format_version')}")
+        if model_name and header.get('model_name') != model_name:
+            raise ValueError(f"Snapshot was built with {header.get('model_name')}, not {model_name}")
+
+        exams = {}
+        for exam_type in header['counts']:
+            embeddings = data[f"embeddings_{exam_type}"]
+            records = data[f"records_{exam_type}"]
+            for name, array in ((f"embeddings_{exam_type}", embeddings), (f"records_{exam_type}", records)):
+                if _checksum(array) != header['checksums'].get(name):
+                    raise ValueError(f"Checksum mismatch for {name} in {path}")
+
+            exams[exam_type] = dict(json.loads(records.tobytes().decode()), embeddings=embeddings)
+            if len(exams[exam_type]['ids']) != len(embeddings):
+                raise ValueError(f"Snapshot {path} has mismatched rows for {exam_type}")
+    return header, exams
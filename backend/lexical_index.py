@@ -0,0 +1,161 @@
+"""
+Lexical Question Index
+Compact in-memory BM25 inverted index over each question's topic_keywords,
+chapter and topic. Exact keyword lookups ("mole-concept") are answered from
+the postings without touching the embedding model, and VectorDBManager fuses
+these scores with semantic distances in hybrid_search.
+"""
+
+import re
+import math
+import logging
+from typing import List, Dict, Any, Optional, Iterable, Set, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Metadata kept per document for filtering and for building results
+DOC_FIELDS = ("exam_type", "subject", "chapter", "topic", "difficulty")
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphanumeric tokens, plus the whole phrase when it has several"""
+    text = (text or "").lower().strip()
+    tokens = TOKEN_PATTERN.findall(text)
+    if len(tokens) > 1:
+        tokens.append("-".join(tokens))
+    return tokens
+
+class BM25Index:
+    """BM25 over keyword, chapter and topic tokens with per-document metadata"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ids: List[str] = []
+        self._contents: List[str] = []
+        # Integer-coded metadata columns so filters become vectorized masks
+        self._values: Dict[str, List[str]] = {field: [] for field in DOC_FIELDS}
+        self._codes: Dict[str, np.ndarray] = {field: np.zeros(0, dtype=np.int32) for field in DOC_FIELDS}
+        self._row_of: Dict[str, int] = {}
+        self._postings: Dict[str, tuple] = {}
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._avg_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._postings
+
+    @staticmethod
+    def document_tokens(question: Dict[str, Any]) -> List[str]:
+        tokens = []
+        for keyword in question.get('topic_keywords') or []:
+            tokens.extend(tokenize(keyword))
+        tokens.extend(tokenize(question.get('chapter', '')))
+        tokens.extend(tokenize(question.get('topic', '')))
+        return tokens
+
+    def rebuild(self, questions: Iterable[Dict[str, Any]],
+                exam_of: Optional[Callable[[Dict[str, Any]], str]] = None) -> None:
+        """Index the corpus from scratch; exam_of maps a question to its collection's exam type"""
+        self._reset()
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = []
+        vocab: Dict[str, Dict[str, int]] = {field: {} for field in DOC_FIELDS}
+        codes: Dict[str, List[int]] = {field: [] for field in DOC_FIELDS}
+
+        for question in questions:
+            question_id = question.get('question_id')
+            if not question_id or question_id in self._row_of:
+                continue
+            row = len(self._ids)
+            self._row_of[question_id] = row
+            self._ids.append(question_id)
+            self._contents.append(question.get('content', ''))
+            for field in DOC_FIELDS:
+                value = exam_of(question) if field == "exam_type" and exam_of else question.get(field, '')
+                codes[field].append(vocab[field].setdefault(value, len(vocab[field])))
+
+            tokens = self.document_tokens(question)
+            lengths.append(len(tokens))
+            for token in tokens:
+                doc_counts = postings.setdefault(token, {})
+                doc_counts[row] = doc_counts.get(row, 0) + 1
+
+        for field in DOC_FIELDS:
+            self._values[field] = list(vocab[field])
+            self._codes[field] = np.asarray(codes[field], dtype=np.int32)
+        self._doc_lengths = np.asarray(lengths, dtype=np.float32)
+        self._avg_length = float(self._doc_lengths.mean()) if lengths else 0.0
+        self._postings = {
+            token: (np.fromiter(doc_counts.keys(), dtype=np.int32, count=len(doc_counts)),
+                    np.fromiter(doc_counts.values(), dtype=np.float32, count=len(doc_counts)))
+            for token, doc_counts in postings.items()
+        }
+        logger.info(f"Lexical index built with {len(self._ids)} questions and {len(self._postings)} terms")
+
+    def _filter_mask(self, rows: np.ndarray, filters: Dict[str, Any]) -> np.ndarray:
+        """Which of rows match every filter; a filter value may be one value or a list"""
+        mask = np.ones(len(rows), dtype=bool)
+        for field, value in filters.items():
+            wanted = value if isinstance(value, (list, tuple, set)) else [value]
+            values = self._values[field]
+            wanted_codes = [code for code, known in enumerate(values) if known in wanted]
+            mask &= np.isin(self._codes[field][rows], wanted_codes)
+        return mask
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query (zero when no token matches)"""
+        total = np.zeros(len(self._ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            rows, term_counts = posting
+            idf = math.log(1 + (len(self._ids) - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[rows] / self._avg_length)
+            total[rows] += idf * term_counts * (self.k1 + 1) / (term_counts + norm)
+        return total
+
+    def search(self, query: str, n_results: int, filters: Optional[Dict[str, Any]] = None,
+               exclude_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Top n_results by BM25 among documents matching filters, skipping excluded IDs"""
+        if not self._ids or n_results <= 0:
+            return []
+        filters = {field: value for field, value in (filters or {}).items() if value}
+        exclude_ids = exclude_ids or set()
+
+        total = self.scores(query)
+        rows = np.flatnonzero(total)
+        if filters:
+            rows = rows[self._filter_mask(rows, filters)]
+        rows = rows[np.argsort(-total[rows], kind='stable')]
+
+        results = []
+        for row in rows.tolist():
+            if self._ids[row] in exclude_ids:
+                continue
+            results.append(self.result(row, float(total[row])))
+            if len(results) >= n_results:
+                break
+        return results
+
+    def result(self, row: int, score: float) -> Dict[str, Any]:
+        return {
+            'question_id': self._ids[row],
+            'content': self._contents[row],
+            'metadata': {field: self._values[field][self._codes[field][row]] for field in DOC_FIELDS},
+            'lexical_score': score
+        }
+
+    def is_exact_term(self, query: str) -> bool:
+        """True when the whole query is one indexed keyword, chapter or topic"""
+        tokens = tokenize(query)
+        return bool(tokens) and tokens[-1] in self._postings
@@ -12,6 +12,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Database the server reads; snapshots are exported from and imported into it
+SERVER_DB_PATH = "./intelligent_chroma_db"
+
 def print_header(title):
     print("\n" + "="*50)
     print(f" {title}")
@@ -142,6 +145,45 @@ def reset_collection(exam_type):
     except Exception as e:
         print(f" Error resetting collection: {e}")
 
+def export_snapshot(path):
+    """Export all collections to a snapshot file"""
+    print_header("Export Vector Snapshot")
+
+    try:
+        vector_db = VectorDBManager(SERVER_DB_PATH, lazy_model=True)
+
+        print(f" Exporting to {path}...")
+        header = vector_db.export_snapshot(path)
+
+        print(f" Snapshot written: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+        print(f" Model: {header['model_name']} ({header['dim']} dims), format v{header['format_version']}")
+        for exam_type, count in header['counts'].items():
+            print(f" {exam_type:<12}: {count:>6} questions")
+
+    except Exception as e:
+        print(f" Error exporting snapshot: {e}")
+
+def import_snapshot(path):
+    """Replace the collections with the contents of a snapshot file"""
+    print_header("Import Vector Snapshot")
+
+    try:
+        if not os.path.exists(path):
+            print(f" Snapshot not found: {path}")
+            return
+
+        vector_db = VectorDBManager(SERVER_DB_PATH, lazy_model=True)
+
+        print(f" Importing {path}...")
+        report = vector_db.import_snapshot(path)
+
+        print(f" Import completed in {report['seconds']}s (snapshot created {report['created_at']})")
+        for exam_type, count in report['counts'].items():
+            print(f" {exam_type:<12}: {count:>6} questions")
+
+    except Exception as e:
+        print(f" Error importing snapshot: {e}")
+
 def reingest_data():
     """Re-ingest all PYQ data"""
     print_header("Re-ingest PYQ Data")
@@ -186,6 +228,8 @@ def show_help():
     print(" optimize - Optimize database performance")
     print(" reset - Reset a specific collection")
     print(" reingest - Re-ingest all PYQ data")
+    print(" export - Export embeddings, IDs and metadata to a snapshot file")
+    print(" import - Bulk-load a snapshot file, replacing its collections")
     print(" help - Show this help message")
 
     print("\nUsage examples:")
@@ -193,6 +237,8 @@ def show_help():
     print(" python manage_chromadb.py stats")
     print(" python manage_chromadb.py reset JEE_MAIN")
     print(" python manage_chromadb.py optimize")
+    print(" python manage_chromadb.py export vectors.snapshot.npz")
+    print(" python manage_chromadb.py import vectors.snapshot.npz")
 
 def main():
     """Main function"""
@@ -219,6 +265,14 @@ def main():
         reset_collection(exam_type)
     elif command == "reingest":
         reingest_data()
+    elif command in ("export", "import"):
+        if len(sys.argv) < 3:
+            print(f" Please specify the snapshot file: python manage_chromadb.py {command} <path>")
+            return
+        if command == "export":
+            export_snapshot(sys.argv[2])
+        else:
+            import_snapshot(sys.argv[2])
     elif command == "help":
         show_help()
     else:
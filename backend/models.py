@@ -124,6 +124,11 @@ class TestConfig:
     subjects: List[str]
     total_questions: int
     weak_topic_percentage: float = 0.7
-    general_percentage: float = 0.3
+    general_percentage: float = 0.3  # Not read by the blueprint: general coverage takes the remainder
     exclude_attempted: bool = True
     difficulty_levels: Optional[List[str]] = None
+    mistake_percentage: float = 0.0
+    question_types: Optional[List[str]] = None
+    chapters: Optional[List[str]] = None
+    subject_weights: Optional[Dict[str, float]] = None
+    preferred_difficulty: Optional[str] = None  # Soft: ranks matching questions first, never filters
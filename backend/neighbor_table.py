@@ -0,0 +1,103 @@
+"""
+Precomputed Nearest-Neighbour Table
+Top-K most similar questions for every question of one exam, computed offline
+within each subject so that "similar to my mistakes" selection becomes a table
+lookup plus exclusion filter instead of an encode and a kNN query.
+
+Stored as one .npz per exam: the question IDs and an int32 (N, K) matrix of
+neighbour ordinals into those IDs, padded with -1.
+"""
+
+import os
+import logging
+from typing import List, Dict, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class NeighborTable:
+    """Question ID -> nearest question IDs (same exam and subject), nearest first"""
+
+    def __init__(self, ids: List[str], neighbors: np.ndarray):
+        self.ids = list(ids)
+        self.neighbors = neighbors
+        self._row_of: Dict[str, int] = {question_id: row for row, question_id in enumerate(self.ids)}
+
+    @property
+    def k(self) -> int:
+        return self.neighbors.shape[1] if self.neighbors.ndim == 2 else 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._row_of
+
+    @classmethod
+    def build(cls, ids: List[str], vectors, groups: List[str], k: int = 50,
+              block_rows: int = 1024) -> "NeighborTable":
+        """Exact squared-L2 top-k within each group (subject), excluding the question itself"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        neighbors = np.full((len(ids), k), -1, dtype=np.int32)
+
+        members: Dict[str, List[int]] = {}
+        for row, group in enumerate(groups):
+            members.setdefault(group, []).append(row)
+
+        for rows in members.values():
+            rows = np.asarray(rows, dtype=np.int64)
+            group_vectors = vectors[rows]
+            sq_norms = np.einsum('ij,ij->i', group_vectors, group_vectors)
+            group_k = min(k, len(rows) - 1)
+            if group_k <= 0:
+                continue
+
+            for start in range(0, len(rows), block_rows):
+                block = group_vectors[start:start + block_rows]
+                distances = sq_norms[start:start + block_rows, None] - 2.0 * (block @ group_vectors.T) + sq_norms[None, :]
+                distances[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+
+                nearest = np.argpartition(distances, group_k - 1, axis=1)[:, :group_k]
+                order = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind='stable')
+                nearest = np.take_along_axis(nearest, order, axis=1)
+                neighbors[rows[start:start + len(block)], :group_k] = rows[nearest]
+
+        return cls(ids, neighbors)
+
+    def similar(self, question_id: str, count: int, exclude_ids: Optional[Set[str]] = None) -> List[str]:
+        """Up to count nearest neighbours of a question that are not excluded"""
+        row = self._row_of.get(question_id)
+        if row is None or count <= 0:
+            return []
+
+        exclude_ids = exclude_ids or set()
+        similar = []
+        for ordinal in self.neighbors[row]:
+            if ordinal < 0:
+                break
+            neighbor_id = self.ids[ordinal]
+            if neighbor_id in exclude_ids:
+                continue
+            similar.append(neighbor_id)
+            if len(similar) >= count:
+                break
+        return similar
+
+    def save(self, path: str) -> None:
+        """Write atomically so readers never see a partial table"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp.npz"
+        np.savez(temp_path, ids=np.asarray(self.ids, dtype=str), neighbors=self.neighbors)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["NeighborTable"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(data['ids'].tolist(), data['neighbors'])
+        except Exception as e:
+            logger.warning(f"Could not load neighbour table {path}: {e}")
+            return None
@@ -0,0 +1,305 @@
+"""
+In-memory NumPy Vector Index
+Exact top-k search over one exam's embeddings using a single matrix multiply
+and argpartition, with integer-coded metadata columns so subject / chapter /
+topic / difficulty filters become boolean masks. Used by VectorDBManager when
+search_backend="numpy"; Chroma remains the persistent store.
+
+Rows can be stored as float32, float16 or int8 with a per-vector scale. With
+a quantized storage the scan ranks on the quantized matrix and the best
+candidates are re-ranked with exact float32 vectors from rerank_vectors
+(the on-disk embedding store in the server).
+
+mmr_select re-ranks a block of candidate embeddings by maximal marginal
+relevance, so a search can return k results that are close to the query but
+not to each other.
+"""
+
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Set, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields that can be filtered on, mirroring VectorDBManager._build_where
+FILTER_FIELDS = ("subject", "chapter", "topic", "difficulty")
+
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+def mmr_select(query_embedding, candidate_embeddings, k: int, diversity: float = 0.5) -> List[int]:
+    """Positions of k candidates picked greedily by maximal marginal relevance.
+
+    Each pick maximises (1 - diversity) * cos(query, c) - diversity * max cos(c, picked),
+    so diversity 0 keeps the plain similarity order and 1 spreads picks as far
+    apart as possible. Similarities come from one (m, m) matrix product and each
+    greedy step is a vectorized update of the running max.
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = (1.0 - diversity) * (candidates @ query)
+    similarity = candidates @ candidates.T
+    max_similarity = np.full(len(candidates), -np.inf, dtype=np.float32)
+    picked = np.zeros(len(candidates), dtype=bool)
+
+    selected = []
+    for step in range(k):
+        scores = relevance if step == 0 else relevance - diversity * max_similarity
+        scores = np.where(picked, -np.inf, scores)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        picked[best] = True
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+class NumpyVectorIndex:
+    """Squared-L2 kNN over optionally quantized rows with metadata masks"""
+
+    # Rows scanned per block when dequantizing, bounding temporary memory
+    SCAN_BLOCK_ROWS = 4096
+
+    def __init__(self, dim: int, initial_capacity: int = 1024, storage: str = "float32",
+                 rerank_factor: int = 4,
+                 rerank_vectors: Optional[Callable[[List[str]], List[Optional[np.ndarray]]]] = None):
+        """rerank_vectors maps documents to their exact float32 embeddings (None when unknown)"""
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown index storage: {storage}")
+        self.dim = dim
+        self.storage = storage
+        self.rerank_factor = rerank_factor
+        self.rerank_vectors = rerank_vectors
+        self._lock = threading.RLock()
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self._vectors = np.zeros((capacity, self.dim), dtype=STORAGE_DTYPES[self.storage])
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self._sq_norms = np.zeros(capacity, dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._codes = {field: np.full(capacity, -1, dtype=np.int32) for field in FILTER_FIELDS}
+        self._vocab: Dict[str, Dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._row_of: Dict[str, int] = {}
+        self._size = 0
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        def resized(array, fill):
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        self._vectors = resized(self._vectors, 0)
+        self._scales = resized(self._scales, 1)
+        self._sq_norms = resized(self._sq_norms, 0)
+        self._alive = resized(self._alive, False)
+        self._codes = {field: resized(codes, -1) for field, codes in self._codes.items()}
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._row_of
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the vector matrix and its per-row columns"""
+        return (self._vectors.nbytes + self._scales.nbytes + self._sq_norms.nbytes + self._alive.nbytes
+                + sum(codes.nbytes for codes in self._codes.values()))
+
+    def add(self, ids: List[str], embeddings, documents: List[str],
+            metadatas: List[Dict[str, Any]]) -> None:
+        """Insert rows, overwriting any row that already has the same ID"""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+
+        with self._lock:
+            self._grow(self._size + len(ids))
+            for question_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                row = self._row_of.get(question_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(question_id)
+                    self._documents.append(document)
+                    self._metadatas.append(metadata)
+                    self._row_of[question_id] = row
+                else:
+                    self._documents[row] = document
+                    self._metadatas[row] = metadata
+
+                self._store_vector(row, vector)
+                self._alive[row] = True
+                for field in FILTER_FIELDS:
+                    vocab = self._vocab[field]
+                    value = metadata.get(field, "")
+                    self._codes[field][row] = vocab.setdefault(value, len(vocab))
+
+    def _store_vector(self, row: int, vector: np.ndarray) -> None:
+        if self.storage == "int8":
+            peak = float(np.abs(vector).max())
+            scale = peak / 127 if peak > 0 else 1.0
+            self._vectors[row] = np.clip(np.rint(vector / scale), -127, 127)
+            self._scales[row] = scale
+        else:
+            self._vectors[row] = vector
+        self._sq_norms[row] = float(vector @ vector)
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        vectors = self._vectors[rows].astype(np.float32)
+        if self.storage == "int8":
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Drop rows by ID, compacting once dead rows outnumber live ones"""
+        removed = 0
+        with self._lock:
+            for question_id in ids:
+                row = self._row_of.pop(question_id, None)
+                if row is None:
+                    continue
+                self._alive[row] = False
+                self._ids[row] = self._documents[row] = self._metadatas[row] = None
+                removed += 1
+
+            dead = self._size - len(self._row_of)
+            if dead > max(1024, len(self._row_of)):
+                self._compact()
+        return removed
+
+    def _compact(self) -> None:
+        rows = np.flatnonzero(self._alive[:self._size])
+        ids = [self._ids[row] for row in rows]
+        documents = [self._documents[row] for row in rows]
+        metadatas = [self._metadatas[row] for row in rows]
+        vectors = self._dequantize(rows)
+
+        self._allocate(max(1024, len(rows)))
+        self.add(ids, vectors, documents, metadatas)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._allocate(1024)
+
+    def _mask(self, filters: Optional[Dict[str, str]]) -> np.ndarray:
+        """Live rows matching every filter value (unknown values match nothing)"""
+        mask = self._alive[:self._size].copy()
+        for field, value in (filters or {}).items():
+            code = self._vocab[field].get(value)
+            if code is None:
+                return np.zeros(self._size, dtype=bool)
+            mask &= self._codes[field][:self._size] == code
+        return mask
+
+    def _excluded_rows(self, exclude_ids: Optional[Set[str]]) -> np.ndarray:
+        row_of = self._row_of
+        return np.fromiter((row_of[qid] for qid in (exclude_ids or ()) if qid in row_of), dtype=np.int64)
+
+    def _result(self, row: int, distance: float, embedding: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        result = {
+            'question_id': self._ids[row],
+            'content': self._documents[row],
+            'metadata': self._metadatas[row],
+            'distance': distance
+        }
+        if embedding is not None:
+            result['embedding'] = embedding
+        return result
+
+    @staticmethod
+    def _top_k(distances: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k smallest finite distances, sorted ascending"""
+        k = min(k, int(np.isfinite(distances).sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if k < len(distances):
+            candidates = np.argpartition(distances, k - 1)[:k]
+        else:
+            candidates = np.arange(len(distances))
+        return candidates[np.argsort(distances[candidates], kind='stable')]
+
+    def search(self, query_embeddings, n_results: int, filters: Optional[Dict[str, str]] = None,
+               exclude_ids: Optional[List[Set[str]]] = None,
+               with_embeddings: bool = False) -> List[List[Dict[str, Any]]]:
+        """Top n_results per query among rows matching filters.
+
+        exclude_ids holds one set of IDs to skip per query embedding. Exact for
+        float32 storage; quantized storage re-ranks a shortlist of
+        rerank_factor * n_results candidates with exact vectors. With
+        with_embeddings each hit also carries its (dequantized) 'embedding'.
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dim)
+        exclude_ids = exclude_ids or [None] * len(queries)
+
+        with self._lock:
+            candidates = np.flatnonzero(self._mask(filters))
+            if not len(candidates) or n_results <= 0:
+                return [[] for _ in queries]
+
+            # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2, matching Chroma's l2 space
+            query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+            dots = np.empty((len(queries), len(candidates)), dtype=np.float32)
+            for start in range(0, len(candidates), self.SCAN_BLOCK_ROWS):
+                block = candidates[start:start + self.SCAN_BLOCK_ROWS]
+                dots[:, start:start + len(block)] = queries @ self._dequantize(block).T
+            distances = self._sq_norms[candidates][None, :] - 2.0 * dots + query_sq_norms[:, None]
+
+            shortlist_size = n_results if self.storage == "float32" else n_results * self.rerank_factor
+            results = []
+            full = np.empty(self._size, dtype=np.float32)
+            for i, excluded in enumerate(exclude_ids):
+                full.fill(np.inf)
+                full[candidates] = distances[i]
+                if excluded:
+                    full[self._excluded_rows(excluded)] = np.inf
+                rows = self._top_k(full, shortlist_size)
+                row_distances = full[rows]
+                if self.storage != "float32" and len(rows):
+                    row_distances = self._exact_distances(rows, queries[i], query_sq_norms[i], row_distances)
+                    order = np.argsort(row_distances, kind='stable')[:n_results]
+                    rows, row_distances = rows[order], row_distances[order]
+                row_embeddings = self._dequantize(rows) if with_embeddings else [None] * len(rows)
+                results.append([self._result(row, float(d), embedding)
+                                for row, d, embedding in zip(rows, row_distances, row_embeddings)])
+            return results
+
+    def _exact_distances(self, rows: np.ndarray, query: np.ndarray, query_sq_norm: float,
+                         approximate: np.ndarray) -> np.ndarray:
+        """Exact distances for a shortlist, keeping the approximation where no exact vector is known"""
+        if self.rerank_vectors is None:
+            return approximate
+        try:
+            exact = self.rerank_vectors([self._documents[row] for row in rows])
+        except Exception as e:
+            logger.warning(f"Re-rank vectors unavailable, using quantized distances: {e}")
+            return approximate
+
+        distances = approximate.copy()
+        for position, vector in enumerate(exact):
+            if vector is not None:
+                diff = np.asarray(vector, dtype=np.float32) - query
+                distances[position] = float(diff @ diff)
+        return distances
+
+    def get(self, n_results: int, filters: Optional[Dict[str, str]] = None,
+            exclude_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """First n_results rows matching filters in insertion order, skipping excluded IDs"""
+        with self._lock:
+            mask = self._mask(filters)
+            if exclude_ids:
+                mask[self._excluded_rows(exclude_ids)] = False
+            return [self._result(row, 0) for row in np.flatnonzero(mask)[:n_results]]
@@ -0,0 +1,117 @@
+"""
+Pre-generated Tests
+After a user submits a test, their next personalized test is built on a
+background worker and parked here, so "Start new test" becomes a lookup
+instead of vector searches, profile reads and history scans on the request
+path.
+
+Each entry records the request it answers and the profile version it was
+built from. Profile writes bump the version, so a test built before the
+latest write is never served. Entries also expire after ttl_seconds and are
+served at most once.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class PregeneratedTests:
+    """Per-user cache of the next test, filled by a small background worker pool"""
+
+    def __init__(self, ttl_seconds: float = 1800.0, max_entries: int = 1000, max_workers: int = 2):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Set[str] = set()
+        # Latest request per user that arrived while a build was running
+        self._queued: Dict[str, tuple] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pregenerate")
+        self._stats = {"scheduled": 0, "built": 0, "failed": 0, "hits": 0, "misses": 0, "stale": 0, "expired": 0}
+
+    def schedule(self, user_id: str, request_key: Any, profile_version: int,
+                 build: Callable[[], Dict[str, Any]]) -> bool:
+        """Build the user's next test in the background.
+
+        While a build for the user is running the request is queued behind it,
+        replacing any earlier queued one; returns False in that case.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._stats["scheduled"] += 1
+            if user_id in self._pending:
+                self._queued[user_id] = (request_key, profile_version, build)
+                return False
+            self._pending.add(user_id)
+        self._executor.submit(self._build, user_id, request_key, profile_version, build)
+        return True
+
+    def _finish(self, user_id: str) -> None:
+        """Start the queued request for the user, if any, else clear the pending flag (lock held)"""
+        queued = self._queued.pop(user_id, None)
+        if queued is None:
+            self._pending.discard(user_id)
+        else:
+            self._executor.submit(self._build, user_id, *queued)
+
+    def _build(self, user_id: str, request_key: Any, profile_version: int,
+               build: Callable[[], Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            test = build()
+        except Exception as e:
+            logger.warning(f"Pre-generating next test for {user_id} failed: {e}")
+            with self._lock:
+                self._stats["failed"] += 1
+                self._finish(user_id)
+            return
+
+        with self._lock:
+            self._stats["built"] += 1
+            self._finish(user_id)
+            if user_id in self._pending:
+                # A newer request superseded this build
+                return
+            now = time.monotonic()
+            for expired_user in [uid for uid, entry in self._entries.items() if entry["expires_at"] < now]:
+                del self._entries[expired_user]
+            # Drop the oldest entries once full; dicts keep insertion order
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[user_id] = {
+                "request_key": request_key,
+                "profile_version": profile_version,
+                "test": test,
+                "expires_at": now + self.ttl_seconds
+            }
+        logger.info(f"Pre-generated next test for {user_id} in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def take(self, user_id: str, request_key: Any, profile_version: int) -> Optional[Dict[str, Any]]:
+        """Pop the user's pre-generated test if it answers request_key, is current and has not expired"""
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry["expires_at"] < time.monotonic():
+                self._stats["expired"] += 1
+                return None
+            if entry["profile_version"] != profile_version or entry["request_key"] != request_key:
+                self._stats["stale"] += 1
+                return None
+            self._stats["hits"] += 1
+            return entry["test"]
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget a user's pre-generated test, e.g. after their profile changed"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, cached=len(self._entries), pending=len(self._pending),
+                        ttl_seconds=self.ttl_seconds)
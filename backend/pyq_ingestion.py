@@ -0,0 +1,342 @@
+"""
+PYQ Ingestion Pipeline
+Reads and normalizes the exam-specific PYQ JSON files. Parsing and
+normalization run in a process pool and results are merged in a fixed
+file order so every run produces the same corpus.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Exam-specific folders under pyqs/ and the exam type they hold
+EXAM_FOLDERS = {
+    'jee_main': 'JEE_MAIN',
+    'jee_advanced': 'JEE_ADVANCED',
+    'neet': 'NEET',
+    'bitsat': 'BITSAT',
+    'other_engineering': 'OTHER_ENGINEERING'
+}
+
+def get_ingest_workers() -> int:
+    """Worker processes for ingestion, configurable via PYQ_INGEST_WORKERS"""
+    configured = os.getenv('PYQ_INGEST_WORKERS')
+    if configured:
+        try:
+            return max(1, int(configured))
+        except ValueError:
+            logger.warning(f"Ignoring invalid PYQ_INGEST_WORKERS={configured!r}")
+    return os.cpu_count() or 1
+
+def discover_pyq_files(pyqs_folder: str) -> List[Tuple[str, str]]:
+    """List (file_path, exam_type) pairs in a deterministic order"""
+    files = []
+    for folder_name, exam_type in EXAM_FOLDERS.items():
+        folder_path = os.path.join(pyqs_folder, folder_name)
+        if not os.path.exists(folder_path):
+            logger.warning(f"Exam folder {folder_name} not found, skipping...")
+            continue
+
+        for filename in sorted(os.listdir(folder_path)):
+            if filename.endswith('.json'):
+                files.append((os.path.join(folder_path, filename), exam_type))
+    return files
+
+def hash_pyq_file(file_path: str) -> str:
+    """Content hash of a PYQ file, used by the ingest manifest"""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def diff_pyq_manifest(pyqs_folder: str, files: List[Tuple[str, str]],
+                      manifest: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Compare the files on disk with a manifest of relative path -> content hash.
+
+    Returns the current files (relative path -> file_path, exam_type,
+    content_hash) in discovery order, plus the relative paths that were
+    added, changed, removed or left unchanged since the manifest was written.
+    """
+    current = {}
+    diff = {'files': current, 'added': [], 'changed': [], 'unchanged': [], 'removed': []}
+
+    for file_path, exam_type in files:
+        rel_path = os.path.relpath(file_path, pyqs_folder).replace(os.sep, '/')
+        content_hash = hash_pyq_file(file_path)
+        current[rel_path] = {
+            'file_path': file_path,
+            'exam_type': exam_type,
+            'content_hash': content_hash
+        }
+
+        previous = manifest.get(rel_path)
+        if not previous:
+            diff['added'].append(rel_path)
+        elif previous.get('content_hash') != content_hash:
+            diff['changed'].append(rel_path)
+        else:
+            diff['unchanged'].append(rel_path)
+
+    diff['removed'] = [rel_path for rel_path in manifest if rel_path not in current]
+    return diff
+
+def normalize_pyq_data(data: Any, exam_type: str) -> List[Dict[str, Any]]:
+    """Turn one parsed PYQ file into processed question dicts"""
+    questions = []
+
+    # Handle different JSON structures
+    if isinstance(data, list):
+        for item in data:
+            if 'questions' in item:
+                for question_data in item['questions']:
+                    processed_q = process_question_with_intelligence(question_data, exam_type)
+                    if processed_q:
+                        questions.append(processed_q)
+    return questions
+
+def ingest_pyq_file(file_path: str, exam_type: str) -> Dict[str, Any]:
+    """Parse and normalize a single file, timing each stage.
+
+    Runs inside worker processes, so errors are returned rather than raised.
+    """
+    result = {
+        'file_path': file_path,
+        'exam_type': exam_type,
+        'questions': [],
+        'parse_seconds': 0.0,
+        'normalize_seconds': 0.0,
+        'error': None
+    }
+    try:
+        started = time.perf_counter()
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        parsed = time.perf_counter()
+        result['questions'] = normalize_pyq_data(data, exam_type)
+        result['parse_seconds'] = parsed - started
+        result['normalize_seconds'] = time.perf_counter() - parsed
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def _ingest_pyq_file_task(task: Tuple[str, str]) -> Dict[str, Any]:
+    return ingest_pyq_file(*task)
+
+def _ingest_in_fork_pool(files: List[Tuple[str, str]], max_workers: int) -> List[Dict[str, Any]]:
+    """Fork pool over files; only safe to call from a single-threaded process"""
+    context = multiprocessing.get_context('fork')
+    chunksize = max(1, len(files) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        return list(pool.map(_ingest_pyq_file_task, files, chunksize=chunksize))
+
+def _ingest_in_subprocess(files: List[Tuple[str, str]], max_workers: int) -> List[Dict[str, Any]]:
+    """Run the fork pool from a fresh interpreter that only loads this module.
+
+    Forking a process with live threads (model loading, Gemini init, Flask)
+    can leave children stuck on locks those threads held, so the pool is
+    forked from a single-threaded helper instead. Tasks and results travel
+    through pickle files.
+    """
+    with tempfile.TemporaryDirectory(prefix="pyq_ingest_") as work_dir:
+        tasks_path = os.path.join(work_dir, "tasks.pkl")
+        results_path = os.path.join(work_dir, "results.pkl")
+        with open(tasks_path, 'wb') as f:
+            pickle.dump({'files': files, 'max_workers': max_workers}, f)
+        subprocess.run([sys.executable, os.path.abspath(__file__), tasks_path, results_path], check=True)
+        with open(results_path, 'rb') as f:
+            return pickle.load(f)
+
+def ingest_pyq_files(files: List[Tuple[str, str]], max_workers: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Parse and normalize files in a process pool.
+
+    Returns the per-file results in input order together with timing stats.
+    Parse/normalize seconds are summed across workers; wall_seconds is the
+    elapsed time of the whole stage.
+    """
+    max_workers = max_workers or get_ingest_workers()
+    started = time.perf_counter()
+
+    # Workers only run json/regex code, so forking never touches the parent's
+    # Mongo or torch state. Spawn would re-execute server.py's import-time
+    # setup in every worker, so without fork we stay serial.
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        max_workers = 1
+
+    results = None
+    if max_workers > 1 and len(files) > 1:
+        try:
+            if threading.active_count() == 1:
+                results = _ingest_in_fork_pool(files, max_workers)
+            else:
+                results = _ingest_in_subprocess(files, max_workers)
+        except Exception as e:
+            logger.warning(f"Parallel ingestion failed, falling back to serial: {e}")
+            results = None
+            max_workers = 1
+
+    if results is None:
+        results = [ingest_pyq_file(file_path, exam_type) for file_path, exam_type in files]
+
+    for result in results:
+        if result['error']:
+            logger.warning(f"Error loading {os.path.basename(result['file_path'])}: {result['error']}")
+
+    timings = {
+        'workers': max_workers,
+        'files': len(files),
+        'parse_seconds': round(sum(r['parse_seconds'] for r in results), 3),
+        'normalize_seconds': round(sum(r['normalize_seconds'] for r in results), 3),
+        'wall_seconds': round(time.perf_counter() - started, 3)
+    }
+    return results, timings
+
+def process_question_with_intelligence(question_data, exam_type='JEE_MAIN'):
+    """Process question with enhanced metadata for intelligent retrieval"""
+    try:
+        question_id = question_data.get('question_id', '')
+        if not question_id:
+            return None
+
+        content = question_data.get('content', '').strip()
+        content = re.sub(r'<br\s*/?>|\n|\\n', ' ', content)
+        content = re.sub(r'\s+', ' ', content).strip()
+        if not content:
+            return None
+
+        
+
+        # Extract options
+        options = []
+        for opt in question_data.get('options', []):
+            if isinstance(opt, dict):
+                option_text = opt.get('content', '').strip()
+                if option_text:
+                    # Format LaTeX content in options too
+                    formatted_option_text = re.sub(r'<br\s*/?>|\n|\\n', ' ', option_text)
+                    formatted_option_text = re.sub(r'\s+', ' ', formatted_option_text).strip()
+                    options.append({
+                        'id': opt.get('identifier', ''),
+                        'text': formatted_option_text
+                    })
+
+        if len(options) < 4:
+            return None
+
+        # Get correct answer
+        correct_options = question_data.get('correct_options', [])
+        correct_answer = correct_options[0] if correct_options else 'A'
+
+        # Extract and normalize subject info
+        subject = normalize_subject(question_data.get('subject', ''))
+        chapter_group = question_data.get('chapterGroup', '')
+        chapter = question_data.get('chapter', '')
+        topic = question_data.get('topicName', '') or question_data.get('topic', '') or chapter
+
+        # Create enhanced question object for intelligent processing
+        enhanced_question = {
+            'question_id': question_id,
+            'content': content,
+            'options': options,
+            'correct_answer': correct_answer,
+            'correct_options': correct_options,  # Keep original for multi-correct questions
+            'subject': subject,
+            'chapter_group': chapter_group,
+            'chapter': chapter,
+            'topic': topic,
+            'marks': question_data.get('marks', 4),
+            'negative_marks': question_data.get('negMarks', 1),
+            'negMarks': question_data.get('negMarks', 1),  # Keep both for compatibility
+            'type': question_data.get('type', 'mcq'),
+            'explanation': question_data.get('explanation', ''),
+            'difficulty': question_data.get('difficulty', 'medium'),
+            'exam_type': exam_type,  # Add exam type to question metadata
+            'created_at': datetime.now(timezone.utc),
+            # Enhanced metadata for intelligent retrieval
+            'content_hash': hashlib.md5(content.encode()).hexdigest(),
+            'topic_keywords': extract_topic_keywords(content, chapter, topic),
+            'complexity_score': calculate_complexity_score(content, options)
+        }
+        
+        # Enhance question with type detection and metadata
+        # enhanced_question = QuestionTypeEnhancer.enhance_question(enhanced_question)
+        
+        return enhanced_question
+
+    except Exception as e:
+        logger.warning(f"Error processing question: {e}")
+        return None
+
+def normalize_subject(subject):
+    """Normalize subject names"""
+    subject = subject.lower().strip()
+    if subject in ['mathematics', 'math', 'maths']:
+        return 'Mathematics'
+    elif subject == 'physics':
+        return 'Physics'
+    elif subject == 'chemistry':
+        return 'Chemistry'
+    else:
+        return subject.title()
+
+def extract_topic_keywords(content, chapter, topic):
+    """Extract keywords for better topic matching"""
+    keywords = []
+
+    # Add chapter and topic as keywords
+    if chapter:
+        keywords.append(chapter.lower())
+    if topic:
+        keywords.append(topic.lower())
+
+    # Extract key terms from content (simple approach)
+    words = re.findall(r'\b[a-zA-Z]{4,}\b', content.lower())
+    # Filter common words and keep domain-specific terms
+    domain_words = [w for w in words if w not in ['question', 'following', 'given', 'find', 'calculate']]
+    keywords.extend(domain_words[:5]) # Top 5 domain words
+
+    return list(set(keywords)) # Remove duplicates
+
+def calculate_complexity_score(content, options):
+    """Calculate question complexity for intelligent difficulty matching"""
+    score = 0
+
+    # Length-based complexity
+    if len(content) > 200:
+        score += 2
+    elif len(content) > 100:
+        score += 1
+
+    # Mathematical content complexity
+    if '$' in content or 'equation' in content.lower():
+        score += 2
+
+    # Option complexity
+    if options:
+        avg_option_length = sum(len(opt['text']) for opt in options) / len(options)
+        if avg_option_length > 50:
+            score += 1
+
+    return min(score, 5) # Cap at 5
+
+if __name__ == '__main__':
+    # Helper entry point for _ingest_in_subprocess: <tasks.pkl> <results.pkl>
+    with open(sys.argv[1], 'rb') as f:
+        task = pickle.load(f)
+    results = _ingest_in_fork_pool(task['files'], task['max_workers'])
+    with open(sys.argv[2], 'wb') as f:
+        pickle.dump(results, f)
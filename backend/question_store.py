@@ -0,0 +1,168 @@
+"""
+In-memory Question Store
+Holds the processed PYQ corpus with a hash index on question_id and a
+secondary exam_type -> subject -> chapter -> topic index so that selection
+paths never have to scan the full question list.
+"""
+
+import logging
+import random
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class QuestionStore:
+    """Question corpus indexed by question_id and by exam/subject/chapter/topic"""
+
+    def __init__(self, questions: Optional[Iterable[Dict[str, Any]]] = None):
+        self._reset()
+        if questions:
+            self.rebuild(questions)
+
+    def _reset(self) -> None:
+        self._questions: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        # exam_type -> subject -> chapter -> topic -> [question_id]
+        self._tree: Dict[str, Dict[str, Dict[str, Dict[str, List[str]]]]] = {}
+        # Flattened buckets for the levels the sampling endpoints hit most
+        self._by_exam: Dict[str, List[str]] = {}
+        self._by_subject: Dict[str, List[str]] = {}
+        self._by_exam_subject: Dict[Tuple[str, str], List[str]] = {}
+
+    def rebuild(self, questions: Iterable[Dict[str, Any]]) -> None:
+        """Replace the corpus and rebuild every index in a single pass"""
+        self._reset()
+        for question in questions:
+            self.add(question)
+        logger.info(f"Question store built with {len(self._questions)} questions")
+
+    def add(self, question: Dict[str, Any]) -> bool:
+        """Add a question, ignoring duplicates of an already indexed ID"""
+        question_id = question.get('question_id')
+        if not question_id or question_id in self._by_id:
+            return False
+
+        self._questions.append(question)
+        self._by_id[question_id] = question
+        self._index(question)
+        return True
+
+    def _index(self, question: Dict[str, Any]) -> None:
+        question_id = question['question_id']
+        exam_type, subject, chapter, topic = self._keys(question)
+
+        (self._tree.setdefault(exam_type, {})
+                   .setdefault(subject, {})
+                   .setdefault(chapter, {})
+                   .setdefault(topic, [])).append(question_id)
+        self._by_exam.setdefault(exam_type, []).append(question_id)
+        self._by_subject.setdefault(subject, []).append(question_id)
+        self._by_exam_subject.setdefault((exam_type, subject), []).append(question_id)
+
+    @staticmethod
+    def _keys(question: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        return (
+            question.get('exam_type', 'UNKNOWN'),
+            question.get('subject', 'Unknown'),
+            question.get('chapter', ''),
+            question.get('topic', '')
+        )
+
+    def get(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """O(1) lookup of a single question"""
+        return self._by_id.get(question_id)
+
+    def get_many(self, question_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Batched lookup preserving input order, unknown IDs are skipped"""
+        by_id = self._by_id
+        return [by_id[qid] for qid in question_ids if qid in by_id]
+
+    def ids_for(self, exam_type: str = None, subject: str = None,
+                chapter: str = None, topic: str = None) -> List[str]:
+        """Question IDs in the bucket matching the given filters (None means any)"""
+        if chapter is None and topic is None:
+            if exam_type and subject:
+                return self._by_exam_subject.get((exam_type, subject), [])
+            if exam_type:
+                return self._by_exam.get(exam_type, [])
+            if subject:
+                return self._by_subject.get(subject, [])
+            return list(self._by_id)
+
+        ids = []
+        exams = [exam_type] if exam_type else list(self._tree)
+        for exam in exams:
+            subjects = self._tree.get(exam, {})
+            for subject_name in ([subject] if subject else list(subjects)):
+                chapters = subjects.get(subject_name, {})
+                for chapter_name in ([chapter] if chapter is not None else list(chapters)):
+                    topics = chapters.get(chapter_name, {})
+                    for topic_name in ([topic] if topic is not None else list(topics)):
+                        ids.extend(topics.get(topic_name, []))
+        return ids
+
+    def chapters_for(self, subject: str, exam_type: str = None) -> Dict[str, List[str]]:
+        """Chapter -> question IDs for a subject, across exams unless one is given"""
+        chapters: Dict[str, List[str]] = {}
+        exams = [exam_type] if exam_type else list(self._tree)
+        for exam in exams:
+            for chapter, topics in self._tree.get(exam, {}).get(subject, {}).items():
+                bucket = chapters.setdefault(chapter, [])
+                for topic_ids in topics.values():
+                    bucket.extend(topic_ids)
+        return chapters
+
+    @staticmethod
+    def sample_ids(bucket: List[str], count: int, exclude_ids: Optional[Set[str]] = None) -> List[str]:
+        """Draw up to count random IDs from a bucket, skipping excluded ones.
+
+        Uses rejection sampling while exclusions are sparse so the cost tracks
+        count rather than bucket size, and falls back to filtering otherwise.
+        """
+        exclude_ids = exclude_ids or set()
+        if count <= 0 or not bucket:
+            return []
+
+        if len(exclude_ids) * 2 < len(bucket):
+            picked: List[str] = []
+            seen: Set[str] = set()
+            for _ in range(count * 4):
+                question_id = bucket[random.randrange(len(bucket))]
+                if question_id in seen or question_id in exclude_ids:
+                    continue
+                seen.add(question_id)
+                picked.append(question_id)
+                if len(picked) >= count:
+                    return picked
+            exclude_ids = exclude_ids | seen
+            available = [qid for qid in bucket if qid not in exclude_ids]
+            return picked + random.sample(available, min(count - len(picked), len(available)))
+
+        available = [qid for qid in bucket if qid not in exclude_ids]
+        return random.sample(available, min(count, len(available)))
+
+    def exam_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Question counts per exam type and subject, read from the index"""
+        return {
+            exam_type: {
+                'total_questions': len(self._by_exam.get(exam_type, [])),
+                'subjects': {
+                    subject: len(self._by_exam_subject[(exam_type, subject)])
+                    for subject in subjects
+                }
+            }
+            for exam_type, subjects in self._tree.items()
+        }
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All questions in load order"""
+        return self._questions
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._by_id
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._questions)
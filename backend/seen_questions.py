@@ -0,0 +1,162 @@
+"""
+Seen-Question Bitmaps
+Every question gets a dense, append-only ordinal stored in Mongo, and each
+user profile keeps a packed bit array over those ordinals marking the
+questions the user has been tested on. Recording a test sets a few bits and
+loading a user's history is one small profile read instead of a scan of all
+their test results.
+
+Ordinals are never reused or reassigned, so a stored bitmap stays valid as
+question files are added, changed or removed.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, FrozenSet, Iterable, Optional
+
+import numpy as np
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+class QuestionOrdinals:
+    """Append-only question_id -> ordinal registry backed by a Mongo collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._ids: List[Optional[str]] = []
+        self._ordinal_of: Dict[str, int] = {}
+        self._indexed = False
+
+    def _ensure_indexes(self) -> None:
+        """Create the unique indexes on first use rather than at import, where Mongo may be slow to answer"""
+        if self._indexed:
+            return
+        try:
+            self.collection.create_index('question_id', unique=True)
+            self.collection.create_index('ordinal', unique=True)
+            self._indexed = True
+        except Exception as e:
+            logger.warning(f"Could not create question ordinal indexes: {e}")
+
+    def _load(self) -> None:
+        self._ensure_indexes()
+        self._ordinal_of = {}
+        self._ids = []
+        for doc in self.collection.find({}, {'_id': 0, 'question_id': 1, 'ordinal': 1}):
+            ordinal = doc['ordinal']
+            if ordinal >= len(self._ids):
+                self._ids.extend([None] * (ordinal + 1 - len(self._ids)))
+            self._ids[ordinal] = doc['question_id']
+            self._ordinal_of[doc['question_id']] = ordinal
+        self._loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+
+    def assign(self, question_ids: Iterable[str]) -> int:
+        """Give ordinals to IDs that have none yet, returning how many were added.
+
+        Another process may claim the same ordinals first; the unique indexes
+        reject the clash, so the registry is reloaded and the rest retried.
+        """
+        question_ids = list(question_ids)
+        self._ensure_loaded()
+        added = 0
+        with self._lock:
+            for _ in range(3):
+                new_ids = [qid for qid in dict.fromkeys(question_ids) if qid and qid not in self._ordinal_of]
+                if not new_ids:
+                    break
+                start = len(self._ids)
+                docs = [{'question_id': qid, 'ordinal': start + i} for i, qid in enumerate(new_ids)]
+                try:
+                    self.collection.insert_many(docs, ordered=True)
+                except BulkWriteError:
+                    self._load()
+                    continue
+                for doc in docs:
+                    self._ids.append(doc['question_id'])
+                    self._ordinal_of[doc['question_id']] = doc['ordinal']
+                added += len(docs)
+                break
+        return added
+
+    def ordinals(self, question_ids: Iterable[str]) -> np.ndarray:
+        """Ordinals of the known IDs among question_ids"""
+        self._ensure_loaded()
+        ordinal_of = self._ordinal_of
+        return np.fromiter((ordinal_of[qid] for qid in question_ids if qid in ordinal_of), dtype=np.int64)
+
+    def ids_for(self, ordinals: Iterable[int]) -> List[str]:
+        self._ensure_loaded()
+        ids = self._ids
+        return [ids[ordinal] for ordinal in ordinals if ordinal < len(ids) and ids[ordinal] is not None]
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._ordinal_of)
+
+class SeenBitmap:
+    """Packed bit array over question ordinals (bit i set = question i seen)"""
+
+    def __init__(self, data: bytes = b""):
+        self._bits = np.frombuffer(bytes(data or b""), dtype=np.uint8).copy()
+
+    def add(self, ordinals) -> None:
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        if not len(ordinals):
+            return
+        needed = int(ordinals.max()) // 8 + 1
+        if needed > len(self._bits):
+            self._bits = np.concatenate([self._bits, np.zeros(needed - len(self._bits), dtype=np.uint8)])
+        np.bitwise_or.at(self._bits, ordinals >> 3, (1 << (ordinals & 7)).astype(np.uint8))
+
+    def __contains__(self, ordinal: int) -> bool:
+        byte = ordinal >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (ordinal & 7)))
+
+    def ordinals(self) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(self._bits, bitorder='little'))
+
+    def __len__(self) -> int:
+        return int(np.unpackbits(self._bits).sum())
+
+    def to_bytes(self) -> bytes:
+        return self._bits.tobytes()
+
+class SeenIdCache:
+    """Decoded seen-ID sets per user, reused until the profile's bitmap changes.
+
+    Entries are keyed by profile_version and the bitmap bytes, so a profile
+    save (which bumps the version) or a backfill replaces the entry. The sets
+    are frozen because callers share them.
+    """
+
+    def __init__(self, ordinals: QuestionOrdinals, max_users: int = 1024):
+        self.ordinals = ordinals
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, user_id: str, bitmap_bytes: bytes, profile_version: Optional[int] = None) -> FrozenSet[str]:
+        bitmap_bytes = bytes(bitmap_bytes or b"")
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == profile_version and entry[1] == bitmap_bytes:
+                self._entries.move_to_end(user_id)
+                return entry[2]
+
+        seen_ids = frozenset(self.ordinals.ids_for(SeenBitmap(bitmap_bytes).ordinals()))
+        with self._lock:
+            self._entries[user_id] = (profile_version, bitmap_bytes, seen_ids)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return seen_ids
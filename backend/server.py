@@ -5,7 +5,7 @@ import os
 import json
 import random
 from datetime import datetime, timedelta, timezone
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne, timeout as mongo_timeout
 from bson import ObjectId
 from dotenv import load_dotenv
 import logging
@@ -13,11 +13,17 @@ from typing import List, Dict, Any
 import hashlib
 import re
 import statistics
+import time
+import threading
 
 # Import our enhanced modules
 from vector_db import VectorDBManager
-from models import Question, ExamType, Difficulty, UserStreak
-from gemini_analyzer import GeminiTestAnalyzer
+from models import Question, ExamType, Difficulty, UserStreak, TestConfig
+from question_store import QuestionStore
+from seen_questions import QuestionOrdinals, SeenBitmap, SeenIdCache
+from blueprint import CandidateGroup, compile_plan, solve_plan
+from pregeneration import PregeneratedTests
+from pyq_ingestion import discover_pyq_files, diff_pyq_manifest, ingest_pyq_files, normalize_subject
 from question_types import (
     QuestionTypeDetector, QuestionValidator, AnswerEvaluator, 
     QuestionTypeEnhancer, QuestionType
@@ -63,6 +69,9 @@ try:
     questions_collection = db['questions']
     user_tasks_collection = db['user_tasks']  # New collection for task management
     user_streaks_collection = db['user_streaks']  # New collection for streak tracking
+    ingest_manifest_collection = db['ingest_manifest']  # PYQ file path -> content hash -> question IDs
+    question_ordinals_collection = db['question_ordinals']  # question_id -> dense ordinal for seen bitmaps
+    test_sessions_collection = db['test_sessions']  # Generated tests as question ID references, TTL-expired
     logger.info("MongoDB connected successfully")
 except Exception as e:
     logger.error(f"MongoDB connection failed: {e}")
@@ -70,22 +79,71 @@ except Exception as e:
 
 # Initialize ChromaDB Vector Database for intelligent memory
 try:
-    vector_db = VectorDBManager("./intelligent_chroma_db")
+    vector_db = VectorDBManager(
+        "./intelligent_chroma_db",
+        embed_batch_size=int(os.getenv('EMBED_BATCH_SIZE', 64)),
+        write_batch_size=int(os.getenv('VECTOR_WRITE_BATCH_SIZE', 1000)),
+        embedding_cache_bytes=int(os.getenv('EMBEDDING_CACHE_MB', 64)) * 1024 * 1024,
+        search_backend=os.getenv('VECTOR_SEARCH_BACKEND', 'chroma'),
+        index_storage=os.getenv('VECTOR_INDEX_STORAGE', 'float32'),
+        embed_max_wait_ms=float(os.getenv('EMBED_BATCH_WAIT_MS', 5)),
+        lazy_model=os.getenv('LAZY_MODEL_LOAD', 'true').lower() == 'true',
+        model_wait_seconds=float(os.getenv('MODEL_WAIT_SECONDS', 60))
+    )
     logger.info("ChromaDB initialized with intelligent memory")
 except Exception as e:
     logger.error(f"ChromaDB initialization failed: {e}")
     exit(1)
 
-# Initialize Gemini AI Analyzer
-try:
-    gemini_analyzer = GeminiTestAnalyzer()
-    logger.info("Gemini AI Test Analyzer initialized successfully")
-except Exception as e:
-    logger.warning(f"Gemini AI initialization failed: {e}")
-    gemini_analyzer = None
+# Weak-topic retrieval: "nearest" takes the closest questions to a topic
+# centroid, "diverse" samples from a wider neighbourhood around it and "mmr"
+# re-ranks that neighbourhood by maximal marginal relevance
+WEAK_TOPIC_SAMPLING = os.getenv('WEAK_TOPIC_SAMPLING', 'nearest')
+MMR_DIVERSITY = float(os.getenv('MMR_DIVERSITY', '0.3'))
+
+# Mock-test difficulty choices -> the stored question difficulty to favour ("mixed" has no preference)
+DIFFICULTY_PREFERENCES = {'easy': 'easy', 'medium': 'medium', 'hard': 'hard', 'advanced': 'hard'}
+
+# Warm state of components initialized in the background, reported by /api/ready
+warmup_state = {'gemini': 'loading', 'questions': 'pending'}
 
-# Global questions storage
-all_questions = []
+# Initialize Gemini AI Analyzer on a background thread; analysis falls back until it is ready
+gemini_analyzer = None
+
+def init_gemini_analyzer():
+    global gemini_analyzer
+    try:
+        from gemini_analyzer import GeminiTestAnalyzer
+        gemini_analyzer = GeminiTestAnalyzer()
+        warmup_state['gemini'] = 'ready'
+        logger.info("Gemini AI Test Analyzer initialized successfully")
+    except Exception as e:
+        warmup_state['gemini'] = 'failed'
+        logger.warning(f"Gemini AI initialization failed: {e}")
+
+threading.Thread(target=init_gemini_analyzer, name="gemini-init", daemon=True).start()
+
+# Global questions storage, indexed by question_id
+question_store = QuestionStore()
+
+# Fingerprint of the ingested PYQ files, recorded on test sessions next to their question IDs
+corpus_version = None
+
+# Held for a whole ingest (startup warmup or /api/load-questions): each one diffs
+# the manifest, writes vectors, prunes and saves the manifest, so they must not interleave
+ingest_lock = threading.Lock()
+
+# Dense question ordinals shared by every user's seen-question bitmap
+question_ordinals = QuestionOrdinals(question_ordinals_collection)
+seen_id_cache = SeenIdCache(question_ordinals)
+
+# Next personalized test per user, built in the background after each submission
+PREGENERATE_TESTS = os.getenv('PREGENERATE_TESTS', 'true').lower() == 'true'
+pregenerated_tests = PregeneratedTests(
+    ttl_seconds=float(os.getenv('PREGENERATED_TEST_TTL', 1800)),
+    max_entries=int(os.getenv('PREGENERATED_TEST_MAX_ENTRIES', 1000)),
+    max_workers=int(os.getenv('PREGENERATE_WORKERS', 2))
+)
 
 def clean_mongo_doc(doc):
     """Clean MongoDB document by removing/converting ObjectId fields"""
@@ -107,71 +165,215 @@ def clean_mongo_doc(doc):
         return cleaned
     return doc
 
-def load_and_vectorize_questions():
-    """Load questions from exam-specific JSON folders and store in both MongoDB and ChromaDB for intelligent retrieval"""
-    global all_questions
+def load_ingest_manifest():
+    """Load the PYQ ingest manifest (relative file path -> content hash, exam type, question IDs)"""
+    try:
+        return {doc['file_path']: doc for doc in ingest_manifest_collection.find({}, {'_id': 0})}
+    except Exception as e:
+        logger.warning(f"Error loading ingest manifest: {e}")
+        return {}
+
+def save_ingest_manifest(entries, removed_paths, full_rewrite=False):
+    """Persist manifest entries for re-ingested files and drop removed ones"""
+    try:
+        if full_rewrite:
+            ingest_manifest_collection.delete_many({})
+        if entries:
+            ingest_manifest_collection.bulk_write([
+                ReplaceOne({'file_path': entry['file_path']}, entry, upsert=True)
+                for entry in entries
+            ])
+        if removed_paths:
+            ingest_manifest_collection.delete_many({'file_path': {'$in': removed_paths}})
+    except Exception as e:
+        logger.warning(f"Error saving ingest manifest: {e}")
+
+def load_and_vectorize_questions(force_full=False):
+    """Load questions from exam-specific JSON folders and store in both MongoDB and ChromaDB for intelligent retrieval.
+
+    A manifest of file path -> content hash -> question IDs makes reloads
+    incremental: only added or changed files are parsed, and only the
+    affected questions are upserted or deleted in MongoDB and ChromaDB.
+    A cold start parses everything to fill memory but still persists only
+    the diff. force_full re-parses, re-embeds and rewrites every file but
+    still diffs against the stored manifest, so questions from removed or
+    changed files are deleted from the vector DB too. Returns an ingest
+    report with the diff and per-stage timings. Callers must hold ingest_lock.
+    """
+    global question_store, corpus_version
+
     # Use absolute path to pyqs folder
     pyqs_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pyqs")
 
     logger.info("🧠 Loading questions with intelligent vectorization from exam-specific folders...")
-    question_count = 0
-    vectorized_count = 0
-    
-    # Define exam-specific folders
-    exam_folders = {
-        'jee_main': 'JEE_MAIN',
-        'jee_advanced': 'JEE_ADVANCED', 
-        'neet': 'NEET',
-        'bitsat': 'BITSAT',
-        'other_engineering': 'OTHER_ENGINEERING'
-    }
+    started = time.perf_counter()
+    cold_start = len(question_store) == 0
 
-    for folder_name, exam_type in exam_folders.items():
-        folder_path = os.path.join(pyqs_folder, folder_name)
-        if not os.path.exists(folder_path):
-            logger.warning(f"Exam folder {folder_name} not found, skipping...")
-            continue
-            
-        logger.info(f"Loading questions from {folder_name} folder...")
-        folder_question_count = 0
-        
-        for filename in os.listdir(folder_path):
-            if filename.endswith('.json'):
-                file_path = os.path.join(folder_path, filename)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-
-                    # Handle different JSON structures
-                    if isinstance(data, list):
-                        for item in data:
-                            if 'questions' in item:
-                                for question_data in item['questions']:
-                                    processed_q = process_question_with_intelligence(question_data, exam_type)
-                                    if processed_q:
-                                        all_questions.append(processed_q)
-                                        question_count += 1
-                                        folder_question_count += 1
-
-                                        # Add to ChromaDB for intelligent retrieval
-                                        if add_question_to_vector_db(processed_q):
-                                            vectorized_count += 1
-                except Exception as e:
-                    logger.warning(f"Error loading {filename}: {e}")
-        
-        logger.info(f"Loaded {folder_question_count} questions from {folder_name}")
+    manifest = load_ingest_manifest()
+    diff = diff_pyq_manifest(pyqs_folder, discover_pyq_files(pyqs_folder), manifest)
+    current_files = diff['files']
 
-    logger.info(f"Total loaded: {question_count} questions from all exam types")
+    # Parse + normalize (parallel), skipping files whose questions are already in memory
+    if cold_start or force_full:
+        parse_paths = list(current_files)
+    else:
+        parse_paths = diff['added'] + diff['changed']
+    file_results, timings = ingest_pyq_files([
+        (current_files[rel_path]['file_path'], current_files[rel_path]['exam_type'])
+        for rel_path in parse_paths
+    ])
+    parsed = dict(zip(parse_paths, file_results))
+
+    # Merge in file order: fresh results for parsed files, the in-memory
+    # copy for unchanged ones. Files that failed to parse keep their old state.
+    all_questions = []
+    counts_by_exam = {}
+    manifest_entries = []
+    manifest_updates = []
+    # Files whose stored manifest entry stays valid (none on a full reload)
+    keep_entry = set() if force_full else set(diff['unchanged'])
+    for rel_path, file_info in current_files.items():
+        result = parsed.get(rel_path)
+        previous = manifest.get(rel_path)
+
+        if result is None or result['error']:
+            questions = question_store.get_many(previous['question_ids']) if previous else []
+            entry = previous
+        elif rel_path in keep_entry:
+            questions = result['questions']
+            entry = previous
+        else:
+            questions = result['questions']
+            entry = {
+                'file_path': rel_path,
+                'exam_type': file_info['exam_type'],
+                'content_hash': file_info['content_hash'],
+                'question_ids': [q['question_id'] for q in questions],
+                'updated_at': datetime.now(timezone.utc)
+            }
+            manifest_updates.append(entry)
+
+        if entry:
+            manifest_entries.append(entry)
+        all_questions.extend(questions)
+        counts_by_exam[file_info['exam_type']] = counts_by_exam.get(file_info['exam_type'], 0) + len(questions)
+
+    # Questions from files that changed or disappeared (every file on a full reload), as of the last ingest
+    previous_ids = set()
+    for rel_path in diff['changed'] + diff['removed'] + (diff['unchanged'] if force_full else []):
+        previous_ids.update(manifest[rel_path]['question_ids'])
+
+    # Build the in-memory indexes once so lookups never scan the corpus. The
+    # new store replaces the old one in a single assignment, so requests during
+    # a reload see either the complete old corpus or the complete new one
+    question_store = QuestionStore(all_questions)
+    corpus_version = hashlib.sha256(json.dumps(sorted(
+        (entry['file_path'], entry['content_hash']) for entry in manifest_entries
+    )).encode()).hexdigest()[:16]
+    vector_db.rebuild_lexical_index(
+        question_store.all(), exam_of=lambda q: resolve_exam_type(q.get('exam_type')).value
+    )
+    try:
+        question_ordinals.assign(q['question_id'] for q in question_store)
+    except Exception as e:
+        logger.warning(f"Error assigning question ordinals: {e}")
+
+    upserted_questions = question_store.get_many(dict.fromkeys(
+        question_id for entry in manifest_updates for question_id in entry['question_ids']
+    ))
+    deleted_ids = [qid for qid in previous_ids if qid not in question_store]
+    modified_ids = [q['question_id'] for q in upserted_questions if q['question_id'] in previous_ids]
+
+    logger.info(f"Total loaded: {len(question_store)} questions from all exam types "
+                f"({len(parse_paths)} files parsed, {timings['workers']} workers, {timings['wall_seconds']}s)")
+    logger.info(f"Ingest diff: {len(diff['added'])} added, {len(diff['changed'])} changed, "
+                f"{len(diff['removed'])} removed, {len(diff['unchanged'])} unchanged files; "
+                f"{len(upserted_questions)} questions upserted, {len(deleted_ids)} deleted")
+
+    # Embed into ChromaDB for intelligent retrieval. A cold start re-checks
+    # the whole corpus so a fresh vector DB is always filled.
+    stage_started = time.perf_counter()
+    vector_db.delete_questions(deleted_ids + modified_ids)
+    vectorize_questions = question_store.all() if cold_start else upserted_questions
+    vectorized_count = add_questions_to_vector_db(vectorize_questions) if vectorize_questions else 0
+    parse_failed = any(result['error'] for result in file_results)
+    if cold_start and len(question_store) and not parse_failed:
+        # Drop vectors of removed questions and ones an older build stored in the wrong exam collection.
+        # An incomplete corpus (missing folder, failed parses) would wipe good vectors, so it never prunes.
+        ids_by_exam = {}
+        for question in question_store:
+            ids_by_exam.setdefault(resolve_exam_type(question.get('exam_type')).value, []).append(question['question_id'])
+        pruned_count = vector_db.retain_only(ids_by_exam, max_fraction=float(os.getenv('PRUNE_MAX_FRACTION', 0.5)))
+    else:
+        if cold_start:
+            logger.warning("Skipping vector prune: the question corpus is empty or some files failed to parse")
+        pruned_count = 0
+    timings['embed_seconds'] = round(time.perf_counter() - stage_started, 3)
     logger.info(f"🧠 Vectorized {vectorized_count} questions for intelligent retrieval")
 
-    # Save to MongoDB for persistence
-    if all_questions:
+    # Refresh the similar-question tables and topic centroids whenever the vectorized corpus changed
+    stage_started = time.perf_counter()
+    if upserted_questions or deleted_ids or pruned_count or not vector_db.neighbor_tables or vector_db.topic_centroids is None:
+        vector_db.build_precomputed_tables()
+    timings['precompute_seconds'] = round(time.perf_counter() - stage_started, 3)
+
+    # Save to MongoDB for persistence, rewriting everything only on a full
+    # reload, when there is no manifest to diff against or when the
+    # collection is out of step with it
+    stage_started = time.perf_counter()
+    full_rewrite = force_full or not manifest
+    if not full_rewrite:
         try:
-            questions_collection.delete_many({})  # Clear existing
-            questions_collection.insert_many(all_questions)
-            logger.info(f"Saved {len(all_questions)} questions to MongoDB")
+            recorded_ids = {qid for entry in manifest.values() for qid in entry['question_ids']}
+            full_rewrite = questions_collection.estimated_document_count() != len(recorded_ids)
         except Exception as e:
-            logger.warning(f"Error saving to MongoDB: {e}")
+            logger.warning(f"Error counting MongoDB questions: {e}")
+
+    try:
+        if full_rewrite:
+            if len(question_store):
+                questions_collection.delete_many({})  # Clear existing
+                questions_collection.insert_many(question_store.all())
+                logger.info(f"Saved {len(question_store)} questions to MongoDB")
+        else:
+            if upserted_questions:
+                questions_collection.bulk_write([
+                    ReplaceOne({'question_id': q['question_id']}, q, upsert=True)
+                    for q in upserted_questions
+                ])
+            if deleted_ids:
+                questions_collection.delete_many({'question_id': {'$in': deleted_ids}})
+            logger.info(f"Upserted {len(upserted_questions)} and deleted {len(deleted_ids)} questions in MongoDB")
+    except Exception as e:
+        logger.warning(f"Error saving to MongoDB: {e}")
+
+    save_ingest_manifest(
+        manifest_entries if full_rewrite else manifest_updates,
+        diff['removed'],
+        full_rewrite=full_rewrite
+    )
+    timings['persist_seconds'] = round(time.perf_counter() - stage_started, 3)
+    timings['total_seconds'] = round(time.perf_counter() - started, 3)
+
+    logger.info(f"Ingest timings: parse {timings['parse_seconds']}s, normalize {timings['normalize_seconds']}s "
+                f"(cpu), embed {timings['embed_seconds']}s, precompute {timings['precompute_seconds']}s, persist {timings['persist_seconds']}s, "
+                f"total {timings['total_seconds']}s")
+
+    return {
+        'total_questions': len(question_store),
+        'corpus_version': corpus_version,
+        'vectorized_questions': vectorized_count,
+        'by_exam_type': counts_by_exam,
+        'diff': {
+            'added_files': len(diff['added']),
+            'changed_files': len(diff['changed']),
+            'removed_files': len(diff['removed']),
+            'unchanged_files': len(diff['unchanged']),
+            'upserted_questions': len(upserted_questions),
+            'deleted_questions': len(deleted_ids)
+        },
+        'timings': timings
+    }
 
 def process_latex_for_rendering(text: str) -> str:
     """
@@ -231,161 +433,42 @@ def process_latex_for_rendering(text: str) -> str:
 
     return processed_content
 
-def process_question_with_intelligence(question_data, exam_type='JEE_MAIN'):
-    """Process question with enhanced metadata for intelligent retrieval"""
+def resolve_exam_type(exam_type):
+    """ExamType whose collection holds a question; exams without one go to JEE_MAIN"""
     try:
-        question_id = question_data.get('question_id', '')
-        if not question_id:
-            return None
-
-        content = question_data.get('content', '').strip()
-        content = re.sub(r'<br\s*/?>|\n|\\n', ' ', content)
-        content = re.sub(r'\s+', ' ', content).strip()
-        if not content:
-            return None
-
-        
-
-        # Extract options
-        options = []
-        for opt in question_data.get('options', []):
-            if isinstance(opt, dict):
-                option_text = opt.get('content', '').strip()
-                if option_text:
-                    # Format LaTeX content in options too
-                    formatted_option_text = re.sub(r'<br\s*/?>|\n|\\n', ' ', option_text)
-                    formatted_option_text = re.sub(r'\s+', ' ', formatted_option_text).strip()
-                    options.append({
-                        'id': opt.get('identifier', ''),
-                        'text': formatted_option_text
-                    })
-
-        if len(options) < 4:
-            return None
-
-        # Get correct answer
-        correct_options = question_data.get('correct_options', [])
-        correct_answer = correct_options[0] if correct_options else 'A'
-
-        # Extract and normalize subject info
-        subject = normalize_subject(question_data.get('subject', ''))
-        chapter_group = question_data.get('chapterGroup', '')
-        chapter = question_data.get('chapter', '')
-        topic = question_data.get('topicName', '') or question_data.get('topic', '') or chapter
-
-        # Create enhanced question object for intelligent processing
-        enhanced_question = {
-            'question_id': question_id,
-            'content': content,
-            'options': options,
-            'correct_answer': correct_answer,
-            'correct_options': correct_options,  # Keep original for multi-correct questions
-            'subject': subject,
-            'chapter_group': chapter_group,
-            'chapter': chapter,
-            'topic': topic,
-            'marks': question_data.get('marks', 4),
-            'negative_marks': question_data.get('negMarks', 1),
-            'negMarks': question_data.get('negMarks', 1),  # Keep both for compatibility
-            'type': question_data.get('type', 'mcq'),
-            'explanation': question_data.get('explanation', ''),
-            'difficulty': question_data.get('difficulty', 'medium'),
-            'exam_type': exam_type,  # Add exam type to question metadata
-            'created_at': datetime.now(timezone.utc),
-            # Enhanced metadata for intelligent retrieval
-            'content_hash': hashlib.md5(content.encode()).hexdigest(),
-            'topic_keywords': extract_topic_keywords(content, chapter, topic),
-            'complexity_score': calculate_complexity_score(content, options)
-        }
-        
-        # Enhance question with type detection and metadata
-        # enhanced_question = QuestionTypeEnhancer.enhance_question(enhanced_question)
-        
-        return enhanced_question
-
-    except Exception as e:
-        logger.warning(f"Error processing question: {e}")
-        return None
-
-def normalize_subject(subject):
-    """Normalize subject names"""
-    subject = subject.lower().strip()
-    if subject in ['mathematics', 'math', 'maths']:
-        return 'Mathematics'
-    elif subject == 'physics':
-        return 'Physics'
-    elif subject == 'chemistry':
-        return 'Chemistry'
-    else:
-        return subject.title()
-
-def extract_topic_keywords(content, chapter, topic):
-    """Extract keywords for better topic matching"""
-    keywords = []
-
-    # Add chapter and topic as keywords
-    if chapter:
-        keywords.append(chapter.lower())
-    if topic:
-        keywords.append(topic.lower())
-
-    # Extract key terms from content (simple approach)
-    words = re.findall(r'\b[a-zA-Z]{4,}\b', content.lower())
-    # Filter common words and keep domain-specific terms
-    domain_words = [w for w in words if w not in ['question', 'following', 'given', 'find', 'calculate']]
-    keywords.extend(domain_words[:5]) # Top 5 domain words
-
-    return list(set(keywords)) # Remove duplicates
-
-def calculate_complexity_score(content, options):
-    """Calculate question complexity for intelligent difficulty matching"""
-    score = 0
-
-    # Length-based complexity
-    if len(content) > 200:
-        score += 2
-    elif len(content) > 100:
-        score += 1
-
-    # Mathematical content complexity
-    if '$' in content or 'equation' in content.lower():
-        score += 2
-
-    # Option complexity
-    if options:
-        avg_option_length = sum(len(opt['text']) for opt in options) / len(options)
-        if avg_option_length > 50:
-            score += 1
-
-    return min(score, 5) # Cap at 5
-
-def add_question_to_vector_db(question):
-    """Add question to ChromaDB for intelligent retrieval"""
+        return ExamType(exam_type)
+    except ValueError:
+        return ExamType.JEE_MAIN
+
+def build_vector_question(question):
+    """Create the Question object ChromaDB stores for a processed question"""
+    question_obj = Question(
+        id=question['question_id'],
+        question_text=question['content'],
+        options=[opt['text'] for opt in question['options']],
+        correct_answer=question['correct_answer'],
+        subject=question['subject'],
+        chapter=question['chapter'],
+        topic=question['topic'],
+        difficulty=Difficulty.MEDIUM, # Default
+        marks=question['marks'],
+        exam_type=resolve_exam_type(question.get('exam_type')),
+        year=2024,
+        explanation=question['explanation']
+    )
+
+    # Add negative marks as additional attribute
+    question_obj.neg_marks = question['negative_marks']
+    return question_obj
+
+def add_questions_to_vector_db(questions):
+    """Add questions to ChromaDB in bulk, returning how many are stored"""
     try:
-        # Create Question object for ChromaDB
-        question_obj = Question(
-            id=question['question_id'],
-            question_text=question['content'],
-            options=[opt['text'] for opt in question['options']],
-            correct_answer=question['correct_answer'],
-            subject=question['subject'],
-            chapter=question['chapter'],
-            topic=question['topic'],
-            difficulty=Difficulty.MEDIUM, # Default
-            marks=question['marks'],
-            exam_type=ExamType.JEE_MAIN,
-            year=2024,
-            explanation=question['explanation']
-        )
-
-        # Add negative marks as additional attribute
-        question_obj.neg_marks = question['negative_marks']
-
-        return vector_db.add_question(question_obj)
+        return vector_db.add_questions_batch([build_vector_question(q) for q in questions])
 
     except Exception as e:
-        logger.warning(f"Error adding question to vector DB: {e}")
-        return False
+        logger.warning(f"Error adding questions to vector DB: {e}")
+        return 0
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -394,6 +477,7 @@ def health_check():
         return jsonify({
             "status": "healthy",
             "server": "running",
+            "pregenerated_tests": pregenerated_tests.stats(),
             "timestamp": datetime.now(timezone.utc).isoformat()
         }), 200
     except Exception as e:
@@ -402,11 +486,79 @@ def health_check():
             "error": str(e)
         }), 500
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: warm state of each component; 503 until questions can be served"""
+    components = {
+        'embedding_model': vector_db.model_status(),
+        'questions': {'state': warmup_state['questions'], 'count': len(question_store)},
+        'gemini': {'state': warmup_state['gemini']}
+    }
+    try:
+        with mongo_timeout(2):
+            mongo_client.admin.command('ping')
+        components['mongodb'] = {'state': 'ready'}
+    except Exception as e:
+        components['mongodb'] = {'state': 'failed', 'error': str(e)}
+
+    # Gemini is optional: analysis has a fallback
+    ready = all(components[name]['state'] == 'ready' for name in ('embedding_model', 'questions', 'mongodb'))
+    return jsonify({
+        "status": "ready" if ready else "warming",
+        "components": components,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }), 200 if ready else 503
+
+def ensure_test_session_ttl():
+    """Expire test sessions TEST_SESSION_TTL_DAYS after creation (run from warmup, not at import)"""
+    try:
+        test_sessions_collection.create_index(
+            'created_at', expireAfterSeconds=int(float(os.getenv('TEST_SESSION_TTL_DAYS', 30)) * 86400)
+        )
+    except Exception as e:
+        logger.warning(f"Could not create test session TTL index: {e}")
+
+def warm_question_store():
+    """Startup ingest, run in the background so the server binds immediately.
+
+    An empty vector DB is first seeded from the VECTOR_SNAPSHOT file when one
+    is configured, so the ingest finds the questions stored and encodes nothing.
+    """
+    warmup_state['questions'] = 'loading'
+    ensure_test_session_ttl()
+    try:
+        with ingest_lock:
+            snapshot_path = os.getenv('VECTOR_SNAPSHOT')
+            vector_db_empty = not any(vector_db.collection_stats.total(exam_type) for exam_type in vector_db.collections)
+            if snapshot_path and os.path.exists(snapshot_path) and vector_db_empty:
+                try:
+                    report = vector_db.import_snapshot(snapshot_path)
+                    logger.info(f"Seeded vector DB from {snapshot_path}: {report['counts']} in {report['seconds']}s")
+                except Exception as e:
+                    logger.warning(f"Could not import vector snapshot {snapshot_path}: {e}")
+            # Ingest embeds new questions, so wait for the background model load to finish either way
+            model_ready = vector_db.wait_for_model()
+            if not model_ready:
+                logger.error(f"Embedding model unavailable, questions load without vectors: "
+                             f"{vector_db.model_status()['error']}")
+            load_and_vectorize_questions()
+            warmup_state['questions'] = 'ready' if model_ready else 'degraded'
+    except Exception as e:
+        warmup_state['questions'] = 'failed'
+        logger.error(f"Startup question load failed: {e}")
+
 @app.route('/api/load-questions', methods=['POST'])
 def load_questions():
-    """Load and vectorize questions for intelligent retrieval"""
+    """Load and vectorize questions for intelligent retrieval (incremental unless {"full": true})"""
+    if not ingest_lock.acquire(blocking=False):
+        return jsonify({
+            "success": False,
+            "error": "A question load is already running"
+        }), 409
     try:
-        load_and_vectorize_questions()
+        data = request.get_json(silent=True) or {}
+        ingest_report = load_and_vectorize_questions(force_full=bool(data.get('full', False)))
+        warmup_state['questions'] = 'ready'
 
         # Get final stats
         memory_usage = vector_db.get_memory_usage()
@@ -415,9 +567,12 @@ def load_questions():
             "success": True,
             "message": "Questions loaded with intelligent memory",
             "stats": {
-                "total_questions": len(all_questions),
+                "total_questions": len(question_store),
                 "vectorized_questions": memory_usage.get('total_questions', 0),
-                "memory_size_mb": memory_usage.get('database_size_mb', 0)
+                "memory_size_mb": memory_usage.get('database_size_mb', 0),
+                "by_exam_type": ingest_report['by_exam_type'],
+                "diff": ingest_report['diff'],
+                "timings": ingest_report['timings']
             }
         }), 200
     except Exception as e:
@@ -425,6 +580,8 @@ def load_questions():
             "success": False,
             "error": str(e)
         }), 500
+    finally:
+        ingest_lock.release()
 
 @app.route('/api/generate-intelligent-test', methods=['POST'])
 def generate_intelligent_test():
@@ -434,65 +591,25 @@ def generate_intelligent_test():
         user_id = data.get('user_id', 'anonymous')
         total_questions = min(data.get('total_questions', 30), 90)
         subjects = data.get('subjects', ['Physics', 'Chemistry', 'Mathematics'])
+        # Optional exam scope; without one, searches fan out across every exam collection
+        exam_type = (data.get('exam_type') or '').upper() or None
+        difficulty_levels = data.get('difficulty_levels')
+        question_types = data.get('question_types')
 
         logger.info(f"🧠 Generating intelligent test for user {user_id}")
 
-        # Get user's intelligent profile (includes question history)
-        user_intelligence = get_user_intelligence(user_id)
-        seen_questions = user_intelligence.get('seen_questions', set())
-
-        logger.info(f"Excluding {len(seen_questions)} previously seen questions for user {user_id}")
-
-        # Generate intelligent test with no repetition
-        test_questions = []
-        questions_per_subject = total_questions // len(subjects)
-
-        for subject in subjects:
-            logger.info(f"Generating {questions_per_subject} {subject} questions")
-
-            # Get weak topics for this subject
-            weak_topics = user_intelligence.get('weak_topics', {}).get(subject, [])
-            mistake_patterns = user_intelligence.get('mistake_patterns', {}).get(subject, [])
-
-            subject_questions = []
-            current_exclude_ids = seen_questions.copy()  # Start with all seen questions
-
-            # 60% from weak topics (intelligent targeting)
-            weak_count = int(questions_per_subject * 0.6)
-            if weak_topics:
-                for topic in weak_topics[:3]:  # Top 3 weak topics
-                    topic_questions = get_intelligent_questions_for_topic(
-                        subject, topic['topic'], weak_count // len(weak_topics[:3]), current_exclude_ids
-                    )
-                    subject_questions.extend(topic_questions)
-                    # Update exclusion list with newly selected questions
-                    for q in topic_questions:
-                        current_exclude_ids.add(q['question_id'])
-
-            # 25% from mistake patterns (learning from errors)
-            mistake_count = int(questions_per_subject * 0.25)
-            if mistake_patterns:
-                mistake_questions = get_questions_similar_to_mistakes(
-                    user_id, subject, mistake_count, current_exclude_ids
-                )
-                subject_questions.extend(mistake_questions)
-                # Update exclusion list
-                for q in mistake_questions:
-                    current_exclude_ids.add(q['question_id'])
-
-            # 15% from general coverage (maintaining breadth)
-            remaining_count = questions_per_subject - len(subject_questions)
-            if remaining_count > 0:
-                general_questions = get_general_coverage_questions(
-                    subject, remaining_count, current_exclude_ids
-                )
-                subject_questions.extend(general_questions)
-
-            test_questions.extend(subject_questions[:questions_per_subject])
-
-        # Intelligent shuffling (maintain difficulty progression)
-        test_questions = intelligent_shuffle(test_questions)
-        test_questions = test_questions[:total_questions]
+        # Serve the test pre-built after the user's last submission when it still fits
+        generated = None
+        if PREGENERATE_TESTS:
+            profile_version = get_profile_version(user_id)
+            if profile_version is not None:
+                request_key = next_test_key(subjects, total_questions, exam_type, difficulty_levels, question_types)
+                generated = pregenerated_tests.take(user_id, request_key, profile_version)
+        pregenerated = generated is not None
+        if generated is None:
+            generated = build_intelligent_test(user_id, subjects, total_questions, exam_type,
+                                               difficulty_levels, question_types)
+        test_questions = generated['questions']
 
         # Create test session with intelligence metadata
         test_id = f"intelligent_test_{user_id}_{int(datetime.now(timezone.utc).timestamp())}"
@@ -500,21 +617,19 @@ def generate_intelligent_test():
         test_session = {
             'test_id': test_id,
             'user_id': user_id,
-            'questions': test_questions,
+            **session_question_refs(test_questions),
             'total_questions': len(test_questions),
             'subjects': subjects,
-            'intelligence_used': {
-                'weak_topics_targeted': sum(len(topics) for topics in user_intelligence.get('weak_topics', {}).values()),
-                'mistake_patterns_addressed': len(user_intelligence.get('mistake_patterns', {})),
-                'personalization_level': calculate_personalization_level(user_intelligence)
-            },
+            'exam_type': exam_type,
+            'requested_questions': total_questions,
+            'intelligence_used': generated['intelligence_used'],
             'created_at': datetime.now(timezone.utc),
             'status': 'active'
         }
 
         # Save test session
         try:
-            db['test_sessions'].insert_one(test_session)
+            test_sessions_collection.insert_one(test_session)
         except Exception as e:
             logger.warning(f"Error saving test session: {e}")
 
@@ -522,7 +637,8 @@ def generate_intelligent_test():
         question_ids = [q['question_id'] for q in test_questions]
         unique_questions = len(set(question_ids))
 
-        logger.info(f"Generated intelligent test with {len(test_questions)} questions")
+        logger.info(f"Generated intelligent test with {len(test_questions)} questions"
+                    f"{' (pre-generated)' if pregenerated else ''}")
         logger.info(f"Zero repetition guarantee: {unique_questions}/{len(test_questions)} unique questions")
         logger.info(f"Question sources: {len([q for q in test_questions if 'weak_topic' in q.get('selection_reason', '')])} weak topics, "
                     f"{len([q for q in test_questions if 'mistake' in q.get('selection_reason', '')])} mistake patterns, "
@@ -536,11 +652,13 @@ def generate_intelligent_test():
             "test_id": test_id,
             "questions": clean_questions,
             "intelligence_metadata": clean_mongo_doc(test_session['intelligence_used']),
-            "personalization_insights": generate_personalization_insights(user_intelligence),
+            "personalization_insights": generated['personalization_insights'],
+            "generation_timings": generated['generation_timings'],
+            "pregenerated": pregenerated,
             "no_repetition_guarantee": {
                 "total_questions": len(test_questions),
                 "unique_questions": unique_questions,
-                "previously_seen": len(seen_questions),
+                "previously_seen": generated['previously_seen'],
                 "repetition_free": unique_questions == len(test_questions)
             }
         }), 200
@@ -552,8 +670,146 @@ def generate_intelligent_test():
             "error": str(e)
         }), 500
 
-def get_user_question_history(user_id):
-    """Get all questions the user has seen before to prevent repetition"""
+def build_intelligent_test(user_id, subjects, total_questions, exam_type=None,
+                           difficulty_levels=None, question_types=None):
+    """Select and order a personalized test; runs on the request path or the pre-generation worker"""
+    # Get user's intelligent profile (includes question history)
+    user_intelligence = get_user_intelligence(user_id)
+    seen_questions = user_intelligence.get('seen_questions', set())
+
+    logger.info(f"Excluding {len(seen_questions)} previously seen questions for user {user_id}")
+
+    # Blueprint: 60% weak topics, 25% similar to past mistakes, the rest general coverage
+    plan = compile_plan(TestConfig(
+        exam_type=exam_type or '',
+        subjects=subjects,
+        total_questions=total_questions,
+        weak_topic_percentage=0.6,
+        mistake_percentage=0.25,
+        difficulty_levels=difficulty_levels,
+        question_types=question_types
+    ))
+
+    # Generate intelligent test with no repetition: staged, batched selection
+    test_questions, generation_timings = select_intelligent_test_questions(
+        user_id, plan, user_intelligence, exam_type=exam_type
+    )
+
+    # Intelligent shuffling (maintain difficulty progression)
+    test_questions = intelligent_shuffle(test_questions)
+
+    return {
+        'questions': test_questions[:total_questions],
+        'generation_timings': generation_timings,
+        'intelligence_used': {
+            'weak_topics_targeted': sum(len(topics) for topics in user_intelligence.get('weak_topics', {}).values()),
+            'mistake_patterns_addressed': len(user_intelligence.get('mistake_patterns', {})),
+            'personalization_level': calculate_personalization_level(user_intelligence)
+        },
+        'personalization_insights': generate_personalization_insights(user_intelligence),
+        'previously_seen': len(seen_questions)
+    }
+
+def next_test_key(subjects, total_questions, exam_type=None, difficulty_levels=None, question_types=None):
+    """What a pre-generated test must match to answer a generate-intelligent-test request"""
+    return (exam_type, tuple(subjects), total_questions, tuple(difficulty_levels or ()), tuple(question_types or ()))
+
+def get_profile_version(user_id):
+    """Counter bumped on every profile write, so pre-generated tests can tell they are stale"""
+    try:
+        profile = user_profiles_collection.find_one({'user_id': user_id}, {'_id': 0, 'profile_version': 1})
+        return (profile or {}).get('profile_version', 0)
+    except Exception as e:
+        logger.warning(f"Error reading profile version: {e}")
+        return None
+
+def schedule_next_test(user_id, subjects, total_questions, exam_type=None):
+    """After an intelligent-test submission, pre-build the user's next one on the background worker.
+
+    Only /api/generate-intelligent-test reads the cache, so only its own
+    submissions (/api/evaluate-intelligent-test) schedule a build.
+    """
+    if not PREGENERATE_TESTS or not user_id or user_id == 'anonymous' or not subjects:
+        return
+    profile_version = get_profile_version(user_id)
+    if profile_version is None:
+        return
+    total_questions = min(total_questions, 90)
+    pregenerated_tests.schedule(
+        user_id, next_test_key(subjects, total_questions, exam_type), profile_version,
+        lambda: build_intelligent_test(user_id, subjects, total_questions, exam_type)
+    )
+
+def save_profile(user_id, profile):
+    """Upsert a profile, bumping profile_version in the same atomic update.
+
+    The version is incremented server-side, so concurrent writers never save
+    the same version for different profile states, and the user's
+    pre-generated test is dropped.
+    """
+    fields = {key: value for key, value in profile.items() if key not in ('_id', 'profile_version')}
+    user_profiles_collection.update_one(
+        {'user_id': user_id},
+        {'$set': fields, '$inc': {'profile_version': 1}},
+        upsert=True
+    )
+    pregenerated_tests.invalidate(user_id)
+
+def get_user_question_history(user_id, profile=None):
+    """Get all questions the user has seen before to prevent repetition.
+
+    Reads the seen-question bitmap from the user's profile (pass the profile
+    when it is already loaded). Profiles written before bitmaps existed are
+    backfilled once from their test results. The decoded set is cached per
+    profile version and shared, so callers must not modify it.
+    """
+    try:
+        if profile is None:
+            profile = user_profiles_collection.find_one(
+                {'user_id': user_id}, {'_id': 0, 'seen_bitmap': 1, 'profile_version': 1}
+            )
+        if profile and profile.get('seen_bitmap') is not None:
+            seen_questions = seen_id_cache.get(user_id, profile['seen_bitmap'], profile.get('profile_version'))
+            logger.info(f"User {user_id} has seen {len(seen_questions)} questions before")
+            return seen_questions
+
+        seen_questions = scan_user_question_history(user_id)
+        if profile:
+            user_profiles_collection.update_one(
+                {'user_id': user_id}, {'$set': {'seen_bitmap': seen_bitmap_for(seen_questions)}}
+            )
+        return seen_questions
+
+    except Exception as e:
+        logger.warning(f"Error getting user question history: {e}")
+        return set()
+
+def seen_bitmap_for(question_ids, bitmap_bytes=b''):
+    """Bitmap bytes with question_ids set on top of an existing bitmap.
+
+    Ordinals are permanent, so only IDs of loaded questions are registered;
+    others (placeholder IDs, questions no longer in any file) only set a bit
+    when an earlier ingest already gave them an ordinal.
+    """
+    question_ids = list(question_ids)
+    question_ordinals.assign(qid for qid in question_ids if qid in question_store)
+    bitmap = SeenBitmap(bitmap_bytes)
+    bitmap.add(question_ordinals.ordinals(question_ids))
+    return bitmap.to_bytes()
+
+def record_seen_questions(user_id, profile, question_ids):
+    """Set the profile's seen bits for a submitted test before the profile is saved"""
+    try:
+        bitmap_bytes = profile.get('seen_bitmap')
+        if bitmap_bytes is None:
+            # First write since bitmaps were introduced: start from the full history
+            bitmap_bytes = seen_bitmap_for(scan_user_question_history(user_id))
+        profile['seen_bitmap'] = seen_bitmap_for(question_ids, bitmap_bytes)
+    except Exception as e:
+        logger.warning(f"Error recording seen questions: {e}")
+
+def scan_user_question_history(user_id):
+    """Question IDs from every saved test result of a user (used to backfill bitmaps)"""
     try:
         # Get all test results for this user
         test_results = list(test_results_collection.find({
@@ -570,11 +826,11 @@ def get_user_question_history(user_id):
                 if question_id:
                     seen_questions.add(question_id)
 
-        logger.info(f"User {user_id} has seen {len(seen_questions)} questions before")
+        logger.info(f"Scanned {len(seen_questions)} seen questions for user {user_id}")
         return seen_questions
 
     except Exception as e:
-        logger.warning(f"Error getting user question history: {e}")
+        logger.warning(f"Error scanning user question history: {e}")
         return set()
 
 def get_user_intelligence(user_id):
@@ -591,7 +847,7 @@ def get_user_intelligence(user_id):
             }
 
         # Get question history to prevent repetition
-        seen_questions = get_user_question_history(user_id)
+        seen_questions = get_user_question_history(user_id, profile)
 
         # Analyze weak topics by subject
         weak_topics = {}
@@ -658,131 +914,206 @@ def calculate_topic_priority(performance):
 
     return accuracy_score * 0.5 + attempt_score * 0.3 + recency_score * 0.2
 
-def get_intelligent_questions_for_topic(subject, topic, count, exclude_ids=None):
-    """Get questions for specific topic using ChromaDB intelligence, avoiding repetition"""
-    try:
-        exclude_ids = exclude_ids or set()
-
-        # Use ChromaDB to find similar questions (get more to account for exclusions)
-        search_results = vector_db.search_questions(
-            exam_type="JEE_MAIN",
-            query=f"{subject} {topic}",
-            n_results=count * 4, # Get 4x more to account for exclusions
-            subject=subject
-        )
-
-        questions = []
-        for result in search_results:
-            if len(questions) >= count:
-                break
-
-            question_id = result['question_id']
-            if question_id not in exclude_ids:
-                question = get_question_by_id(question_id)
-                if question:
-                    question['selection_reason'] = f'weak_topic_{topic}'
-                    questions.append(question)
-                    exclude_ids.add(question_id) # Add to exclusion list
-
-        logger.info(f"Selected {len(questions)} new questions for topic '{topic}' (excluded {len(exclude_ids)} seen questions)")
-        return questions
+def get_topic_query(subject, topic, exam_types=None):
+    """Precomputed centroid embedding for a weak topic, or a text query when none exists.
 
-    except Exception as e:
-        logger.warning(f"Error getting intelligent questions for topic: {e}")
-        return []
+    Weak topics are keyed "Subject:Chapter" by evaluate_test, so those resolve
+    to the chapter centroid; anything else is tried as a topic name.
+    """
+    prefix = f"{subject}:"
+    if topic.startswith(prefix):
+        centroid = vector_db.topic_centroid(exam_types, subject, chapter=topic[len(prefix):])
+    else:
+        centroid = vector_db.topic_centroid(exam_types, subject, topic=topic)
+    return centroid if centroid is not None else f"{subject} {topic}"
 
-def get_questions_similar_to_mistakes(user_id, subject, count, exclude_ids=None):
-    """Get questions similar to user's past mistakes using vector similarity, avoiding repetition"""
+def recent_mistake_ids(user_id, subjects, per_subject=3):
+    """IDs of the latest wrong answers per subject, from one read of the user's 5 most recent results"""
+    mistakes = {subject: [] for subject in subjects}
     try:
-        exclude_ids = exclude_ids or set()
-
-        # Get user's mistake questions
-        recent_results = list(test_results_collection.find({
-            'user_id': user_id
-        }).sort('completed_at', -1).limit(5))
+        recent_results = test_results_collection.find(
+            {'user_id': user_id}, {'detailed_results': 1, '_id': 0}
+        ).sort('completed_at', -1).limit(5)
 
-        mistake_questions = []
         for result in recent_results:
             for detail in result.get('detailed_results', []):
-                if not detail.get('is_correct') and detail.get('subject') == subject:
-                    mistake_questions.append(detail.get('question_id'))
-
-        if not mistake_questions:
-            return []
-
-        # Find similar questions using ChromaDB
-        similar_questions = []
-        for mistake_id in mistake_questions[:3]: # Top 3 recent mistakes
-            if len(similar_questions) >= count:
-                break
-
-            mistake_question = get_question_by_id(mistake_id)
-            if mistake_question:
-                # Find similar questions
-                search_results = vector_db.search_questions(
-                    exam_type="JEE_MAIN",
-                    query=mistake_question['content'][:200], # Use content for similarity
-                    n_results=count * 2, # Get more to account for exclusions
-                    subject=subject,
-                    exclude_ids=[mistake_id]
-                )
-
-                for result in search_results:
-                    if len(similar_questions) >= count:
-                        break
-
-                    question_id = result['question_id']
-                    if question_id not in exclude_ids:
-                        question = get_question_by_id(question_id)
-                        if question:
-                            question['selection_reason'] = f'similar_to_mistake_{mistake_id[:8]}'
-                            similar_questions.append(question)
-                            exclude_ids.add(question_id)
+                subject = detail.get('subject')
+                if not detail.get('is_correct') and subject in mistakes and len(mistakes[subject]) < per_subject:
+                    mistakes[subject].append(detail.get('question_id'))
+    except Exception as e:
+        logger.warning(f"Error reading recent mistakes: {e}")
+        return {subject: [] for subject in subjects}
+    return mistakes
+
+def general_coverage_ids(subject, count, exclude_ids=None, exam_type=None):
+    """IDs for general coverage of a subject, spread across chapters, from the in-memory index"""
+    exclude_ids = exclude_ids or set()
+
+    # Select diverse questions (different chapters): half drawn at random
+    # from the subject bucket, the rest one per chapter not yet covered
+    selected_ids = question_store.sample_ids(
+        question_store.ids_for(exam_type=exam_type, subject=subject), count // 2, exclude_ids
+    )
+    chapters_used = {question_store.get(qid)['chapter'] for qid in selected_ids}
+
+    chapter_buckets = list(question_store.chapters_for(subject, exam_type=exam_type).items())
+    random.shuffle(chapter_buckets)
+
+    for chapter, chapter_ids in chapter_buckets:
+        if len(selected_ids) >= count:
+            break
+        if chapter in chapters_used:
+            continue
 
-        logger.info(f"Selected {len(similar_questions)} questions similar to mistakes (excluded {len(exclude_ids)} seen questions)")
-        return similar_questions[:count]
+        # No earlier pick came from an unused chapter, so seen IDs are the only exclusions
+        picked = question_store.sample_ids(chapter_ids, 1, exclude_ids)
+        if picked:
+            selected_ids.extend(picked)
+            chapters_used.add(chapter)
 
-    except Exception as e:
-        logger.warning(f"Error getting questions similar to mistakes: {e}")
-        return []
+    return selected_ids
 
-def get_general_coverage_questions(subject, count, exclude_ids=None):
-    """Get general coverage questions for breadth, avoiding repetition"""
-    try:
-        exclude_ids = exclude_ids or set()
+def select_intelligent_test_questions(user_id, plan, user_intelligence, exam_type=None,
+                                      general_reason='general_coverage'):
+    """Staged selection of a compiled test blueprint with a fixed number of I/O calls.
 
-        # Get diverse questions from the subject, excluding seen ones
-        subject_questions = [q for q in all_questions
-                             if q['subject'] == subject and q['question_id'] not in exclude_ids]
+    Shared by every test generation endpoint:
 
-        if not subject_questions:
-            logger.warning(f"No new questions available for {subject} (all {len(all_questions)} questions seen)")
-            return []
+    1. intents: weak-topic, mistake and coverage requests for every subject
+       with a quota for them, with the user's recent mistakes read once
+    2. retrieval: draws from each weak topic's exact bucket (or keyword
+       hits from the lexical index when it has none), neighbour-table
+       lookups plus one batched vector search for all topic centroids and
+       unindexed mistakes, and random draws from the subject and exam
+       buckets for coverage
+    3. hydrate: one bulk lookup of every candidate ID
+    4. allocate: solve_plan fills the blueprint's quotas, skipping seen,
+       mistaken and already picked questions
 
-        # Select diverse questions (different chapters)
-        selected = []
-        chapters_used = set()
+    Difficulty is only applied in the blueprint stage against the in-memory
+    records: stored vectors carry no real difficulty.
 
-        # Shuffle to get random selection within chapters
-        random.shuffle(subject_questions)
+    general_reason may hold a {subject} placeholder (filled lower-case).
+    Returns (questions, timings) where timings holds per-stage milliseconds.
+    """
+    timings = {}
+    config = plan.config
+    exam_types = [exam_type] if exam_type else None
+    seen_questions = user_intelligence.get('seen_questions', set()) if config.exclude_attempted else set()
+    sampling = WEAK_TOPIC_SAMPLING
+    pool_factor = 3 if sampling == 'diverse' else 1
+
+    # Stage 1: retrieval intents
+    stage_start = time.perf_counter()
+    weak_topics = {
+        subject: [topic['topic'] for topic in user_intelligence.get('weak_topics', {}).get(subject, [])[:3]]
+        for subject in plan.subjects if plan.quota(subject, 'weak_topic') > 0
+    }
+    mistake_subjects = [subject for subject in plan.subjects
+                        if plan.quota(subject, 'mistake') > 0 and user_intelligence.get('mistake_patterns', {}).get(subject)]
+    mistake_ids = recent_mistake_ids(user_id, mistake_subjects) if mistake_subjects else {}
+    timings['intents_ms'] = round((time.perf_counter() - stage_start) * 1000, 2)
+
+    # Stage 2: exact buckets, neighbour tables, one batched vector search and bucket draws
+    stage_start = time.perf_counter()
+    candidates = {}
+    queries, query_filters, query_keys = [], [], []
+
+    def bucket(subject=None, chapter=None, topic=None):
+        ids = question_store.ids_for(exam_type=exam_type, subject=subject, chapter=chapter, topic=topic)
+        if plan.has_filters:
+            ids = [qid for qid in ids if plan.accepts(question_store.get(qid))]
+        return ids
 
-        for question in subject_questions:
-            if len(selected) >= count:
-                break
+    for subject, topics in weak_topics.items():
+        per_topic = max(1, plan.quota(subject, 'weak_topic') // len(topics))
+        for topic in topics:
+            # Questions tagged with the topic (or "Subject:Chapter") come first;
+            # the centroid neighbours below only fill what they cannot
+            prefix = f"{subject}:"
+            term = topic[len(prefix):] if topic.startswith(prefix) else topic
+            topic_ids = bucket(subject, chapter=term) if topic.startswith(prefix) else bucket(subject, topic=term)
+            if topic_ids:
+                candidates.setdefault((subject, 'weak_topic'), []).append(CandidateGroup(
+                    f'weak_topic_{topic}', question_store.sample_ids(topic_ids, per_topic * 2, seen_questions), per_topic
+                ))
+            elif vector_db.lexical_index.is_exact_term(term):
+                # Keyword topics ("mole-concept") have no bucket; the inverted index answers them without the encoder
+                hits = vector_db.hybrid_search(exam_type, term, per_topic * 2, subject=subject, exclude_ids=seen_questions)
+                candidates.setdefault((subject, 'weak_topic'), []).append(CandidateGroup(
+                    f'weak_topic_{topic}', [hit['question_id'] for hit in hits], per_topic
+                ))
+
+            queries.append(get_topic_query(subject, topic, exam_types))
+            query_filters.append({
+                'exam_type': exam_types,
+                # Topics of a subject only filter by subject, so leave room for their overlap
+                'n_results': per_topic * len(topics) * pool_factor,
+                'subject': subject,
+                'exclude_ids': seen_questions,
+                'diversity': MMR_DIVERSITY if sampling == 'mmr' else None
+            })
+            query_keys.append((subject, 'weak_topic', f'weak_topic_{topic}', per_topic))
+
+    all_mistake_ids = {mistake_id for ids in mistake_ids.values() for mistake_id in ids}
+    unindexed = []
+    for subject, ids in mistake_ids.items():
+        mistake_count = plan.quota(subject, 'mistake')
+        for mistake_id in ids:
+            # Extra neighbours leave room for overlap with other picks of the subject
+            neighbor_ids = vector_db.similar_question_ids(mistake_id, mistake_count * 2, seen_questions)
+            if neighbor_ids is None:
+                unindexed.append((subject, mistake_id))
+            else:
+                candidates.setdefault((subject, 'mistake'), []).append(
+                    CandidateGroup(f"similar_to_mistake_{mistake_id[:8]}", neighbor_ids)
+                )
+    if unindexed:
+        mistakes = {q['question_id']: q for q in get_questions_by_ids([mistake_id for _, mistake_id in unindexed])}
+        for subject, mistake_id in unindexed:
+            if mistake_id in mistakes:
+                queries.append(mistakes[mistake_id]['content'][:200])
+                query_filters.append({'exam_type': exam_types, 'n_results': plan.quota(subject, 'mistake') * 2,
+                                      'subject': subject, 'exclude_ids': seen_questions})
+                query_keys.append((subject, 'mistake', f"similar_to_mistake_{mistake_id[:8]}", None))
+
+    if queries:
+        for (subject, source, reason, limit), results in zip(query_keys, vector_db.search_questions_many(queries, query_filters)):
+            question_ids = [result['question_id'] for result in results]
+            if source == 'weak_topic' and sampling == 'diverse':
+                question_ids = random.sample(question_ids, len(question_ids))
+            candidates.setdefault((subject, source), []).append(CandidateGroup(reason, question_ids, limit))
+
+    blocked_ids = seen_questions | all_mistake_ids
+    for subject in plan.subjects:
+        count = plan.subject_total(subject)
+        reason = general_reason.format(subject=subject.lower())
+        # Chapter-spread coverage first, then random draws to cover any shortfall
+        candidates[(subject, 'general')] = [
+            CandidateGroup(reason, general_coverage_ids(subject, count, seen_questions, exam_type)),
+            CandidateGroup(reason, question_store.sample_ids(bucket(subject), count * 2, blocked_ids))
+        ]
+    if exam_type:
+        candidates[(None, 'general')] = [
+            CandidateGroup('general_fill', question_store.sample_ids(bucket(), config.total_questions * 2, blocked_ids))
+        ]
+    timings['retrieval_ms'] = round((time.perf_counter() - stage_start) * 1000, 2)
 
-            chapter = question['chapter']
-            if chapter not in chapters_used or len(selected) < count // 2:
-                question['selection_reason'] = 'general_coverage'
-                selected.append(question)
-                chapters_used.add(chapter)
-                exclude_ids.add(question['question_id'])
+    # Stage 3: one bulk hydrate of every candidate
+    stage_start = time.perf_counter()
+    hydrated = {q['question_id']: q for q in get_questions_by_ids(list(dict.fromkeys(
+        question_id for groups in candidates.values() for group in groups for question_id in group.question_ids
+    )))}
+    timings['hydrate_ms'] = round((time.perf_counter() - stage_start) * 1000, 2)
 
-        logger.info(f"Selected {len(selected)} general coverage questions for {subject} (excluded {len(exclude_ids)} seen questions)")
-        return selected[:count]
+    # Stage 4: fill the blueprint in weak topic -> mistake -> coverage order
+    stage_start = time.perf_counter()
+    test_questions = solve_plan(plan, candidates, hydrated.get, blocked_ids)
+    timings['allocate_ms'] = round((time.perf_counter() - stage_start) * 1000, 2)
+    timings['vector_searches'] = 1 if queries else 0
 
-    except Exception as e:
-        logger.warning(f"Error getting general coverage questions: {e}")
-        return []
+    logger.info(f"Selected {len(test_questions)} questions for user {user_id} in stages {timings}")
+    return test_questions, timings
 
 def intelligent_shuffle(questions):
     """Intelligently shuffle questions maintaining difficulty progression"""
@@ -1016,20 +1347,61 @@ def get_user_streak(user_id):
 
 def get_question_by_id(question_id):
     """Get question by ID from memory or database"""
-    # First try from memory
-    for q in all_questions:
-        if q['question_id'] == question_id:
-            return q
+    questions = get_questions_by_ids([question_id])
+    return questions[0] if questions else None
 
-    # Fallback to database
-    try:
-        question = questions_collection.find_one({'question_id': question_id})
-        if question and '_id' in question:
-            del question['_id']
-        return question
-    except Exception as e:
-        logger.warning(f"Error getting question by ID: {e}")
-        return None
+def get_questions_by_ids(question_ids):
+    """Batched lookup by ID from memory, falling back to one database query for misses.
+
+    Returns per-request copies in input order so annotations such as
+    selection_reason never leak into the shared corpus.
+    """
+    found = {q['question_id']: dict(q) for q in question_store.get_many(question_ids)}
+
+    missing = [qid for qid in question_ids if qid not in found]
+    if missing:
+        try:
+            for question in questions_collection.find({'question_id': {'$in': missing}}):
+                question.pop('_id', None)
+                found[question['question_id']] = question
+        except Exception as e:
+            logger.warning(f"Error getting questions by ID: {e}")
+
+    return [found[qid] for qid in dict.fromkeys(question_ids) if qid in found]
+
+def session_question_refs(questions):
+    """Compact question references stored on a test session instead of full question copies"""
+    return {
+        'question_ids': [q['question_id'] for q in questions],
+        'selection_reasons': [q.get('selection_reason', 'unknown') for q in questions],
+        'corpus_version': corpus_version
+    }
+
+def session_questions(test_session):
+    """A session's questions in test order, rehydrated from the question store.
+
+    Entries are None for questions removed from the corpus since the test was
+    generated. Sessions saved before question references keep full copies.
+    """
+    if 'question_ids' not in test_session:
+        return test_session.get('questions', [])
+
+    question_ids = test_session['question_ids']
+    if test_session.get('corpus_version') != corpus_version:
+        logger.info(f"Test {test_session.get('test_id')} was generated from corpus "
+                    f"{test_session.get('corpus_version')}, now {corpus_version}")
+    found = {q['question_id']: q for q in get_questions_by_ids(question_ids)}
+    missing = len(question_ids) - len(found)
+    if missing:
+        logger.warning(f"{missing} questions of test {test_session.get('test_id')} are no longer in the corpus")
+
+    questions = []
+    for question_id, reason in zip(question_ids, test_session.get('selection_reasons') or ['unknown'] * len(question_ids)):
+        question = found.get(question_id)
+        if question is not None:
+            question['selection_reason'] = reason
+        questions.append(question)
+    return questions
 
 # Include the evaluation and profile endpoints from the simple server
 @app.route('/api/evaluate-intelligent-test', methods=['POST'])
@@ -1042,14 +1414,18 @@ def evaluate_intelligent_test():
         user_answers = data.get('answers', [])
 
         # Get test session
-        test_session = db['test_sessions'].find_one({'test_id': test_id})
+        test_session = test_sessions_collection.find_one({'test_id': test_id})
         if not test_session:
             return jsonify({
                 "success": False,
                 "error": "Test session not found"
             }), 404
 
-        questions = test_session['questions']
+        # Answers are positional, so drop the answer of any question that no longer exists
+        answered = [(question, answer) for question, answer in zip(session_questions(test_session), user_answers)
+                    if question is not None]
+        questions = [question for question, _ in answered]
+        user_answers = [answer for _, answer in answered]
 
         # Evaluate with enhanced tracking
         evaluation_result = evaluate_with_intelligence(user_id, questions, user_answers)
@@ -1057,6 +1433,10 @@ def evaluate_intelligent_test():
         # Update user intelligence
         update_user_intelligence(user_id, evaluation_result)
 
+        # Pre-build the next test with the same shape off the request path
+        schedule_next_test(user_id, test_session.get('subjects'),
+                           test_session.get('requested_questions', len(questions)), test_session.get('exam_type'))
+
         return jsonify(evaluation_result), 200
 
     except Exception as e:
@@ -1234,6 +1614,10 @@ def update_user_intelligence(user_id, evaluation_result):
         # Calculate learning velocity (improvement rate)
         learning_velocity = calculate_learning_velocity(user_id, evaluation_result)
 
+        record_seen_questions(
+            user_id, profile, [detail.get('question_id') for detail in evaluation_result.get('detailed_results', [])]
+        )
+
         # Update profile
         profile.update({
             'chapter_performance': existing_chapter_perf,
@@ -1246,11 +1630,7 @@ def update_user_intelligence(user_id, evaluation_result):
         })
 
         # Save updated profile
-        user_profiles_collection.update_one(
-            {'user_id': user_id},
-            {'$set': profile},
-            upsert=True
-        )
+        save_profile(user_id, profile)
 
         # Save test result with intelligence metadata
         test_result = evaluation_result.copy()
@@ -1397,6 +1777,8 @@ def save_test_result():
             'timestamp': datetime.now(timezone.utc)
         }
 
+        # Only scores are stored, no detailed_results, so there are no question
+        # IDs to add to the seen bitmap (a history backfill finds none here either)
         test_results_collection.insert_one(result)
 
         return jsonify({
@@ -1437,61 +1819,42 @@ def generate_intelligent_test_internal(data):
 
         # Get user profile for personalization
         user_profile = user_profiles_collection.find_one({'user_id': user_id})
-
-        questions = []
-
-        for subject in subjects:
-            subject_questions = list(questions_collection.find({
-                'subject': subject
-            }))
-
-            if not subject_questions:
-                # Try with different case
-                subject_questions = list(questions_collection.find({
-                    'subject': {'$regex': f'^{subject}$', '$options': 'i'}
-                }))
-
-            if not subject_questions:
-                logger.warning(f"No questions found for subject: {subject}")
-                continue
-
-            # Intelligent question selection based on user profile
-            if user_profile and user_profile.get('topic_performance'):
-                # Get weak topics for this user
-                topic_performance = user_profile.get('topic_performance', {})
-                weak_topics = [topic for topic, perf in topic_performance.items()
-                               if perf.get('accuracy', 0) < 60 and perf.get('attempts', 0) >= 1]
-
-                # If no specific weak topics yet, use recent poor performance patterns
-                if not weak_topics and user_profile.get('recent_scores'):
-                    recent_scores = user_profile.get('recent_scores', [])
-                    if recent_scores and recent_scores[-1].get('percentage', 100) < 70:
-                        # Focus on topics from recent test if performance was poor
-                        weak_topics = list(topic_performance.keys())[:5] # Take first 5 topics
-
-                # 70% from weak topics, 30% general
-                weak_count = int(question_count * 0.7)
-                general_count = question_count - weak_count
-
-                # Get questions from weak topics
-                weak_questions = [q for q in subject_questions
-                                  if q.get('topic', '').lower() in [t.lower() for t in weak_topics]]
-
-                if weak_questions:
-                    questions.extend(random.sample(weak_questions,
-                                                  min(weak_count, len(weak_questions))))
-
-                # Fill remaining with general questions
-                remaining_needed = question_count - len(questions)
-                if remaining_needed > 0:
-                    general_questions = [q for q in subject_questions if q not in questions]
-                    if general_questions:
-                        questions.extend(random.sample(general_questions,
-                                                      min(remaining_needed, len(general_questions))))
-            else:
-                # No profile data, use random selection
-                questions.extend(random.sample(subject_questions,
-                                              min(question_count, len(subject_questions))))
+        subjects = [normalize_subject(subject) for subject in subjects]
+
+        # Weak topics: per-topic accuracy below 60%, keyed by topic or "Subject:Chapter:Topic"
+        weak_topics = {subject: [] for subject in subjects}
+        if user_profile and user_profile.get('topic_performance'):
+            topic_performance = user_profile.get('topic_performance', {})
+            weak_keys = [topic for topic, perf in topic_performance.items()
+                         if perf.get('accuracy', 0) < 60 and perf.get('attempts', 0) >= 1]
+
+            # If no specific weak topics yet, use recent poor performance patterns
+            if not weak_keys and user_profile.get('recent_scores'):
+                recent_scores = user_profile.get('recent_scores', [])
+                if recent_scores and recent_scores[-1].get('percentage', 100) < 70:
+                    # Focus on topics from recent test if performance was poor
+                    weak_keys = list(topic_performance.keys())[:5] # Take first 5 topics
+
+            weak_keys.sort(key=lambda topic: topic_performance[topic].get('accuracy', 0))
+            for topic_key in weak_keys:
+                parts = topic_key.split(':')
+                for subject in ([parts[0]] if len(parts) == 3 else subjects):
+                    if subject in weak_topics:
+                        weak_topics[subject].append({'topic': parts[-1]})
+
+        # Blueprint: 70% weak topics, the rest general coverage
+        plan = compile_plan(TestConfig(
+            exam_type=data.get('exam_type', ''),
+            subjects=subjects,
+            total_questions=question_count,
+            weak_topic_percentage=0.7,
+            preferred_difficulty=DIFFICULTY_PREFERENCES.get(str(difficulty).lower())
+        ))
+        user_intelligence = {
+            'weak_topics': weak_topics,
+            'seen_questions': get_user_question_history(user_id, user_profile) if user_profile else set()
+        }
+        questions, _ = select_intelligent_test_questions(user_id, plan, user_intelligence)
 
         # Format questions for frontend
         formatted_questions = []
@@ -1511,7 +1874,7 @@ def generate_intelligent_test_internal(data):
                     formatted_options.append(str(opt) if opt else '')
 
             formatted_q = {
-                'id': str(q.get('_id', i)),
+                'id': str(q.get('_id', q.get('question_id', i))),
                 'question': q.get('content', q.get('question', '')),
                 'options': formatted_options, # This should now be strings
                 'correct_answer': q.get('correct_answer', 'A'),
@@ -1681,11 +2044,7 @@ def update_user_profile_intelligent(user_id, topic_performance, score, total_que
         profile['updated_at'] = datetime.now(timezone.utc)
 
         # Upsert profile
-        user_profiles_collection.replace_one(
-            {'user_id': user_id},
-            profile,
-            upsert=True
-        )
+        save_profile(user_id, profile)
 
         logger.info(f"Updated intelligent profile for user {user_id}")
 
@@ -2293,6 +2652,9 @@ def update_user_profile_from_test(user_id, test_result):
             topic_performance[topic_key]['accuracy'] = (correct / attempts) * 100 if attempts > 0 else 0
 
         profile['topic_performance'] = topic_performance
+        record_seen_questions(
+            user_id, profile, [detail.get('question_id') for detail in test_result.get('detailed_results', [])]
+        )
 
         # Update recent scores (keep last 10)
         recent_scores = profile.get('recent_scores', [])
@@ -2307,11 +2669,7 @@ def update_user_profile_from_test(user_id, test_result):
         profile['updated_at'] = datetime.now(timezone.utc)
 
         # Save profile
-        user_profiles_collection.replace_one(
-            {'user_id': user_id},
-            profile,
-            upsert=True
-        )
+        save_profile(user_id, profile)
 
         logger.info(f"Updated profile for user {user_id}")
 
@@ -2556,10 +2914,10 @@ def generate_exam_specific_test():
         
         logger.info(f"🎯 Generating {exam_type} test for user {user_id}")
         
-        # Filter questions by exam type
-        exam_questions = [q for q in all_questions if q.get('exam_type') == exam_type]
+        # Exam bucket from the precomputed index
+        exam_question_ids = question_store.ids_for(exam_type=exam_type)
         
-        if not exam_questions:
+        if not exam_question_ids:
             return jsonify({
                 "success": False,
                 "error": f"No questions available for {exam_type}. Please load questions first."
@@ -2568,60 +2926,31 @@ def generate_exam_specific_test():
         # Get user's question history to avoid repetition
         seen_questions = get_user_question_history(user_id)
         
-        # Filter out seen questions
-        available_questions = [q for q in exam_questions if q['question_id'] not in seen_questions]
-        
-        if len(available_questions) < total_questions:
-            logger.warning(f"Only {len(available_questions)} new questions available for {exam_type}")
-        
-        # Generate test questions in subject blocks (consecutive order)
-        test_questions = []
-        questions_per_subject = total_questions // len(subjects)
-        remaining_questions_for_distribution = total_questions % len(subjects)
+        # Count unseen questions without materialising the filtered list
+        seen_in_exam = sum(1 for qid in seen_questions
+                           if qid in question_store and question_store.get(qid).get('exam_type') == exam_type)
+        available_count = len(exam_question_ids) - seen_in_exam
         
-        # Keep track of selected questions to avoid duplicates
-        selected_question_ids = set()
+        if available_count < total_questions:
+            logger.warning(f"Only {available_count} new questions available for {exam_type}")
         
-        for i, subject in enumerate(subjects):
-            subject_questions = [q for q in available_questions 
-                               if q['subject'] == subject and q['question_id'] not in selected_question_ids]
-            
-            if not subject_questions:
-                logger.warning(f"No {subject} questions available for {exam_type}")
-                continue
-            
-            # Calculate questions for this subject (distribute remaining evenly)
-            subject_question_count = questions_per_subject
-            if i < remaining_questions_for_distribution:
-                subject_question_count += 1
-            
-            # Randomly select questions for this subject
-            selected_count = min(subject_question_count, len(subject_questions))
-            selected_questions = random.sample(subject_questions, selected_count)
-            
-            # Add selection reason and track selected IDs
-            for q in selected_questions:
-                q['selection_reason'] = f'{exam_type.lower()}_{subject.lower()}'
-                selected_question_ids.add(q['question_id'])
-            
-            # Add questions in subject blocks (consecutive order)
-            test_questions.extend(selected_questions)
-        
-        # Fill remaining slots if needed (append to end)
-        if len(test_questions) < total_questions:
-            remaining_slots = total_questions - len(test_questions)
-            remaining_questions = [q for q in available_questions 
-                                 if q['question_id'] not in selected_question_ids]
-            if remaining_questions:
-                additional_questions = random.sample(
-                    remaining_questions, 
-                    min(remaining_slots, len(remaining_questions))
-                )
-                test_questions.extend(additional_questions)
+        # Blueprint: all general coverage, subjects split evenly with the remainder
+        # going to the first ones, topped up exam-wide if a subject runs short
+        plan = compile_plan(TestConfig(
+            exam_type=exam_type,
+            subjects=subjects,
+            total_questions=total_questions,
+            weak_topic_percentage=0.0,
+            difficulty_levels=data.get('difficulty_levels'),
+            question_types=data.get('question_types')
+        ))
+        test_questions, _ = select_intelligent_test_questions(
+            user_id, plan, {'seen_questions': seen_questions}, exam_type=exam_type,
+            general_reason=f'{exam_type.lower()}_{{subject}}'
+        )
         
-        # DO NOT shuffle - keep questions in subject blocks
+        # DO NOT shuffle - solve_plan returns questions in subject blocks
         # The questions are now organized as: [Physics Q1-Q5, Chemistry Q6-Q10, Math Q11-Q15]
-        test_questions = test_questions[:total_questions]
         
         # Create test session
         test_id = f"{exam_type.lower()}_test_{user_id}_{int(datetime.now(timezone.utc).timestamp())}"
@@ -2630,7 +2959,7 @@ def generate_exam_specific_test():
             'test_id': test_id,
             'user_id': user_id,
             'exam_type': exam_type,
-            'questions': test_questions,
+            **session_question_refs(test_questions),
             'total_questions': len(test_questions),
             'subjects': subjects,
             'created_at': datetime.now(timezone.utc),
@@ -2639,7 +2968,7 @@ def generate_exam_specific_test():
         
         # Save test session
         try:
-            db['test_sessions'].insert_one(test_session)
+            test_sessions_collection.insert_one(test_session)
         except Exception as e:
             logger.warning(f"Error saving test session: {e}")
         
@@ -2666,7 +2995,7 @@ def generate_exam_specific_test():
                 "total_questions": len(test_questions),
                 "subjects": subjects,
                 "questions_per_subject": {s: len([q for q in test_questions if q['subject'] == s]) for s in subjects},
-                "available_questions": len(available_questions),
+                "available_questions": available_count,
                 "previously_seen": len(seen_questions)
             }
         }), 200
@@ -2682,28 +3011,13 @@ def generate_exam_specific_test():
 def get_exam_types():
     """Get available exam types and their question counts"""
     try:
-        exam_stats = {}
-        
-        # Count questions by exam type
-        for question in all_questions:
-            exam_type = question.get('exam_type', 'UNKNOWN')
-            if exam_type not in exam_stats:
-                exam_stats[exam_type] = {
-                    'total_questions': 0,
-                    'subjects': {}
-                }
-            
-            exam_stats[exam_type]['total_questions'] += 1
-            
-            subject = question.get('subject', 'Unknown')
-            if subject not in exam_stats[exam_type]['subjects']:
-                exam_stats[exam_type]['subjects'][subject] = 0
-            exam_stats[exam_type]['subjects'][subject] += 1
+        # Counts come straight from the question index
+        exam_stats = question_store.exam_stats()
         
         return jsonify({
             "success": True,
             "exam_types": exam_stats,
-            "total_questions": len(all_questions)
+            "total_questions": len(question_store)
         }), 200
         
     except Exception as e:
@@ -3125,8 +3439,8 @@ def generate_detailed_fallback_suggestions(analysis):
     return suggestions[:3]
 
 if __name__ == '__main__':
-    # Load questions on startup
-    load_and_vectorize_questions()
+    # Load questions in the background; /api/ready reports when they are served
+    threading.Thread(target=warm_question_store, name="question-warmup", daemon=True).start()
     
     # Run the Flask app
     port = int(os.getenv('PORT', 5000))
@@ -0,0 +1,116 @@
+import pytest
+
+from blueprint import CandidateGroup, apportion, compile_plan, solve_plan
+# Aliased so pytest does not try to collect the dataclass as a test class
+from models import TestConfig as Config
+
+def make_questions(n, subject, difficulty='medium', chapter='c0', prefix=None):
+    prefix = prefix or subject[0].lower()
+    return {
+        f"{prefix}{i}": {'question_id': f"{prefix}{i}", 'subject': subject, 'difficulty': difficulty, 'chapter': chapter}
+        for i in range(n)
+    }
+
+def lookup_in(corpus):
+    # solve_plan annotates the questions it picks, so hand out copies like get_questions_by_ids
+    return lambda question_id: dict(corpus[question_id]) if question_id in corpus else None
+
+def test_apportion_largest_remainder_ties_go_to_earlier_keys():
+    assert apportion(10, {'a': 1, 'b': 1, 'c': 1}) == {'a': 4, 'b': 3, 'c': 3}
+    assert apportion(7, {'a': 2, 'b': 1}) == {'a': 5, 'b': 2}
+    assert apportion(0, {'a': 1}) == {'a': 0}
+    assert apportion(5, {'a': 0, 'b': 0}) == {'a': 0, 'b': 0}
+
+def test_compile_plan_rounds_weak_and_mistake_down():
+    plan = compile_plan(Config('JEE_MAIN', ['Physics', 'Chemistry'], 21,
+                                   weak_topic_percentage=0.6, mistake_percentage=0.25))
+    assert plan.quotas == {
+        'Physics': {'weak_topic': 6, 'mistake': 2, 'general': 3},
+        'Chemistry': {'weak_topic': 6, 'mistake': 2, 'general': 2}
+    }
+    assert sum(plan.subject_total(subject) for subject in plan.subjects) == 21
+
+def test_compile_plan_uses_subject_weights():
+    plan = compile_plan(Config('NEET', ['Biology', 'Physics'], 12, subject_weights={'Biology': 2.0}))
+    assert plan.subject_total('Biology') == 8
+    assert plan.subject_total('Physics') == 4
+
+def test_compile_plan_rejects_invalid_configs():
+    with pytest.raises(ValueError):
+        compile_plan(Config('JEE_MAIN', [], 10))
+    with pytest.raises(ValueError):
+        compile_plan(Config('JEE_MAIN', ['Physics'], 10, weak_topic_percentage=0.8, mistake_percentage=0.3))
+
+def test_solve_plan_returns_subject_blocks_in_plan_order():
+    corpus = {**make_questions(10, 'Physics'), **make_questions(10, 'Chemistry')}
+    plan = compile_plan(Config('JEE_MAIN', ['Physics', 'Chemistry'], 6,
+                                   weak_topic_percentage=0.0))
+    candidates = {
+        ('Chemistry', 'general'): [CandidateGroup('general_coverage', [f"c{i}" for i in range(10)])],
+        ('Physics', 'general'): [CandidateGroup('general_coverage', [f"p{i}" for i in range(10)])]
+    }
+    questions = solve_plan(plan, candidates, lookup_in(corpus))
+    assert [q['subject'] for q in questions] == ['Physics'] * 3 + ['Chemistry'] * 3
+
+def test_solve_plan_respects_group_limits_and_quotas():
+    corpus = make_questions(20, 'Physics')
+    plan = compile_plan(Config('JEE_MAIN', ['Physics'], 10, weak_topic_percentage=0.6))
+    candidates = {
+        ('Physics', 'weak_topic'): [
+            CandidateGroup('weak_topic_a', ['p0', 'p1', 'p2', 'p3', 'p4'], limit=3),
+            CandidateGroup('weak_topic_b', ['p5', 'p6', 'p7', 'p8', 'p9'], limit=3)
+        ],
+        ('Physics', 'general'): [CandidateGroup('general_coverage', [f"p{i}" for i in range(20)])]
+    }
+    questions = solve_plan(plan, candidates, lookup_in(corpus))
+    reasons = [q['selection_reason'] for q in questions]
+    assert reasons.count('weak_topic_a') == 3
+    assert reasons.count('weak_topic_b') == 3
+    assert reasons.count('general_coverage') == 4
+    assert [q['question_id'] for q in questions[:6]] == ['p0', 'p1', 'p2', 'p5', 'p6', 'p7']
+
+def test_solve_plan_rolls_shortfall_into_general_then_exam_fill():
+    corpus = {**make_questions(4, 'Physics'), **make_questions(10, 'Chemistry')}
+    plan = compile_plan(Config('JEE_MAIN', ['Physics'], 8, weak_topic_percentage=0.5))
+    candidates = {
+        # Only one weak-topic question exists, so three weak slots fall through to general
+        ('Physics', 'weak_topic'): [CandidateGroup('weak_topic_a', ['p0'])],
+        ('Physics', 'general'): [CandidateGroup('general_coverage', ['p0', 'p1', 'p2', 'p3'])],
+        (None, 'general'): [CandidateGroup('general_fill', [f"c{i}" for i in range(10)])]
+    }
+    questions = solve_plan(plan, candidates, lookup_in(corpus))
+    assert len(questions) == 8
+    assert [q['selection_reason'] for q in questions[:4]] == ['weak_topic_a'] + ['general_coverage'] * 3
+    assert all(q['selection_reason'] == 'general_fill' for q in questions[4:])
+
+def test_solve_plan_skips_excluded_repeated_and_unknown_ids():
+    corpus = make_questions(6, 'Physics')
+    plan = compile_plan(Config('JEE_MAIN', ['Physics'], 4, weak_topic_percentage=0.5))
+    candidates = {
+        ('Physics', 'weak_topic'): [CandidateGroup('weak_topic_a', ['p0', 'missing', 'p1'])],
+        ('Physics', 'general'): [CandidateGroup('general_coverage', ['p0', 'p1', 'p2', 'p3', 'p4', 'p5'])]
+    }
+    questions = solve_plan(plan, candidates, lookup_in(corpus), exclude_ids={'p0', 'p2'})
+    assert [q['question_id'] for q in questions] == ['p1', 'p3', 'p4', 'p5']
+
+def test_solve_plan_applies_difficulty_question_type_and_chapter_filters():
+    corpus = {
+        **make_questions(3, 'Physics', difficulty='easy', prefix='e'),
+        **make_questions(3, 'Physics', difficulty='Hard', prefix='h'),
+        **make_questions(3, 'Physics', difficulty='hard', chapter='c1', prefix='x')
+    }
+    corpus['h2']['question_type'] = 'integer'
+    plan = compile_plan(Config('JEE_MAIN', ['Physics'], 5, weak_topic_percentage=0.0,
+                                   difficulty_levels=['hard'], question_types=['mcq'], chapters=['c0']))
+    candidates = {('Physics', 'general'): [CandidateGroup('general_coverage', list(corpus))]}
+    questions = solve_plan(plan, candidates, lookup_in(corpus))
+    assert [q['question_id'] for q in questions] == ['h0', 'h1']
+
+def test_preferred_difficulty_ranks_first_without_filtering():
+    corpus = {**make_questions(3, 'Physics', difficulty='easy'),
+              **make_questions(10, 'Physics', prefix='m')}
+    plan = compile_plan(Config('JEE_MAIN', ['Physics'], 6, weak_topic_percentage=0.0, preferred_difficulty='easy'))
+    candidates = {('Physics', 'general'): [CandidateGroup('general_coverage', [f"m{i}" for i in range(10)] + ['p0', 'p1', 'p2'])]}
+    questions = solve_plan(plan, candidates, lookup_in(corpus))
+    assert [q['question_id'] for q in questions[:3]] == ['p0', 'p1', 'p2']
+    assert len(questions) == 6
@@ -0,0 +1,49 @@
+from collection_stats import CollectionStats
+
+def question(subject, topic, chapter='c1', difficulty='medium'):
+    return {'subject': subject, 'topic': topic, 'chapter': chapter, 'difficulty': difficulty}
+
+def test_add_and_remove_track_distinct_values(tmp_path):
+    stats = CollectionStats(str(tmp_path / 'stats.json'))
+    stats.add('JEE_MAIN', [question('Physics', 'Optics'), question('Physics', 'Waves'), question('Chemistry', 'Atoms', difficulty='hard')])
+    assert stats.total('JEE_MAIN') == 3
+    assert stats.summary('JEE_MAIN') == {
+        'total_questions': 3,
+        'subjects': ['Chemistry', 'Physics'],
+        'topics': ['Atoms', 'Optics', 'Waves'],
+        'chapters': ['c1'],
+        'difficulties': ['hard', 'medium'],
+    }
+
+    stats.remove('JEE_MAIN', [question('Chemistry', 'Atoms', difficulty='hard')])
+    summary = stats.summary('JEE_MAIN')
+    assert summary['subjects'] == ['Physics'] and summary['difficulties'] == ['medium']
+    assert summary['total_questions'] == 2
+
+def test_remove_never_goes_below_zero(tmp_path):
+    stats = CollectionStats(str(tmp_path / 'stats.json'))
+    stats.remove('NEET', [question('Biology', 'Cells')])
+    assert stats.total('NEET') == 0
+    assert stats.summary('NEET')['subjects'] == []
+
+def test_reset_replaces_only_that_exam(tmp_path):
+    stats = CollectionStats(str(tmp_path / 'stats.json'))
+    stats.add('JEE_MAIN', [question('Physics', 'Optics')] * 4)
+    stats.add('NEET', [question('Biology', 'Cells')])
+    stats.reset('JEE_MAIN', [question('Chemistry', 'Atoms')])
+    assert stats.summary('JEE_MAIN')['subjects'] == ['Chemistry']
+    assert stats.total('JEE_MAIN') == 1
+    assert stats.total('NEET') == 1
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'vector_db' / 'stats.json')
+    stats = CollectionStats(path)
+    stats.add('JEE_MAIN', [question('Physics', 'Optics'), question('Physics', 'Optics')])
+    stats.save()
+
+    loaded = CollectionStats(path)
+    assert loaded.load()
+    assert loaded.summary('JEE_MAIN') == stats.summary('JEE_MAIN')
+    loaded.remove('JEE_MAIN', [question('Physics', 'Optics')])
+    assert loaded.summary('JEE_MAIN')['topics'] == ['Optics']
+    assert not CollectionStats(str(tmp_path / 'missing.json')).load()
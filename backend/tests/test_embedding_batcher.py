@@ -0,0 +1,36 @@
+from concurrent.futures import TimeoutError
+import threading
+
+import numpy as np
+import pytest
+
+from embedding_batcher import EmbeddingBatcher
+
+def test_encodes_each_callers_rows():
+    batcher = EmbeddingBatcher(lambda texts: [[len(text), 0.0] for text in texts])
+    assert batcher.encode(['a', 'bbb']).tolist() == [[1.0, 0.0], [3.0, 0.0]]
+    assert batcher.stats()['batches'] == 1
+
+def test_encode_failure_reaches_every_caller():
+    def fail(texts):
+        raise ValueError('model unavailable')
+    batcher = EmbeddingBatcher(fail)
+    with pytest.raises(ValueError):
+        batcher.encode(['a'])
+
+def test_bad_encoder_output_does_not_kill_the_worker():
+    calls = []
+    def encode(texts):
+        calls.append(texts)
+        return np.zeros((0, 2)) if len(calls) == 1 else np.ones((len(texts), 2))
+    batcher = EmbeddingBatcher(encode)
+    with pytest.raises(IndexError):
+        batcher.encode(['a'])
+    assert batcher.encode(['b']).shape == (1, 2)
+
+def test_encode_times_out_on_a_stuck_encoder():
+    release = threading.Event()
+    batcher = EmbeddingBatcher(lambda texts: release.wait() and np.ones((len(texts), 2)), timeout=0.05)
+    with pytest.raises(TimeoutError):
+        batcher.encode(['a'])
+    release.set()
@@ -0,0 +1,60 @@
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+import pytest
+
+from embedding_store import EmbeddingStore
+from vector_db import VectorDBManager
+
+def blocking_model(monkeypatch, release, dim=8):
+    """Stand-in sentence_transformers whose model only finishes loading once release is set"""
+    class SentenceTransformer:
+        def __init__(self, model_name):
+            release.wait()
+
+        def get_sentence_embedding_dimension(self):
+            return dim
+
+        def encode(self, texts, batch_size=32):
+            return np.ones((len(texts), dim), dtype=np.float32)
+
+    monkeypatch.setitem(sys.modules, 'sentence_transformers', types.SimpleNamespace(SentenceTransformer=SentenceTransformer))
+
+def test_store_round_trip_and_recorded_dimension(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 'model/a', 4)
+    assert store.put_many(['h1', 'h2'], np.arange(8, dtype=np.float32).reshape(2, 4)) == 2
+    assert store.put_many(['h1'], np.zeros((1, 4))) == 0
+    assert EmbeddingStore.stored_dim(str(tmp_path), 'model/a') == 4
+    assert EmbeddingStore.stored_dim(str(tmp_path), 'model/b') is None
+
+    reopened = EmbeddingStore(str(tmp_path), 'model/a', 4)
+    assert len(reopened) == 2
+    assert reopened.get_many(['h2', 'missing'])['h2'].tolist() == [4.0, 5.0, 6.0, 7.0]
+
+def test_store_rejects_another_dimension(tmp_path):
+    EmbeddingStore(str(tmp_path), 'model', 4)
+    with pytest.raises(ValueError):
+        EmbeddingStore(str(tmp_path), 'model', 8)
+
+def test_lazy_manager_on_an_empty_db_does_not_wait_for_the_model(tmp_path, monkeypatch):
+    release = threading.Event()
+    blocking_model(monkeypatch, release)
+    start = time.monotonic()
+    manager = VectorDBManager(str(tmp_path / 'db'), lazy_model=True, model_wait_seconds=30)
+    assert time.monotonic() - start < 10
+    assert manager.embedding_store is None
+
+    release.set()
+    assert manager.wait_for_model(10)
+    assert manager.embedding_store is not None and manager.embedding_store.dim == 8
+
+def test_lazy_manager_reopens_the_store_from_its_metadata(tmp_path, monkeypatch):
+    EmbeddingStore(str(tmp_path / 'db' / 'embedding_cache'), 'all-MiniLM-L6-v2', 8)
+    release = threading.Event()
+    blocking_model(monkeypatch, release)
+    manager = VectorDBManager(str(tmp_path / 'db'), lazy_model=True)
+    assert manager.embedding_store is not None and manager.embedding_store.dim == 8
+    release.set()
@@ -0,0 +1,34 @@
+import numpy as np
+
+from neighbor_table import NeighborTable
+
+def line_table(k=3):
+    # Points on a line: each question's nearest neighbours are its closest positions in the same subject
+    positions = [0.0, 1.0, 3.0, 6.0, 0.5, 2.0]
+    groups = ['Physics', 'Physics', 'Physics', 'Physics', 'Chemistry', 'Chemistry']
+    ids = [f"q{i}" for i in range(len(positions))]
+    vectors = np.array([[p, 0.0] for p in positions], dtype=np.float32)
+    return NeighborTable.build(ids, vectors, groups, k=k, block_rows=2)
+
+def test_build_orders_neighbours_within_the_subject():
+    table = line_table()
+    assert table.k == 3 and len(table) == 6
+    assert table.similar('q0', 5) == ['q1', 'q2', 'q3']
+    assert table.similar('q2', 5) == ['q1', 'q0', 'q3']
+    # Small groups are padded, and other subjects never appear
+    assert table.similar('q4', 5) == ['q5']
+
+def test_similar_skips_excluded_and_unknown_ids():
+    table = line_table()
+    assert table.similar('q0', 2, exclude_ids={'q1'}) == ['q2', 'q3']
+    assert table.similar('q0', 0) == []
+    assert table.similar('missing', 3) == []
+
+def test_save_and_load_round_trip(tmp_path):
+    table = line_table()
+    path = str(tmp_path / 'neighbors' / 'physics.npz')
+    table.save(path)
+    loaded = NeighborTable.load(path)
+    assert loaded.ids == table.ids
+    assert np.array_equal(loaded.neighbors, table.neighbors)
+    assert NeighborTable.load(str(tmp_path / 'missing.npz')) is None
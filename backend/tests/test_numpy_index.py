@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from numpy_index import NumpyVectorIndex, mmr_select
+
+DIM = 16
+
+def corpus(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"q{i}" for i in range(n)]
+    documents = [f"doc {i}" for i in range(n)]
+    metadatas = [{'subject': 'Physics' if i % 2 else 'Chemistry', 'chapter': f'c{i % 5}'} for i in range(n)]
+    return ids, vectors, documents, metadatas
+
+def brute_force(vectors, query, rows, k):
+    distances = ((vectors[rows] - query) ** 2).sum(axis=1)
+    return [rows[i] for i in np.argsort(distances, kind='stable')[:k]]
+
+def test_float32_search_is_exact_with_filters_and_exclusions():
+    ids, vectors, documents, metadatas = corpus()
+    index = NumpyVectorIndex(DIM, initial_capacity=16)
+    index.add(ids, vectors, documents, metadatas)
+    query = vectors[7] + 0.1
+
+    physics = [i for i in range(len(ids)) if i % 2]
+    hits = index.search([query], 10, filters={'subject': 'Physics'}, exclude_ids=[{'q7'}])[0]
+    expected = [f"q{row}" for row in brute_force(vectors, query, [row for row in physics if row != 7], 10)]
+    assert [hit['question_id'] for hit in hits] == expected
+    assert hits[0]['distance'] == pytest.approx(float(((vectors[int(expected[0][1:])] - query) ** 2).sum()), abs=1e-4)
+    assert index.search([query], 5, filters={'subject': 'Biology'}) == [[]]
+
+@pytest.mark.parametrize('storage', ['float16', 'int8'])
+def test_quantized_storage_re_ranks_to_the_exact_order(storage):
+    ids, vectors, documents, metadatas = corpus()
+    exact_of = dict(zip(documents, vectors))
+    index = NumpyVectorIndex(DIM, storage=storage, rerank_vectors=lambda docs: [exact_of.get(doc) for doc in docs])
+    index.add(ids, vectors, documents, metadatas)
+
+    for row in (3, 50, 121):
+        query = vectors[row] * 0.9 + vectors[row + 1] * 0.1
+        hits = index.search([query], 8)[0]
+        assert [hit['question_id'] for hit in hits] == [f"q{r}" for r in brute_force(vectors, query, list(range(len(ids))), 8)]
+        exact = ((vectors[int(hits[0]['question_id'][1:])] - query) ** 2).sum()
+        assert hits[0]['distance'] == pytest.approx(float(exact), abs=1e-5)
+
+def test_quantized_storage_without_rerank_vectors_stays_close():
+    ids, vectors, documents, metadatas = corpus()
+    index = NumpyVectorIndex(DIM, storage='int8')
+    index.add(ids, vectors, documents, metadatas)
+    hits = index.search([vectors[10]], 5)[0]
+    assert hits[0]['question_id'] == 'q10'
+    assert index.nbytes < NumpyVectorIndex(DIM, storage='float32').nbytes
+
+def test_remove_overwrite_and_get():
+    ids, vectors, documents, metadatas = corpus(20)
+    index = NumpyVectorIndex(DIM)
+    index.add(ids, vectors, documents, metadatas)
+    assert index.remove(['q0', 'q1', 'missing']) == 2
+    assert len(index) == 18 and 'q0' not in index
+    index.add(['q2'], [vectors[3]], ['moved'], [{'subject': 'Physics'}])
+    assert len(index) == 18
+    assert index.search([vectors[3]], 2)[0][0]['distance'] == pytest.approx(0.0, abs=1e-5)
+    assert [hit['question_id'] for hit in index.get(3, exclude_ids={'q3'})] == ['q2', 'q4', 'q5']
+
+def test_mmr_prefers_diverse_candidates():
+    query = np.array([1.0, 0.0], dtype=np.float32)
+    candidates = np.array([[1.0, 0.0], [0.99, 0.01], [0.7, 0.7]], dtype=np.float32)
+    assert mmr_select(query, candidates, 2, diversity=0.0) == [0, 1]
+    assert mmr_select(query, candidates, 2, diversity=0.8) == [0, 2]
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from pregeneration import PregeneratedTests
+
+def wait_idle(cache, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while cache.stats()['pending'] and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert not cache.stats()['pending']
+
+def test_serves_a_matching_test_once():
+    cache = PregeneratedTests(ttl_seconds=60)
+    cache.schedule('u1', 'key', 3, lambda: {'questions': ['q1']})
+    wait_idle(cache)
+    assert cache.take('u1', 'key', 3) == {'questions': ['q1']}
+    assert cache.take('u1', 'key', 3) is None
+    assert cache.stats()['hits'] == 1
+
+def test_rejects_other_profile_versions_and_requests():
+    cache = PregeneratedTests(ttl_seconds=60)
+    cache.schedule('u1', 'key', 3, lambda: {'questions': []})
+    wait_idle(cache)
+    assert cache.take('u1', 'key', 4) is None
+    cache.schedule('u1', 'key', 3, lambda: {'questions': []})
+    wait_idle(cache)
+    assert cache.take('u1', 'other-key', 3) is None
+    assert cache.stats()['stale'] == 2
+
+def test_expires_after_ttl():
+    cache = PregeneratedTests(ttl_seconds=0.01)
+    cache.schedule('u1', 'key', 1, lambda: {'questions': []})
+    wait_idle(cache)
+    time.sleep(0.02)
+    assert cache.take('u1', 'key', 1) is None
+    assert cache.stats()['expired'] == 1
+
+def test_invalidate_drops_the_cached_test():
+    cache = PregeneratedTests(ttl_seconds=60)
+    cache.schedule('u1', 'key', 1, lambda: {'questions': []})
+    wait_idle(cache)
+    cache.invalidate('u1')
+    assert cache.take('u1', 'key', 1) is None
+
+def test_request_during_a_build_queues_behind_it_and_wins():
+    cache = PregeneratedTests(ttl_seconds=60)
+    release = threading.Event()
+    builds = []
+
+    def slow_build():
+        builds.append('first')
+        release.wait(5)
+        return {'questions': ['old']}
+
+    def second_build():
+        builds.append('second')
+        return {'questions': ['new']}
+
+    def third_build():
+        builds.append('third')
+        return {'questions': ['newest']}
+
+    assert cache.schedule('u1', 'key', 1, slow_build)
+    assert not cache.schedule('u1', 'key', 2, second_build)
+    # A later request replaces the one already queued
+    assert not cache.schedule('u1', 'key', 3, third_build)
+    release.set()
+    wait_idle(cache)
+
+    assert builds == ['first', 'third']
+    assert cache.take('u1', 'key', 3) == {'questions': ['newest']}
+
+def test_failed_build_caches_nothing():
+    cache = PregeneratedTests(ttl_seconds=60)
+
+    def failing_build():
+        raise RuntimeError("model not ready")
+
+    cache.schedule('u1', 'key', 1, failing_build)
+    wait_idle(cache)
+    assert cache.stats()['failed'] == 1
+    assert cache.take('u1', 'key', 1) is None
+
+def test_evicts_oldest_entry_when_full():
+    cache = PregeneratedTests(ttl_seconds=60, max_entries=2)
+    for user_id in ('u1', 'u2', 'u3'):
+        cache.schedule(user_id, 'key', 1, lambda: {'questions': []})
+        wait_idle(cache)
+    assert cache.take('u1', 'key', 1) is None
+    assert cache.take('u3', 'key', 1) is not None
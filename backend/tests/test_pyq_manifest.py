@@ -0,0 +1,38 @@
+import json
+
+from pyq_ingestion import diff_pyq_manifest, discover_pyq_files
+
+def write(path, questions):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps([{'questions': questions}]))
+
+def manifest_from(diff):
+    return {rel_path: {'content_hash': info['content_hash']} for rel_path, info in diff['files'].items()}
+
+def test_discovery_is_sorted_and_skips_other_files(tmp_path):
+    write(tmp_path / 'jee_main' / 'b.json', [])
+    write(tmp_path / 'jee_main' / 'a.json', [])
+    write(tmp_path / 'neet' / 'a.json', [])
+    (tmp_path / 'jee_main' / 'notes.txt').write_text('not a pyq file')
+    files = discover_pyq_files(str(tmp_path))
+    assert [(path[len(str(tmp_path)) + 1:], exam) for path, exam in files] == [
+        ('jee_main/a.json', 'JEE_MAIN'), ('jee_main/b.json', 'JEE_MAIN'), ('neet/a.json', 'NEET')
+    ]
+
+def test_diff_classifies_added_changed_unchanged_and_removed(tmp_path):
+    write(tmp_path / 'jee_main' / 'a.json', [{'question': 'a'}])
+    write(tmp_path / 'jee_main' / 'b.json', [{'question': 'b'}])
+    write(tmp_path / 'neet' / 'c.json', [{'question': 'c'}])
+    first = diff_pyq_manifest(str(tmp_path), discover_pyq_files(str(tmp_path)), {})
+    assert first['added'] == ['jee_main/a.json', 'jee_main/b.json', 'neet/c.json']
+    assert first['changed'] == first['unchanged'] == first['removed'] == []
+
+    write(tmp_path / 'jee_main' / 'b.json', [{'question': 'b, edited'}])
+    (tmp_path / 'neet' / 'c.json').unlink()
+    write(tmp_path / 'neet' / 'd.json', [{'question': 'd'}])
+    second = diff_pyq_manifest(str(tmp_path), discover_pyq_files(str(tmp_path)), manifest_from(first))
+    assert second['added'] == ['neet/d.json']
+    assert second['changed'] == ['jee_main/b.json']
+    assert second['unchanged'] == ['jee_main/a.json']
+    assert second['removed'] == ['neet/c.json']
+    assert second['files']['jee_main/a.json']['content_hash'] == first['files']['jee_main/a.json']['content_hash']
@@ -0,0 +1,37 @@
+import random
+
+from question_store import QuestionStore
+
+def make_corpus():
+    return [
+        {'question_id': f'q{i}', 'exam_type': 'JEE_MAIN' if i < 6 else 'NEET',
+         'subject': 'Physics' if i % 2 else 'Chemistry', 'chapter': f'c{i % 3}', 'topic': f't{i % 2}'}
+        for i in range(10)
+    ]
+
+def test_lookups_skip_unknown_ids_and_duplicates():
+    store = QuestionStore(make_corpus() + [{'question_id': 'q1', 'subject': 'Duplicate'}])
+    assert len(store) == 10
+    assert store.get('q3')['subject'] == 'Physics'
+    assert store.get('missing') is None
+    assert [q['question_id'] for q in store.get_many(['q4', 'missing', 'q0'])] == ['q4', 'q0']
+    assert 'q9' in store and 'q10' not in store
+
+def test_buckets_by_exam_subject_chapter_and_topic():
+    store = QuestionStore(make_corpus())
+    assert store.ids_for(exam_type='NEET') == ['q6', 'q7', 'q8', 'q9']
+    assert store.ids_for(exam_type='JEE_MAIN', subject='Physics') == ['q1', 'q3', 'q5']
+    assert sorted(store.ids_for(subject='Chemistry', chapter='c0')) == ['q0', 'q6']
+    assert sorted(store.ids_for(exam_type='JEE_MAIN', topic='t1')) == ['q1', 'q3', 'q5']
+    assert sorted(store.chapters_for('Physics', exam_type='NEET')) == ['c0', 'c1']
+    assert store.exam_stats()['NEET'] == {'total_questions': 4, 'subjects': {'Chemistry': 2, 'Physics': 2}}
+
+def test_sample_ids_respects_exclusions_in_both_regimes():
+    random.seed(3)
+    bucket = [f'q{i}' for i in range(100)]
+    sparse = QuestionStore.sample_ids(bucket, 20, {'q1', 'q2'})
+    assert len(sparse) == len(set(sparse)) == 20 and not {'q1', 'q2'} & set(sparse)
+
+    dense_exclusions = {f'q{i}' for i in range(95)}
+    assert sorted(QuestionStore.sample_ids(bucket, 10, dense_exclusions)) == ['q95', 'q96', 'q97', 'q98', 'q99']
+    assert QuestionStore.sample_ids([], 5) == []
@@ -0,0 +1,46 @@
+from seen_questions import SeenBitmap, SeenIdCache
+
+class FakeOrdinals:
+    def __init__(self):
+        self.decodes = 0
+
+    def ids_for(self, ordinals):
+        self.decodes += 1
+        return [f'q{ordinal}' for ordinal in ordinals]
+
+def bitmap_bytes(ordinals):
+    bitmap = SeenBitmap()
+    bitmap.add(ordinals)
+    return bitmap.to_bytes()
+
+def test_bitmap_round_trip():
+    bitmap = SeenBitmap(bitmap_bytes([0, 7, 8, 300]))
+    assert list(bitmap.ordinals()) == [0, 7, 8, 300]
+    assert 300 in bitmap and 301 not in bitmap
+    assert len(bitmap) == 4
+
+def test_cache_reuses_decoded_set_until_version_changes():
+    ordinals = FakeOrdinals()
+    cache = SeenIdCache(ordinals)
+    data = bitmap_bytes([1, 5])
+    seen = cache.get('u1', data, 3)
+    assert seen == {'q1', 'q5'}
+    assert cache.get('u1', data, 3) is seen
+    assert ordinals.decodes == 1
+    assert cache.get('u1', data, 4) == seen
+    assert cache.get('u1', bitmap_bytes([1, 5, 9]), 4) == {'q1', 'q5', 'q9'}
+    assert ordinals.decodes == 3
+
+def test_cache_evicts_least_recently_used_user():
+    ordinals = FakeOrdinals()
+    cache = SeenIdCache(ordinals, max_users=2)
+    data = bitmap_bytes([2])
+    cache.get('u1', data, 1)
+    cache.get('u2', data, 1)
+    cache.get('u1', data, 1)
+    cache.get('u3', data, 1)
+    assert ordinals.decodes == 3
+    cache.get('u1', data, 1)
+    assert ordinals.decodes == 3
+    cache.get('u2', data, 1)
+    assert ordinals.decodes == 4
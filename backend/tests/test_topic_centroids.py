@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from topic_centroids import TopicCentroids
+
+def jee_centroids():
+    vectors = np.array([[1, 0], [3, 0], [0, 4], [0, 2], [9, 9]], dtype=np.float32)
+    metadatas = [
+        {'subject': 'Physics', 'chapter': 'Optics', 'topic': 'Lenses'},
+        {'subject': 'Physics', 'chapter': 'Optics', 'topic': 'Lenses'},
+        {'subject': 'Physics', 'chapter': 'Optics', 'topic': 'Mirrors'},
+        {'subject': 'Physics', 'chapter': 'Waves', 'topic': 'Sound'},
+        {'subject': 'Chemistry', 'chapter': 'Atoms', 'topic': 'Shells'},
+    ]
+    return TopicCentroids.build('JEE_MAIN', vectors, metadatas)
+
+def test_build_averages_each_topic():
+    centroids = jee_centroids()
+    assert len(centroids) == 4
+    assert centroids.centroid('JEE_MAIN', 'Physics', 'Optics', 'Lenses') == pytest.approx([2.0, 0.0])
+    assert centroids.centroid('JEE_MAIN', 'Physics', 'Optics', 'Unknown') is None
+    assert centroids.centroid('NEET', 'Physics') is None
+
+def test_chapter_and_subject_centroids_are_count_weighted():
+    centroids = jee_centroids()
+    # Lenses holds two questions, so it outweighs Mirrors
+    assert centroids.centroid('JEE_MAIN', 'Physics', 'Optics') == pytest.approx([4 / 3, 4 / 3])
+    assert centroids.centroid('JEE_MAIN', 'Physics') == pytest.approx([1.0, 1.5])
+
+def test_merge_spans_exams():
+    neet = TopicCentroids.build('NEET', np.array([[0, 0], [2, 2]], dtype=np.float32),
+                                [{'subject': 'Physics', 'chapter': 'Optics', 'topic': 'Lenses'}] * 2)
+    merged = TopicCentroids.merge([jee_centroids(), TopicCentroids.build('EMPTY', np.zeros((0, 2)), []), neet])
+    assert len(merged) == 5
+    assert merged.centroid('NEET', 'Physics') == pytest.approx([1.0, 1.0])
+    assert merged.centroid(['JEE_MAIN', 'NEET'], 'Physics', 'Optics', 'Lenses') == pytest.approx([1.5, 0.5])
+    assert merged.centroid(None, 'Chemistry') == pytest.approx([9.0, 9.0])
+    assert len(TopicCentroids.merge([])) == 0
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'centroids.npz')
+    jee_centroids().save(path)
+    loaded = TopicCentroids.load(path)
+    assert loaded.keys == jee_centroids().keys
+    assert loaded.centroid('JEE_MAIN', 'Physics', 'Optics') == pytest.approx([4 / 3, 4 / 3])
+    assert TopicCentroids.load(str(tmp_path / 'missing.npz')) is None
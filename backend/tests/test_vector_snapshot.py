@@ -0,0 +1,59 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from vector_db import VectorDBManager
+
+def unavailable_model(monkeypatch):
+    """Stand-in sentence_transformers whose model never loads"""
+    def SentenceTransformer(model_name):
+        raise OSError(f"{model_name} is not available offline")
+    monkeypatch.setitem(sys.modules, 'sentence_transformers', types.SimpleNamespace(SentenceTransformer=SentenceTransformer))
+
+def fill(manager, exam_type, n, dim=8):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    manager.collections[exam_type].add(
+        ids=[f"{exam_type}_{i}" for i in range(n)],
+        embeddings=vectors.tolist(),
+        documents=[f"question {i}" for i in range(n)],
+        metadatas=[{'subject': 'Physics' if i % 2 else 'Chemistry', 'chapter': f'c{i % 3}', 'topic': f't{i % 4}'}
+                   for i in range(n)]
+    )
+    return vectors
+
+def test_snapshot_round_trip_into_a_replica_without_the_model(tmp_path, monkeypatch):
+    unavailable_model(monkeypatch)
+    source = VectorDBManager(str(tmp_path / 'source'), lazy_model=True, model_wait_seconds=1)
+    vectors = fill(source, 'NEET', 12)
+    header = source.export_snapshot(str(tmp_path / 'snapshot.bin'))
+    assert header['dim'] == 8 and header['counts']['NEET'] == 12
+
+    replica = VectorDBManager(str(tmp_path / 'replica'), lazy_model=True, model_wait_seconds=1)
+    assert not replica.wait_for_model(5)
+    assert replica.embedding_store is None
+
+    report = replica.import_snapshot(str(tmp_path / 'snapshot.bin'))
+    assert report['counts']['NEET'] == 12
+    stored = replica.collections['NEET'].get(ids=['NEET_3'], include=['embeddings', 'documents', 'metadatas'])
+    assert stored['documents'] == ['question 3']
+    assert stored['metadatas'][0]['chapter'] == 'c0'
+    assert np.allclose(stored['embeddings'][0], vectors[3], atol=1e-6)
+
+    # The snapshot seeds the embedding store and the precomputed tables without encoding anything
+    assert replica.embedding_store is not None and len(replica.embedding_store) == 12
+    assert 'NEET' in replica.neighbor_tables
+
+def test_import_rejects_a_snapshot_of_another_model(tmp_path, monkeypatch):
+    unavailable_model(monkeypatch)
+    source = VectorDBManager(str(tmp_path / 'source'), lazy_model=True, model_wait_seconds=1,
+                             model_name='another-model')
+    fill(source, 'NEET', 4)
+    source.export_snapshot(str(tmp_path / 'snapshot.bin'))
+
+    replica = VectorDBManager(str(tmp_path / 'replica'), lazy_model=True, model_wait_seconds=1)
+    with pytest.raises(ValueError):
+        replica.import_snapshot(str(tmp_path / 'snapshot.bin'))
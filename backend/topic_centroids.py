@@ -0,0 +1,109 @@
+"""
+Topic Centroid Embeddings
+Mean embedding of the questions in every (exam, subject, chapter, topic)
+bucket, computed at ingest. Weak-topic retrieval searches around a centroid
+instead of embedding a short "subject topic" string at request time, so the
+query vector is fixed per corpus version and needs no model forward pass.
+
+Stored as one .npz with the four key columns, the float32 centroids and the
+member counts used to combine buckets into chapter or subject centroids.
+"""
+
+import os
+import logging
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CentroidKey = Tuple[str, str, str, str]
+
+class TopicCentroids:
+    """Centroid vectors per (exam, subject, chapter, topic) with member counts"""
+
+    def __init__(self, keys: List[CentroidKey], centroids: np.ndarray, counts: np.ndarray):
+        self.keys = [tuple(key) for key in keys]
+        self.centroids = centroids
+        self.counts = counts
+        # (exam, subject) -> rows, so chapter / topic lookups scan one subject
+        self._rows_by_subject: Dict[Tuple[str, str], List[int]] = {}
+        for row, (exam_type, subject, _, _) in enumerate(self.keys):
+            self._rows_by_subject.setdefault((exam_type, subject), []).append(row)
+        self._exam_types = sorted({key[0] for key in self.keys})
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, exam_type: str, vectors, metadatas: List[Dict[str, Any]]) -> "TopicCentroids":
+        """Average the vectors of each subject / chapter / topic bucket of one exam"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows_by_key: Dict[CentroidKey, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            key = (exam_type, metadata.get('subject', ''), metadata.get('chapter', ''), metadata.get('topic', ''))
+            rows_by_key.setdefault(key, []).append(row)
+
+        keys = list(rows_by_key)
+        centroids = np.zeros((len(keys), vectors.shape[1] if vectors.ndim == 2 else 0), dtype=np.float32)
+        counts = np.zeros(len(keys), dtype=np.int32)
+        for i, key in enumerate(keys):
+            rows = rows_by_key[key]
+            centroids[i] = vectors[rows].mean(axis=0)
+            counts[i] = len(rows)
+        return cls(keys, centroids, counts)
+
+    @classmethod
+    def merge(cls, parts: List["TopicCentroids"]) -> "TopicCentroids":
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls([], np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int32))
+        return cls(
+            [key for part in parts for key in part.keys],
+            np.concatenate([part.centroids for part in parts]),
+            np.concatenate([part.counts for part in parts])
+        )
+
+    def centroid(self, exam_type: Union[str, Sequence[str], None], subject: str, chapter: str = None,
+                 topic: str = None) -> Optional[np.ndarray]:
+        """Count-weighted centroid of the matching buckets.
+
+        exam_type may be one exam or several; None means any exam, and a None
+        chapter / topic means any chapter / topic.
+        """
+        if isinstance(exam_type, str):
+            exam_types = [exam_type]
+        else:
+            exam_types = list(exam_type) if exam_type else self._exam_types
+        rows = [
+            row for exam in exam_types for row in self._rows_by_subject.get((exam, subject), [])
+            if (chapter is None or self.keys[row][2] == chapter)
+            and (topic is None or self.keys[row][3] == topic)
+        ]
+        if not rows:
+            return None
+        weights = self.counts[rows].astype(np.float32)
+        return (self.centroids[rows] * weights[:, None]).sum(axis=0) / weights.sum()
+
+    def save(self, path: str) -> None:
+        """Write atomically so readers never see a partial file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp.npz"
+        np.savez(
+            temp_path,
+            keys=np.asarray(self.keys, dtype=str).reshape(-1, 4),
+            centroids=self.centroids,
+            counts=self.counts
+        )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["TopicCentroids"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls([tuple(key) for key in data['keys'].tolist()], data['centroids'], data['counts'])
+        except Exception as e:
+            logger.warning(f"Could not load topic centroids {path}: {e}")
+            return None
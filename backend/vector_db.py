@@ -1,17 +1,57 @@
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 import uuid
 import os
+import time
 import hashlib
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Set, Sequence, Union
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from models import Question
+from embedding_store import EmbeddingStore, EmbeddingLRUCache
+from embedding_batcher import EmbeddingBatcher
+from numpy_index import NumpyVectorIndex, mmr_select
+from neighbor_table import NeighborTable
+from topic_centroids import TopicCentroids
+from lexical_index import BM25Index
+from collection_stats import CollectionStats
+from index_snapshot import write_snapshot, read_snapshot
 
 class VectorDBManager:
-    def __init__(self, db_path: str = "./chroma_db"):
-        """Initialize ChromaDB client and embedding model with optimized settings"""
+    def __init__(self, db_path: str = "./chroma_db", embed_batch_size: int = 64, write_batch_size: int = 1000,
+                 model_name: str = 'all-MiniLM-L6-v2', embedding_store_path: str = None,
+                 embedding_cache_bytes: int = 64 * 1024 * 1024, search_backend: str = "chroma",
+                 index_storage: str = "float32", search_workers: int = 4, embed_max_wait_ms: float = 5.0,
+                 lazy_model: bool = False, model_wait_seconds: float = 60.0):
+        """Initialize ChromaDB client and embedding model with optimized settings.
+
+        search_backend "chroma" queries Chroma directly; "numpy" serves searches
+        from in-memory NumpyVectorIndex matrices loaded from (and kept in step
+        with) the Chroma collections, which remain the persistent store.
+        index_storage ("float32", "float16" or "int8") sets how those matrices
+        hold vectors; quantized indexes re-rank against the embedding store.
+        search_workers threads fan searches out across exam collections.
+        Small encodes from concurrent callers are coalesced for up to
+        embed_max_wait_ms into one batched forward pass.
+
+        With lazy_model the SentenceTransformer (and its torch import) loads
+        on a background thread; anything that needs to encode waits up to
+        model_wait_seconds for it, while centroid, neighbour-table, lexical
+        and metadata lookups work immediately. Construction never waits for
+        the model: the embedding store opens once a stored vector, the store's
+        own metadata or the loaded model gives the embedding dimension.
+        """
+        if search_backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown search backend: {search_backend}")
         self.db_path = db_path
+        self.search_backend = search_backend
+        self.index_storage = index_storage
+
+        # Batch sizes for bulk ingest: sentences per encode call and rows per
+        # Chroma read/write (also keeps IN (...) lists under SQLite's limits)
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
 
         # Enhanced ChromaDB settings for better performance and memory management
         # Using the new ChromaDB client configuration
@@ -24,19 +64,144 @@ class VectorDBManager:
             logging.warning(f"Persistent client failed, using basic client: {e}")
             self.client = chromadb.Client()
 
-        # Initialize embedding model with caching for better performance
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-
-        # Cache for embeddings to avoid recomputation
-        self.embedding_cache = {}
+        # Embedding model, loaded here or on a background thread (see the embedder property)
+        self.model_name = model_name
+        self.model_wait_seconds = model_wait_seconds
+        self._embedder = None
+        self._model_error: Optional[str] = None
+        self._model_load_seconds: Optional[float] = None
+        self._model_ready = threading.Event()
+        # Opened once the embedding dimension is known: at once when the model,
+        # a stored vector or the store's metadata gives it, else by the model loader
+        self.embedding_store: Optional[EmbeddingStore] = None
+        self._embedding_store_path = embedding_store_path or os.path.join(db_path, "embedding_cache")
+        self._embedding_store_lock = threading.Lock()
+        self.collections = {}
+        if lazy_model:
+            threading.Thread(target=self._load_model, name="embedding-model-loader", daemon=True).start()
+        else:
+            self._load_model()
+            if self._embedder is None:
+                raise RuntimeError(f"Embedding model {model_name} failed to load: {self._model_error}")
+
+        # Shared queue that batches concurrent small encode requests (search queries)
+        self.embedding_batcher = EmbeddingBatcher(
+            lambda texts: self.embedder.encode(texts, batch_size=self.embed_batch_size),
+            max_batch_size=embed_batch_size,
+            max_wait_ms=embed_max_wait_ms
+        )
+
+        # Byte-bounded LRU for corpus and query embeddings to avoid recomputation
+        self.embedding_cache = EmbeddingLRUCache(max_bytes=embedding_cache_bytes)
 
         # Create collections for different exam types
-        self.collections = {}
         self._initialize_collections()
 
+        # Persistent corpus embeddings keyed by model + content hash, shared
+        # across restarts and worker processes
+        dim = self._known_dimension()
+        if dim is not None:
+            self._open_embedding_store(dim)
+
+        # Threads for searching several exam collections concurrently
+        self._search_pool = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="vector-search")
+
+        # In-memory search indexes per exam type (numpy backend only)
+        self.indexes: Dict[str, NumpyVectorIndex] = {}
+        if search_backend == "numpy":
+            self._load_indexes()
+
+        # Precomputed per-subject nearest neighbours and topic centroids, rebuilt after each ingest
+        self.precomputed_path = os.path.join(db_path, "precomputed")
+        self.neighbor_tables: Dict[str, NeighborTable] = {}
+        for exam_type in self.collections:
+            table = NeighborTable.load(self._neighbor_table_file(exam_type))
+            if table is not None:
+                self.neighbor_tables[exam_type] = table
+        self.topic_centroids = TopicCentroids.load(self._topic_centroids_file())
+
+        # Exact counts and distinct metadata values per collection, updated on every write
+        self.collection_stats = CollectionStats(os.path.join(self.precomputed_path, "collection_stats.json"))
+        self._load_collection_stats()
+        # On-disk size, recomputed only after a write
+        self._db_size_bytes: Optional[int] = None
+
+        # BM25 over topic keywords, chapter and topic, rebuilt from the corpus on load
+        self.lexical_index = BM25Index()
+
         logging.info(f" Vector DB initialized successfully at {db_path}")
         logging.info(f" ChromaDB using persistent storage with memory optimization")
 
+    def _load_model(self) -> None:
+        start = time.perf_counter()
+        try:
+            from sentence_transformers import SentenceTransformer
+            self._embedder = SentenceTransformer(self.model_name)
+            self._model_load_seconds = round(time.perf_counter() - start, 2)
+            logging.info(f"Embedding model {self.model_name} loaded in {self._model_load_seconds}s")
+            self._open_embedding_store(self._embedder.get_sentence_embedding_dimension())
+        except Exception as e:
+            self._model_error = str(e)
+            logging.error(f"Error loading embedding model {self.model_name}: {e}")
+        finally:
+            self._model_ready.set()
+
+    @property
+    def embedder(self):
+        """The SentenceTransformer, waiting up to model_wait_seconds while it loads"""
+        if not self._model_ready.wait(self.model_wait_seconds):
+            raise RuntimeError(f"Embedding model {self.model_name} is still loading")
+        if self._embedder is None:
+            raise RuntimeError(f"Embedding model {self.model_name} failed to load: {self._model_error}")
+        return self._embedder
+
+    def wait_for_model(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model has loaded or failed (or timeout passes); True when it is usable"""
+        return self._model_ready.wait(timeout) and self._embedder is not None
+
+    def model_status(self) -> Dict[str, Any]:
+        """Warm state of the embedding model: loading, ready or failed"""
+        if not self._model_ready.is_set():
+            state = "loading"
+        else:
+            state = "ready" if self._embedder is not None else "failed"
+        return {
+            "state": state,
+            "model_name": self.model_name,
+            "load_seconds": self._model_load_seconds,
+            "error": self._model_error
+        }
+
+    def _open_embedding_store(self, dim: int) -> None:
+        """Open the persistent embedding store for dim-sized vectors unless it is already open"""
+        with self._embedding_store_lock:
+            if self.embedding_store is not None:
+                return
+            try:
+                self.embedding_store = EmbeddingStore(self._embedding_store_path, self.model_name, dim)
+            except Exception as e:
+                logging.warning(f"Persistent embedding store unavailable, embeddings will not be reused: {e}")
+
+    def _known_dimension(self) -> Optional[int]:
+        """Embedding size from the loaded model, a stored vector or the embedding store's metadata, without waiting"""
+        if self._embedder is not None:
+            return self._embedder.get_sentence_embedding_dimension()
+        if self.embedding_store is not None:
+            return self.embedding_store.dim
+        for collection in self.collections.values():
+            try:
+                stored = collection.get(limit=1, include=['embeddings'])
+                if stored['embeddings']:
+                    return len(stored['embeddings'][0])
+            except Exception:
+                continue
+        return EmbeddingStore.stored_dim(self._embedding_store_path, self.model_name)
+
+    def _embedding_dimension(self) -> int:
+        """Embedding size as known without the model, else after waiting for the model"""
+        dim = self._known_dimension()
+        return dim if dim is not None else self.embedder.get_sentence_embedding_dimension()
+
     def _initialize_collections(self):
         """Initialize collections for each exam type"""
         exam_types = ["JEE_MAIN", "JEE_ADVANCED", "NEET", "BITSAT"]
@@ -52,6 +217,66 @@ class VectorDBManager:
             except Exception as e:
                 logging.error(f"Error initializing collection {collection_name}: {e}")
 
+    def _iter_collection(self, collection, include: List[str]):
+        """Yield a collection's rows in get() batches of write_batch_size"""
+        offset = 0
+        while True:
+            batch = collection.get(limit=self.write_batch_size, offset=offset, include=include)
+            if not batch['ids']:
+                break
+            yield batch
+            offset += len(batch['ids'])
+
+    def _load_indexes(self) -> None:
+        """Build the in-memory index of each collection from Chroma"""
+        dim = self._embedding_dimension()
+        for exam_type, collection in self.collections.items():
+            index = NumpyVectorIndex(
+                dim,
+                storage=self.index_storage,
+                rerank_vectors=self._stored_embeddings
+            )
+            try:
+                for batch in self._iter_collection(collection, ['embeddings', 'documents', 'metadatas']):
+                    index.add(batch['ids'], batch['embeddings'], batch['documents'], batch['metadatas'])
+                logging.info(f"Loaded {len(index)} vectors for {exam_type} into the in-memory index")
+            except Exception as e:
+                logging.error(f"Error loading in-memory index for {exam_type}: {e}")
+            self.indexes[exam_type] = index
+
+    def _load_collection_stats(self) -> None:
+        """Load persisted stats, recounting any collection whose total no longer matches"""
+        self.collection_stats.load()
+        recounted = False
+        for exam_type, collection in self.collections.items():
+            try:
+                if self.collection_stats.total(exam_type) == collection.count():
+                    continue
+                self.collection_stats.reset(exam_type, (
+                    metadata for batch in self._iter_collection(collection, ['metadatas'])
+                    for metadata in batch['metadatas']
+                ))
+                recounted = True
+            except Exception as e:
+                logging.error(f"Error counting collection stats for {exam_type}: {e}")
+        if recounted:
+            self._save_collection_stats()
+
+    def _save_collection_stats(self) -> None:
+        self._db_size_bytes = None
+        try:
+            self.collection_stats.save()
+        except Exception as e:
+            logging.warning(f"Error saving collection stats: {e}")
+
+    def _stored_embeddings(self, texts: List[str]) -> List[Optional[Any]]:
+        """Exact corpus embeddings from the on-disk store, None where a text is not stored"""
+        if self.embedding_store is None:
+            return [None] * len(texts)
+        hashes = [hashlib.md5(text.encode()).hexdigest() for text in texts]
+        found = self.embedding_store.get_many(hashes)
+        return [found.get(text_hash) for text_hash in hashes]
+
     def add_question(self, question: Question) -> bool:
         """Add a single question to the vector database with caching"""
         try:
@@ -76,17 +301,7 @@ class VectorDBManager:
             embedding = self._get_cached_embedding(question.question_text)
 
             # Prepare metadata - handle enum values
-            difficulty_str = question.difficulty.value if hasattr(question.difficulty, 'value') else str(question.difficulty)
-
-            metadata = {
-                "subject": question.subject,
-                "chapter": question.chapter,
-                "topic": question.topic,
-                "difficulty": difficulty_str,
-                "marks": question.marks,
-                "neg_marks": getattr(question, 'neg_marks', 1),
-                "year": getattr(question, 'year', 2024)
-            }
+            metadata = self._build_metadata(question)
 
             # Add to collection
             collection.add(
@@ -95,6 +310,10 @@ class VectorDBManager:
                 metadatas=[metadata],
                 ids=[question.id]
             )
+            if exam_type_str in self.indexes:
+                self.indexes[exam_type_str].add([question.id], [embedding], [question.question_text], [metadata])
+            self.collection_stats.add(exam_type_str, [metadata])
+            self._save_collection_stats()
 
             logging.info(f" Added question {question.id} to vector DB")
             return True
@@ -105,163 +324,566 @@ class VectorDBManager:
 
     def _get_cached_embedding(self, text: str) -> List[float]:
         """Get embedding with caching to improve performance"""
-        # Create a hash of the text for caching
-        import hashlib
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-
-        if text_hash in self.embedding_cache:
-            return self.embedding_cache[text_hash]
-
-        # Generate new embedding
-        embedding = self.embedder.encode(text).tolist()
-
-        # Cache the embedding (limit cache size to prevent memory issues)
-        if len(self.embedding_cache) < 10000: # Limit to 10k cached embeddings
-            self.embedding_cache[text_hash] = embedding
-
-        return embedding
+        return self._get_cached_embeddings([text])[0]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        """Embed a search query through the LRU cache (never persisted to disk)"""
+        return self._get_cached_embeddings([query], persist=False)[0]
+
+    def _get_cached_embeddings(self, texts: List[str], persist: bool = True) -> List[List[float]]:
+        """Embed texts via the LRU cache, then the on-disk store, then one batched encode.
+
+        Text hashes are md5 of the text, which matches a question's content_hash.
+        Only corpus texts are persisted; query strings stay in memory.
+        """
+        hashes = [hashlib.md5(text.encode()).hexdigest() for text in texts]
+
+        found = {}
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash in found or text_hash in missing:
+                continue
+            vector = self.embedding_cache.get(text_hash)
+            if vector is not None:
+                found[text_hash] = vector
+            else:
+                missing[text_hash] = text
+
+        if missing and persist and self.embedding_store is not None:
+            for text_hash, vector in self.embedding_store.get_many(list(missing)).items():
+                found[text_hash] = vector
+                self.embedding_cache.put(text_hash, vector)
+                del missing[text_hash]
+
+        if missing:
+            # Bulk ingest encodes directly; small requests share batches with concurrent callers
+            if len(missing) >= self.embed_batch_size:
+                vectors = self.embedder.encode(list(missing.values()), batch_size=self.embed_batch_size)
+            else:
+                vectors = self.embedding_batcher.encode(list(missing.values()))
+            if persist and self.embedding_store is not None:
+                try:
+                    self.embedding_store.put_many(list(missing), vectors)
+                except Exception as e:
+                    logging.warning(f"Error persisting embeddings: {e}")
+            for text_hash, vector in zip(missing, vectors):
+                found[text_hash] = vector
+                self.embedding_cache.put(text_hash, vector)
+
+        return [found[text_hash].tolist() for text_hash in hashes]
+
+    def _build_metadata(self, question: Question) -> Dict[str, Any]:
+        """Chroma metadata for a question - handle enum values"""
+        difficulty_str = question.difficulty.value if hasattr(question.difficulty, 'value') else str(question.difficulty)
+
+        return {
+            "subject": question.subject,
+            "chapter": question.chapter,
+            "topic": question.topic,
+            "difficulty": difficulty_str,
+            "marks": question.marks,
+            "neg_marks": getattr(question, 'neg_marks', 1),
+            "year": getattr(question, 'year', 2024)
+        }
+
+    def _existing_ids(self, collection, ids: List[str]) -> set:
+        """Bulk existence check, chunked to stay under SQLite variable limits"""
+        existing = set()
+        for start in range(0, len(ids), self.write_batch_size):
+            result = collection.get(ids=ids[start:start + self.write_batch_size], include=[])
+            existing.update(result['ids'])
+        return existing
 
     def add_questions_batch(self, questions: List[Question]) -> int:
-        """Add multiple questions in batch"""
+        """Add multiple questions in batch.
+
+        Does one bulk existence check per collection, encodes the new
+        questions in batches of embed_batch_size and writes them in chunks of
+        write_batch_size. Returns how many questions are now stored, counting
+        ones that already existed.
+        """
         success_count = 0
+        written = 0
 
-        # Group questions by exam type
+        # Group questions by exam type, dropping duplicate IDs
         questions_by_exam = {}
         for question in questions:
-            if question.exam_type not in questions_by_exam:
-                questions_by_exam[question.exam_type] = []
-            questions_by_exam[question.exam_type].append(question)
+            exam_type_str = question.exam_type.value if hasattr(question.exam_type, 'value') else str(question.exam_type)
+            questions_by_exam.setdefault(exam_type_str, {})[question.id] = question
 
         # Process each exam type separately
-        for exam_type, exam_questions in questions_by_exam.items():
+        for exam_type_str, exam_questions in questions_by_exam.items():
             try:
-                # Handle both enum and string exam types
-                exam_type_str = exam_type.value if hasattr(exam_type, 'value') else str(exam_type)
-
                 collection = self.collections.get(exam_type_str)
                 if not collection:
                     logging.error(f"Collection not found for exam type: {exam_type_str}")
                     continue
 
-                # Prepare batch data
-                embeddings = []
-                documents = []
-                metadatas = []
-                ids = []
-
-                for question in exam_questions:
-                    # Use cached embedding for better performance
-                    embedding = self._get_cached_embedding(question.question_text)
-                    embeddings.append(embedding)
-                    documents.append(question.question_text)
-
-                    # Handle enum values
-                    difficulty_str = question.difficulty.value if hasattr(question.difficulty, 'value') else str(question.difficulty)
-
-                    metadata = {
-                        "subject": question.subject,
-                        "chapter": question.chapter,
-                        "topic": question.topic,
-                        "difficulty": difficulty_str,
-                        "marks": question.marks,
-                        "neg_marks": getattr(question, 'neg_marks', 1),
-                        "year": getattr(question, 'year', 2024)
-                    }
-                    metadatas.append(metadata)
-                    ids.append(question.id)
-
-                # Add batch to collection
-                collection.add(
-                    embeddings=embeddings,
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
-
-                success_count += len(exam_questions)
-                logging.info(f"Added {len(exam_questions)} questions for {exam_type_str}")
+                existing = self._existing_ids(collection, list(exam_questions))
+                new_questions = [q for qid, q in exam_questions.items() if qid not in existing]
+                success_count += len(existing)
+
+                for start in range(0, len(new_questions), self.write_batch_size):
+                    chunk = new_questions[start:start + self.write_batch_size]
+                    documents = [q.question_text for q in chunk]
+                    embeddings = self._get_cached_embeddings(documents)
+                    metadatas = [self._build_metadata(q) for q in chunk]
+                    ids = [q.id for q in chunk]
+
+                    # Add batch to collection
+                    collection.add(
+                        embeddings=embeddings,
+                        documents=documents,
+                        metadatas=metadatas,
+                        ids=ids
+                    )
+                    if exam_type_str in self.indexes:
+                        self.indexes[exam_type_str].add(ids, embeddings, documents, metadatas)
+                    self.collection_stats.add(exam_type_str, metadatas)
+                    success_count += len(chunk)
+                    written += len(chunk)
+
+                logging.info(f"Added {len(new_questions)} questions for {exam_type_str} ({len(existing)} already present)")
 
             except Exception as e:
-                logging.error(f"Error adding batch for {exam_type}: {e}")
+                logging.error(f"Error adding batch for {exam_type_str}: {e}")
 
+        if written:
+            self._save_collection_stats()
         return success_count
 
+    @staticmethod
+    def _filters(subject: str = None, topic: str = None, chapter: str = None,
+                 difficulty: str = None) -> Dict[str, str]:
+        """Metadata equality filters that are set"""
+        return {
+            key: value for key, value in (
+                ("subject", subject), ("topic", topic), ("chapter", chapter), ("difficulty", difficulty)
+            ) if value
+        }
+
+    @staticmethod
+    def _build_where(filters: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Chroma where clause, combining several conditions with $and"""
+        conditions = [{key: value} for key, value in filters.items()]
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def _query_unseen(self, collection, query_embedding: List[float], n_results: int,
+                      where: Optional[Dict[str, Any]], exclude_ids: Set[str],
+                      with_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """kNN that widens k until n_results hits outside exclude_ids are found.
+
+        At most len(exclude_ids) neighbours can be excluded, so k never needs to
+        exceed n_results + len(exclude_ids).
+        """
+        limit = min(collection.count(), n_results + len(exclude_ids))
+        fetch = min(limit, n_results + min(len(exclude_ids), n_results))
+        questions = []
+        while fetch > 0:
+            results = collection.query(query_embeddings=[query_embedding], n_results=fetch, where=where,
+                                       include=self._query_include(with_embeddings))
+            questions = self._unseen_query_rows(results, 0, exclude_ids)
+            if len(questions) >= n_results or len(results['ids'][0]) < fetch or fetch >= limit:
+                break
+            fetch = min(fetch * 2, limit)
+        return questions[:n_results]
+
+    @staticmethod
+    def _query_include(with_embeddings: bool) -> List[str]:
+        include = ["metadatas", "documents", "distances"]
+        return include + ["embeddings"] if with_embeddings else include
+
+    @staticmethod
+    def _unseen_query_rows(results: Dict[str, Any], row: int, exclude_ids: Set[str]) -> List[Dict[str, Any]]:
+        """Hits for one query embedding of a Chroma query result, minus excluded IDs"""
+        ids = results['ids'][row]
+        embeddings = results['embeddings'][row] if results.get('embeddings') else None
+        hits = []
+        for i in range(len(ids)):
+            if ids[i] in exclude_ids:
+                continue
+            hit = {
+                'question_id': ids[i],
+                'content': results['documents'][row][i],
+                'metadata': results['metadatas'][row][i],
+                'distance': results['distances'][row][i] if results.get('distances') else 0
+            }
+            if embeddings is not None:
+                hit['embedding'] = embeddings[i]
+            hits.append(hit)
+        return hits
+
+    def _get_unseen(self, collection, n_results: int, where: Optional[Dict[str, Any]],
+                    exclude_ids: Set[str]) -> List[Dict[str, Any]]:
+        """Page through filtered questions until n_results outside exclude_ids are found"""
+        page_size = n_results + min(len(exclude_ids), n_results)
+        offset = 0
+        questions = []
+        while len(questions) < n_results and page_size > 0:
+            results = collection.get(where=where, limit=page_size, offset=offset)
+            for i, question_id in enumerate(results['ids']):
+                if question_id in exclude_ids:
+                    continue
+                questions.append({
+                    'question_id': question_id,
+                    'content': results['documents'][i],
+                    'metadata': results['metadatas'][i],
+                    'distance': 0
+                })
+            if len(results['ids']) < page_size:
+                break
+            offset += page_size
+            page_size *= 2
+        return questions[:n_results]
+
     def search_questions(
         self,
-        exam_type: str,
+        exam_type: Union[str, Sequence[str], None],
         query: str = None,
         n_results: int = 10,
         subject: str = None,
         topic: str = None,
         chapter: str = None,
         difficulty: str = None,
-        exclude_ids: List[str] = None
+        exclude_ids: Iterable[str] = None,
+        diversity: float = None,
+        candidate_factor: int = 4
     ) -> List[Dict[str, Any]]:
-        """Search for questions based on various criteria"""
+        """Search for questions based on various criteria.
+
+        Exclusions are applied inside retrieval: the search keeps widening until
+        n_results unseen questions are found or the filtered set is exhausted.
+        A list of exam types (or None for all) fans out across collections.
+
+        With a query and a diversity in (0, 1], candidate_factor * n_results
+        nearest questions are re-ranked by maximal marginal relevance, so the
+        n_results returned are relevant but not near-duplicates of each other.
+        """
+        if query and diversity:
+            return self.search_questions_many([query], [{
+                'exam_type': exam_type, 'n_results': n_results, 'subject': subject, 'topic': topic,
+                'chapter': chapter, 'difficulty': difficulty, 'exclude_ids': exclude_ids,
+                'diversity': diversity, 'candidate_factor': candidate_factor
+            }])[0]
+
+        if not isinstance(exam_type, str):
+            return self._search_exams(
+                self._exam_types_for(exam_type), query, n_results, subject, topic, chapter, difficulty, exclude_ids
+            )
+
         try:
             collection = self.collections.get(exam_type)
             if not collection:
                 logging.error(f"Collection not found for exam type: {exam_type}")
                 return []
 
-            # Build where clause for filtering
-            where_clause = {}
-            if subject:
-                where_clause["subject"] = subject
-            if topic:
-                where_clause["topic"] = topic
-            if chapter:
-                where_clause["chapter"] = chapter
-            if difficulty:
-                where_clause["difficulty"] = difficulty
+            filters = self._filters(subject, topic, chapter, difficulty)
+            where_clause = self._build_where(filters)
+            exclude_ids = exclude_ids if isinstance(exclude_ids, (set, frozenset)) else set(exclude_ids or ())
+            index = self.indexes.get(exam_type)
 
             if query:
                 # Semantic search with query
-                query_embedding = self.embedder.encode(query).tolist()
-                results = collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=n_results * 2, # Get more results for filtering
-                    where=where_clause if where_clause else None
+                query_embedding = self._get_query_embedding(query)
+                if index is not None:
+                    return index.search([query_embedding], n_results, filters, [exclude_ids])[0]
+                return self._query_unseen(collection, query_embedding, n_results, where_clause, exclude_ids)
+
+            if index is not None:
+                return index.get(n_results, filters, exclude_ids)
+
+            # Questions matching criteria, in collection order
+            return self._get_unseen(collection, n_results, where_clause, exclude_ids)
+
+        except Exception as e:
+            logging.error(f"Error searching questions: {e}")
+            return []
+
+    def _exam_types_for(self, exam_type: Union[str, Sequence[str], None]) -> List[str]:
+        """Collections a search targets: one exam, several, or every exam for None"""
+        if exam_type is None:
+            return list(self.collections)
+        if isinstance(exam_type, str):
+            return [exam_type]
+        return list(dict.fromkeys(exam_type))
+
+    def _search_exams(self, exam_types: List[str], query: Optional[str], n_results: int,
+                      subject: str, topic: str, chapter: str, difficulty: str,
+                      exclude_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """search_questions over several collections: merged by distance, or concatenated without a query"""
+        exclude_ids = exclude_ids if isinstance(exclude_ids, (set, frozenset)) else set(exclude_ids or ())
+        if query:
+            return self.search_questions_many([query], [{
+                'exam_type': exam_types, 'n_results': n_results, 'subject': subject, 'topic': topic,
+                'chapter': chapter, 'difficulty': difficulty, 'exclude_ids': exclude_ids
+            }])[0]
+
+        questions = []
+        for exam_type in exam_types:
+            if len(questions) >= n_results:
+                break
+            questions.extend(self.search_questions(
+                exam_type, None, n_results - len(questions), subject, topic, chapter, difficulty, exclude_ids
+            ))
+        return questions
+
+    def search_questions_many(self, queries: List[Any],
+                              filters: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Run several semantic searches with one encode pass.
+
+        A query is either a string, embedded together with the other strings,
+        or a precomputed embedding such as a topic centroid. filters[i] holds
+        the search_questions keyword arguments for queries[i] (exam_type,
+        n_results, subject, topic, chapter, difficulty, exclude_ids, diversity,
+        candidate_factor); exam_type may be a list of exams, or None for all of
+        them.
+
+        Queries that share an exam and filter go to that collection as one
+        multi-embedding query, and a query left short by its exclusions is
+        widened on its own. Collections are searched concurrently on the search
+        pool and each query's hits are merged by distance, then re-ranked by
+        maximal marginal relevance when the query asks for diversity. Returns
+        one result list per query, in input order.
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        if not queries:
+            return results
+
+        try:
+            texts = [query for query in queries if isinstance(query, str)]
+            encoded = iter(self._get_cached_embeddings(texts, persist=False) if texts else [])
+            embeddings = [next(encoded) if isinstance(query, str) else list(query) for query in queries]
+        except Exception as e:
+            logging.error(f"Error embedding search queries: {e}")
+            return results
+
+        plans = []
+        groups: Dict[tuple, List[int]] = {}
+        for i, query_filters in enumerate(filters):
+            metadata_filters = self._filters(
+                query_filters.get('subject'), query_filters.get('topic'),
+                query_filters.get('chapter'), query_filters.get('difficulty')
+            )
+            exclude_ids = query_filters.get('exclude_ids') or set()
+            if not isinstance(exclude_ids, (set, frozenset)):
+                exclude_ids = set(exclude_ids)
+            # Diverse queries fetch a wider candidate block, with embeddings, for MMR
+            n_results = query_filters.get('n_results', 10)
+            if query_filters.get('diversity'):
+                n_results *= query_filters.get('candidate_factor', 4)
+            plans.append((metadata_filters, exclude_ids, n_results))
+            with_embeddings = bool(query_filters.get('diversity'))
+            for exam_type in self._exam_types_for(query_filters.get('exam_type')):
+                groups.setdefault((exam_type, repr(metadata_filters), with_embeddings), []).append(i)
+
+        def search_group(exam_type: str, indices: List[int], with_embeddings: bool) -> List[List[Dict[str, Any]]]:
+            collection = self.collections.get(exam_type)
+            if not collection:
+                logging.error(f"Collection not found for exam type: {exam_type}")
+                return [[] for _ in indices]
+
+            metadata_filters = plans[indices[0]][0]
+            index = self.indexes.get(exam_type)
+            if index is not None:
+                batch = index.search(
+                    [embeddings[i] for i in indices],
+                    max(plans[i][2] for i in indices),
+                    metadata_filters,
+                    [plans[i][1] for i in indices],
+                    with_embeddings
                 )
-            else:
-                # Get random questions matching criteria
-                results = collection.get(
-                    where=where_clause if where_clause else None,
-                    limit=n_results * 2
+                return [batch[row][:plans[i][2]] for row, i in enumerate(indices)]
+
+            where = self._build_where(metadata_filters)
+            fetch = min(collection.count(), max(n + min(len(ex), n) for _, ex, n in (plans[i] for i in indices)))
+            if fetch <= 0:
+                return [[] for _ in indices]
+
+            batch = collection.query(
+                query_embeddings=[embeddings[i] for i in indices],
+                n_results=fetch,
+                where=where,
+                include=self._query_include(with_embeddings)
+            )
+            group_hits = []
+            for row, i in enumerate(indices):
+                _, exclude_ids, n_results = plans[i]
+                hits = self._unseen_query_rows(batch, row, exclude_ids)
+                if len(hits) < n_results and len(batch['ids'][row]) >= fetch:
+                    hits = self._query_unseen(collection, embeddings[i], n_results, where, exclude_ids,
+                                              with_embeddings)
+                group_hits.append(hits[:n_results])
+            return group_hits
+
+        if len(groups) > 1:
+            futures = {key: self._search_pool.submit(search_group, key[0], indices, key[2])
+                       for key, indices in groups.items()}
+        else:
+            futures = {}
+
+        for key, indices in groups.items():
+            exam_type = key[0]
+            try:
+                group_hits = futures[key].result() if key in futures else search_group(exam_type, indices, key[2])
+            except Exception as e:
+                logging.error(f"Error in batched search for {exam_type}: {e}")
+                continue
+            for i, hits in zip(indices, group_hits):
+                results[i].extend(hits)
+
+        # Merge each query's hits from several collections by distance
+        for i, hits in enumerate(results):
+            if len(self._exam_types_for(filters[i].get('exam_type'))) > 1:
+                results[i] = sorted(hits, key=lambda hit: hit['distance'])[:plans[i][2]]
+
+        for i, query_filters in enumerate(filters):
+            diversity = query_filters.get('diversity')
+            if diversity and results[i]:
+                hits = results[i]
+                picks = mmr_select(
+                    embeddings[i], [hit['embedding'] for hit in hits], query_filters.get('n_results', 10), diversity
                 )
+                results[i] = [hits[position] for position in picks]
+                for hit in results[i]:
+                    hit.pop('embedding', None)
 
-            # Process results
-            questions = []
-            if query:
-                # Query results format
-                for i in range(len(results['ids'][0])):
-                    if exclude_ids and results['ids'][0][i] in exclude_ids:
-                        continue
-
-                    questions.append({
-                        'question_id': results['ids'][0][i],
-                        'content': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'distance': results['distances'][0][i] if 'distances' in results else 0
-                    })
-            else:
-                # Get results format
-                for i in range(len(results['ids'])):
-                    if exclude_ids and results['ids'][i] in exclude_ids:
-                        continue
+        return results
 
-                    questions.append({
-                        'question_id': results['ids'][i],
-                        'content': results['documents'][i],
-                        'metadata': results['metadatas'][i],
-                        'distance': 0
-                    })
+    def rebuild_lexical_index(self, questions: Iterable[Dict[str, Any]], exam_of=None) -> None:
+        """Re-index processed question dicts; exam_of maps a question to its collection's exam type"""
+        self.lexical_index.rebuild(questions, exam_of=exam_of)
+
+    def hybrid_search(
+        self,
+        exam_type: Union[str, Sequence[str], None],
+        query: str,
+        n_results: int = 10,
+        subject: str = None,
+        topic: str = None,
+        chapter: str = None,
+        difficulty: str = None,
+        exclude_ids: Iterable[str] = None,
+        semantic_weight: float = 0.5,
+        candidate_factor: int = 4
+    ) -> List[Dict[str, Any]]:
+        """Fuse BM25 keyword scores with semantic similarity.
+
+        A query that is exactly one indexed keyword, chapter or topic with
+        enough matches is answered from the inverted index alone, scored by
+        BM25 relative to the best hit. Otherwise
+        both retrievers return candidate_factor * n_results candidates, each
+        score is scaled to [0, 1] (cosine similarity for the semantic side) and
+        hits are ranked by the weighted sum.
+        """
+        exclude_ids = exclude_ids if isinstance(exclude_ids, (set, frozenset)) else set(exclude_ids or ())
+        exam_types = self._exam_types_for(exam_type)
+        pool_size = n_results * candidate_factor
+
+        lexical = self.lexical_index.search(query, pool_size, {
+            'exam_type': exam_types, 'subject': subject, 'topic': topic,
+            'chapter': chapter, 'difficulty': difficulty
+        }, exclude_ids)
+        top_lexical = max((hit['lexical_score'] for hit in lexical), default=0.0) or 1.0
+
+        # Exact keyword / chapter / topic lookups skip the encoder entirely; scores stay in [0, 1]
+        if self.lexical_index.is_exact_term(query) and len(lexical) >= n_results:
+            return [
+                dict(hit, distance=None, semantic_score=0.0,
+                     lexical_score=hit['lexical_score'] / top_lexical, score=hit['lexical_score'] / top_lexical)
+                for hit in lexical[:n_results]
+            ]
+
+        semantic = self.search_questions(
+            exam_type, query, pool_size, subject, topic, chapter, difficulty, exclude_ids
+        )
+
+        fused: Dict[str, Dict[str, Any]] = {}
+        for hit in semantic:
+            # Embeddings are unit length, so squared L2 distance d gives cosine 1 - d / 2
+            fused[hit['question_id']] = dict(
+                hit, semantic_score=max(0.0, 1.0 - hit['distance'] / 2), lexical_score=0.0
+            )
+        for hit in lexical:
+            entry = fused.setdefault(hit['question_id'], dict(hit, distance=None, semantic_score=0.0))
+            entry['lexical_score'] = hit['lexical_score'] / top_lexical
 
-            return questions[:n_results]
+        for entry in fused.values():
+            entry['score'] = semantic_weight * entry['semantic_score'] + (1 - semantic_weight) * entry['lexical_score']
+        return sorted(fused.values(), key=lambda entry: entry['score'], reverse=True)[:n_results]
 
+    def _neighbor_table_file(self, exam_type: str) -> str:
+        return os.path.join(self.precomputed_path, f"neighbors_{exam_type.lower()}.npz")
+
+    def _topic_centroids_file(self) -> str:
+        return os.path.join(self.precomputed_path, "topic_centroids.npz")
+
+    def build_precomputed_tables(self, k: int = 50) -> Dict[str, int]:
+        """Recompute the top-k same-subject neighbour tables and topic centroids from the stored embeddings.
+
+        Reads each collection once; returns the number of questions covered per exam.
+        """
+        sizes = {}
+        centroid_parts = []
+        for exam_type, collection in self.collections.items():
+            try:
+                ids, vectors, metadatas = [], [], []
+                for batch in self._iter_collection(collection, ['embeddings', 'metadatas']):
+                    ids.extend(batch['ids'])
+                    vectors.extend(batch['embeddings'])
+                    metadatas.extend(batch['metadatas'])
+
+                if not ids:
+                    self.neighbor_tables.pop(exam_type, None)
+                    if os.path.exists(self._neighbor_table_file(exam_type)):
+                        os.remove(self._neighbor_table_file(exam_type))
+                    continue
+
+                subjects = [metadata.get('subject', '') for metadata in metadatas]
+                table = NeighborTable.build(ids, vectors, subjects, k=k)
+                table.save(self._neighbor_table_file(exam_type))
+                self.neighbor_tables[exam_type] = table
+                centroid_parts.append(TopicCentroids.build(exam_type, vectors, metadatas))
+                sizes[exam_type] = len(table)
+                logging.info(f"Built neighbour table for {exam_type}: {len(table)} questions x {table.k}")
+
+            except Exception as e:
+                logging.error(f"Error building precomputed tables for {exam_type}: {e}")
+
+        try:
+            self.topic_centroids = TopicCentroids.merge(centroid_parts)
+            self.topic_centroids.save(self._topic_centroids_file())
+            logging.info(f"Built {len(self.topic_centroids)} topic centroids")
         except Exception as e:
-            logging.error(f"Error searching questions: {e}")
-            return []
+            logging.error(f"Error saving topic centroids: {e}")
+
+        return sizes
+
+    def topic_centroid(self, exam_type: Union[str, Sequence[str], None], subject: str, chapter: str = None,
+                       topic: str = None) -> Optional[List[float]]:
+        """Precomputed centroid embedding for a subject / chapter / topic bucket, None if unknown.
+
+        Several exam types (or None for all) combine the bucket across those exams.
+        """
+        if self.topic_centroids is None:
+            return None
+        centroid = self.topic_centroids.centroid(exam_type, subject, chapter, topic)
+        return centroid.tolist() if centroid is not None else None
+
+    def similar_question_ids(self, question_id: str, count: int, exclude_ids: Iterable[str] = None,
+                             exam_type: str = None) -> Optional[List[str]]:
+        """Nearest same-subject questions from the precomputed table.
+
+        Returns None when no table holds the question, so callers can fall
+        back to a semantic search.
+        """
+        tables = [self.neighbor_tables.get(exam_type)] if exam_type else list(self.neighbor_tables.values())
+        exclude_ids = exclude_ids if isinstance(exclude_ids, (set, frozenset)) else set(exclude_ids or ())
+        for table in tables:
+            if table is not None and question_id in table:
+                return table.similar(question_id, count, exclude_ids)
+        return None
 
     def get_question_by_id(self, exam_type: str, question_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific question by ID"""
@@ -285,39 +907,78 @@ class VectorDBManager:
             logging.error(f"Error getting question by ID: {e}")
             return None
 
-    def get_collection_stats(self, exam_type: str) -> Dict[str, Any]:
-        """Get statistics for a collection"""
-        try:
-            collection = self.collections.get(exam_type)
-            if not collection:
-                return {}
-
-            count = collection.count()
-
-            # Get sample of metadata to analyze distribution
-            sample = collection.get(limit=1000)
-
-            stats = {
-                "total_questions": count,
-                "subjects": set(),
-                "topics": set(),
-                "chapters": set(),
-                "difficulties": set()
-            }
+    def retain_only(self, ids_by_exam: Dict[str, Iterable[str]], max_fraction: float = 1.0) -> int:
+        """Delete every stored question that is not listed for its collection.
+
+        Cleans out questions routed to the wrong exam by older builds and
+        vectors left behind by removed files. A collection that would lose
+        more than max_fraction of its questions is left untouched, since that
+        points at an incomplete ID list rather than stale vectors. Returns how
+        many were deleted.
+        """
+        deleted = 0
+        for exam_type, collection in self.collections.items():
+            try:
+                keep = set(ids_by_exam.get(exam_type, ()))
+                stale, stale_metadatas = [], []
+                stored = 0
+                for batch in self._iter_collection(collection, ['metadatas']):
+                    stored += len(batch['ids'])
+                    for question_id, metadata in zip(batch['ids'], batch['metadatas']):
+                        if question_id not in keep:
+                            stale.append(question_id)
+                            stale_metadatas.append(metadata)
+                if stale and len(stale) > max_fraction * stored:
+                    logging.warning(f"Not pruning {exam_type}: {len(stale)} of {stored} questions would be removed")
+                    continue
+                for start in range(0, len(stale), self.write_batch_size):
+                    collection.delete(ids=stale[start:start + self.write_batch_size])
+                self.collection_stats.remove(exam_type, stale_metadatas)
+                if stale and exam_type in self.indexes:
+                    self.indexes[exam_type].remove(stale)
+                if stale:
+                    logging.info(f"Removed {len(stale)} stale questions from {exam_type}")
+                deleted += len(stale)
+            except Exception as e:
+                logging.error(f"Error pruning collection for {exam_type}: {e}")
+        if deleted:
+            self._save_collection_stats()
+        return deleted
+
+    def delete_questions(self, question_ids: List[str], exam_type: str = None) -> bool:
+        """Delete questions by ID from one collection, or from every collection when exam_type is None"""
+        if not question_ids:
+            return True
 
-            for metadata in sample['metadatas']:
-                stats["subjects"].add(metadata.get("subject", ""))
-                stats["topics"].add(metadata.get("topic", ""))
-                stats["chapters"].add(metadata.get("chapter", ""))
-                stats["difficulties"].add(metadata.get("difficulty", ""))
+        try:
+            exam_types = [exam_type] if exam_type else list(self.collections)
+            for name in exam_types:
+                collection = self.collections[name]
+                # Only IDs present in this collection come back, so stats stay exact
+                for start in range(0, len(question_ids), self.write_batch_size):
+                    chunk = question_ids[start:start + self.write_batch_size]
+                    stored = collection.get(ids=chunk, include=['metadatas'])
+                    if stored['ids']:
+                        collection.delete(ids=stored['ids'])
+                        self.collection_stats.remove(name, stored['metadatas'])
+            self._save_collection_stats()
+            for name, index in self.indexes.items():
+                if exam_type is None or name == exam_type:
+                    index.remove(question_ids)
+
+            logging.info(f" Deleted {len(question_ids)} questions from vector DB")
+            return True
 
-            # Convert sets to lists for JSON serialization
-            stats["subjects"] = list(stats["subjects"])
-            stats["topics"] = list(stats["topics"])
-            stats["chapters"] = list(stats["chapters"])
-            stats["difficulties"] = list(stats["difficulties"])
+        except Exception as e:
+            logging.error(f" Error deleting questions from vector DB: {e}")
+            return False
 
-            return stats
+    def get_collection_stats(self, exam_type: str) -> Dict[str, Any]:
+        """Get statistics for a collection from the incrementally maintained counters"""
+        try:
+            if exam_type not in self.collections:
+                return {}
+            return self.collection_stats.summary(exam_type)
 
         except Exception as e:
             logging.error(f"Error getting collection stats: {e}")
@@ -332,6 +993,11 @@ class VectorDBManager:
                 name=collection_name,
                 metadata={"exam_type": exam_type}
             )
+            if exam_type in self.indexes:
+                self.indexes[exam_type].clear()
+            self.neighbor_tables.pop(exam_type, None)
+            self.collection_stats.reset(exam_type)
+            self._save_collection_stats()
             logging.info(f" Reset collection for {exam_type}")
             return True
 
@@ -339,40 +1005,105 @@ class VectorDBManager:
             logging.error(f" Error resetting collection: {e}")
             return False
 
+    def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """Write every collection's IDs, documents, metadata and embeddings to one snapshot file"""
+        exams = {}
+        for exam_type, collection in self.collections.items():
+            data = {'ids': [], 'documents': [], 'metadatas': [], 'embeddings': []}
+            for batch in self._iter_collection(collection, ['embeddings', 'documents', 'metadatas']):
+                for key in data:
+                    data[key].extend(batch[key])
+            exams[exam_type] = data
+        return write_snapshot(path, self.model_name, self._embedding_dimension(), exams)
+
+    def import_snapshot(self, path: str) -> Dict[str, Any]:
+        """Replace the collections in a snapshot with its contents, without encoding anything.
+
+        The snapshot's vectors also seed the embedding store, so a later ingest
+        of the same questions reuses them. Raises ValueError for a snapshot of
+        another format version, model or dimension, or with a bad checksum.
+        """
+        start = time.perf_counter()
+        header, exams = read_snapshot(path, self.model_name)
+        # A fresh replica may still be loading the model; the snapshot gives the dimension
+        self._open_embedding_store(header['dim'])
+        if self.embedding_store is not None and header['dim'] != self.embedding_store.dim:
+            raise ValueError(f"Snapshot dimension {header['dim']} does not match {self.embedding_store.dim}")
+
+        counts = {}
+        for exam_type, data in exams.items():
+            if exam_type not in self.collections:
+                logging.warning(f"Skipping unknown collection {exam_type} in snapshot")
+                continue
+            if not self.reset_collection(exam_type):
+                raise RuntimeError(f"Could not reset collection {exam_type} before import")
+
+            collection = self.collections[exam_type]
+            ids, documents, metadatas, embeddings = data['ids'], data['documents'], data['metadatas'], data['embeddings']
+            for offset in range(0, len(ids), self.write_batch_size):
+                end = offset + self.write_batch_size
+                collection.add(
+                    ids=ids[offset:end],
+                    embeddings=embeddings[offset:end].tolist(),
+                    documents=documents[offset:end],
+                    metadatas=metadatas[offset:end]
+                )
+            if exam_type in self.indexes:
+                self.indexes[exam_type].add(ids, embeddings, documents, metadatas)
+            self.collection_stats.reset(exam_type, metadatas)
+
+            if self.embedding_store is not None:
+                try:
+                    self.embedding_store.put_many(
+                        [hashlib.md5(document.encode()).hexdigest() for document in documents], embeddings
+                    )
+                except Exception as e:
+                    logging.warning(f"Error seeding embedding store from snapshot: {e}")
+            counts[exam_type] = len(ids)
+
+        self._save_collection_stats()
+        self.build_precomputed_tables()
+        seconds = round(time.perf_counter() - start, 2)
+        logging.info(f"Imported snapshot {path} with {sum(counts.values())} questions in {seconds}s")
+        return {"counts": counts, "seconds": seconds, "created_at": header.get('created_at')}
+
     def get_memory_usage(self) -> Dict[str, Any]:
         """Get memory usage statistics"""
         try:
             import os
             import psutil
 
-            # Get ChromaDB file size
-            db_size = 0
-            if os.path.exists(self.db_path):
-                for root, dirs, files in os.walk(self.db_path):
-                    for file in files:
-                        db_size += os.path.getsize(os.path.join(root, file))
+            # Get ChromaDB file size, walking the directory only after writes
+            if self._db_size_bytes is None:
+                db_size = 0
+                if os.path.exists(self.db_path):
+                    for root, dirs, files in os.walk(self.db_path):
+                        for file in files:
+                            db_size += os.path.getsize(os.path.join(root, file))
+                self._db_size_bytes = db_size
+            db_size = self._db_size_bytes
 
             # Get process memory usage
             process = psutil.Process()
             memory_info = process.memory_info()
 
             # Get collection counts
-            collection_stats = {}
-            total_questions = 0
-            for exam_type, collection in self.collections.items():
-                try:
-                    count = collection.count()
-                    collection_stats[exam_type] = count
-                    total_questions += count
-                except:
-                    collection_stats[exam_type] = 0
+            collection_stats = {exam_type: self.collection_stats.total(exam_type) for exam_type in self.collections}
+            total_questions = sum(collection_stats.values())
 
             return {
                 "database_size_mb": round(db_size / (1024 * 1024), 2),
                 "process_memory_mb": round(memory_info.rss / (1024 * 1024), 2),
                 "embedding_cache_size": len(self.embedding_cache),
+                "embedding_cache": self.embedding_cache.stats(),
+                "embedding_store_size": len(self.embedding_store) if self.embedding_store is not None else 0,
+                "embedding_batcher": self.embedding_batcher.stats(),
+                "embedding_model": self.model_status(),
                 "total_questions": total_questions,
                 "collections": collection_stats,
+                "search_backend": self.search_backend,
+                "index_storage": self.index_storage,
+                "vector_index_mb": round(sum(index.nbytes for index in self.indexes.values()) / (1024 * 1024), 2),
                 "database_path": self.db_path
             }
 
@@ -383,12 +1114,10 @@ class VectorDBManager:
     def optimize_database(self) -> bool:
         """Optimize database performance and clean up"""
         try:
-            # Clear embedding cache if it's getting too large
-            if len(self.embedding_cache) > 5000:
-                # Keep only the most recent 2500 embeddings
-                cache_items = list(self.embedding_cache.items())
-                self.embedding_cache = dict(cache_items[-2500:])
-                logging.info(f"🧹 Cleaned embedding cache, kept 2500 most recent entries")
+            # Trim embedding cache to half its budget, evicting least-recently-used entries
+            evicted = self.embedding_cache.shrink(self.embedding_cache.max_bytes // 2)
+            if evicted:
+                logging.info(f"🧹 Cleaned embedding cache, evicted {evicted} least-recently-used entries")
 
             logging.info(f"✨ Database optimization completed")
             return True